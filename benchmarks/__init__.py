@@ -0,0 +1,4 @@
+"""This package contains benchmarks comparing the server's performance before and after
+optimizations. Run them from the project root directory with, for instance:
+
+    python -m benchmarks.session_validation_benchmark"""
@@ -0,0 +1,48 @@
+"""This module contains code shared by the benchmarks, which creates the app with its
+databases in a temporary project root directory and registers and logs in users through
+the app's pages (with the Flask test client)."""
+
+import contextlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import server_constants
+
+# password of the users registered by the benchmarks
+BENCHMARK_USER_PASSWORD = "Benchmark#1234"
+
+def create_benchmark_app():
+    """This function creates the app with empty databases in a temporary project root
+    directory (with a copy of the common password list), and returns the app and the
+    temporary directory (removed by calling its cleanup function)."""
+    project_root_directory = tempfile.TemporaryDirectory()
+    shutil.copytree(os.path.join(server_constants.PROJECT_ROOT_DIRECTORY, "static"),
+                    os.path.join(project_root_directory.name, "static"))
+    server_constants.PROJECT_ROOT_DIRECTORY = project_root_directory.name
+
+    # (imported here, as importing main creates the Flask app)
+    import main # pylint: disable=import-outside-toplevel
+    app = run_quietly(main.create_app, False)
+    return app, project_root_directory, main.release_server_resources
+
+def run_quietly(function, *function_parameters):
+    """This function calls function with the parameters with its printed output (such as
+    the database query messages printed on every request) discarded, and returns its
+    result."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*function_parameters)
+
+def register_and_log_in(test_client, username):
+    """This function registers a user with the username and logs them in, and returns
+    their session ID (or None if the login failed)."""
+    run_quietly(lambda: test_client.post("/register/", data={"registration_form": "1",
+        "Username": username, "Password": BENCHMARK_USER_PASSWORD, "Name": "Benchmark",
+        "Email": username + "@example.com"}))
+    login_response = run_quietly(lambda: test_client.post("/", data={"Username": username,
+        "Password": BENCHMARK_USER_PASSWORD}))
+
+    session_id_match = re.search(r'name="session_id" value="([^"]*)"',
+                                 login_response.get_data(as_text=True))
+    return session_id_match.group(1) if session_id_match else None
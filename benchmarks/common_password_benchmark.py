@@ -0,0 +1,125 @@
+"""This module contains the common password benchmark, which measures the load time,
+memory use and lookup time of the common password list when stored as a list (searched
+linearly; the previous behavior), as a frozenset and as a memory-mapped hash file. It is
+run with the shipped list (static/CommonPassword.txt) and with a generated list of
+GENERATED_PASSWORD_COUNT passwords (the size of a breached password corpus). Run it from
+the project root directory with:
+
+    python -m benchmarks.common_password_benchmark"""
+
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+import server_constants
+from benchmarks import benchmark_app_module
+from webpage_modules import common_password_module
+
+# number of passwords in the generated password list
+GENERATED_PASSWORD_COUNT = 1000000
+# number of passwords looked up in each structure (half of which are on the list); fewer
+# are looked up in lists, as each lookup scans the list
+LOOKUP_COUNT = 10000
+LIST_LOOKUP_COUNT = 100
+
+def load_password_list(password_list_filepath):
+    """This function loads the password list into a list (as the server previously did),
+    and returns it."""
+    with open(password_list_filepath, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file.readlines()]
+
+def load_password_set(password_list_filepath):
+    """This function loads the password list (a text file) with the common password
+    checker, and returns the loaded frozenset."""
+    common_password_module.COMMON_PASSWORD_HASH_FILE_MAP = None
+    common_password_module.try_load_common_passwords(password_list_filepath)
+    return common_password_module.COMMON_PASSWORD_SET
+
+def load_password_hash_file(hash_file_filepath):
+    """This function loads the hash file with the common password checker, and returns
+    the memory-mapped file."""
+    common_password_module.COMMON_PASSWORD_SET = frozenset()
+    common_password_module.try_load_common_passwords(hash_file_filepath)
+    return common_password_module.COMMON_PASSWORD_HASH_FILE_MAP
+
+def measure_structure(structure_name, load_function, filepath, is_common_function,
+                      lookup_passwords):
+    """This function loads a password structure with load_function (measuring the time
+    taken and the memory allocated), looks up each of the lookup passwords with
+    is_common_function (called with the structure and a password), and prints the
+    results."""
+    # measure the memory allocated while loading (in a separate load, as tracing
+    # allocations slows loading down)
+    # -(the structure is kept while measuring, so its memory is counted)
+    tracemalloc.start()
+    password_structure = benchmark_app_module.run_quietly(load_function, filepath)
+    allocated_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del password_structure
+
+    load_start_time = time.perf_counter()
+    password_structure = benchmark_app_module.run_quietly(load_function, filepath)
+    load_milliseconds = (time.perf_counter() - load_start_time) * 1000
+
+    lookup_start_time = time.perf_counter()
+    common_password_count = sum(1 for password in lookup_passwords
+                                if is_common_function(password_structure, password))
+    lookup_microseconds = ((time.perf_counter() - lookup_start_time) * 1000000
+                           / len(lookup_passwords))
+
+    print("  " + structure_name.ljust(10) + " load " + str(round(load_milliseconds, 1)).rjust(8)
+          + " ms, memory " + str(round(allocated_bytes / 1048576, 1)).rjust(6)
+          + " MiB, lookup " + str(round(lookup_microseconds, 2)).rjust(10) + " us ("
+          + str(common_password_count) + "/" + str(len(lookup_passwords)) + " common)")
+
+def run_password_list_benchmark(list_name, password_list_filepath, hash_file_filepath):
+    """This function measures each password structure with the password list (and the
+    hash file built from it), and prints the results."""
+    passwords = load_password_list(password_list_filepath)
+    print(list_name + " (" + str(len(passwords)) + " passwords):")
+
+    # look up passwords on the list, and passwords which aren't
+    random_generator = random.Random(0)
+    lookup_passwords = [random_generator.choice(passwords) if lookup_index % 2 == 0
+                        else "uncommon-" + str(lookup_index)
+                        for lookup_index in range(LOOKUP_COUNT)]
+
+    measure_structure("list", load_password_list, password_list_filepath,
+        lambda password_list, password: password in password_list,
+        lookup_passwords[:LIST_LOOKUP_COUNT])
+    measure_structure("frozenset", load_password_set, password_list_filepath,
+        lambda _password_set, password: common_password_module.is_password_common(password),
+        lookup_passwords)
+    measure_structure("hash file", load_password_hash_file, hash_file_filepath,
+        lambda _hash_file_map, password: common_password_module.is_password_common(password),
+        lookup_passwords)
+
+def run_benchmark():
+    """This function runs the benchmark with the shipped and generated password lists."""
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        password_list_filepaths = {
+            "Shipped list": os.path.join(server_constants.PROJECT_ROOT_DIRECTORY,
+                                         server_constants.COMMON_PASSWORD_FILE_PATH),
+            "Generated list": os.path.join(temporary_directory, "generated.txt")}
+
+        # generate the password list
+        random_generator = random.Random(0)
+        with open(password_list_filepaths["Generated list"], 'w', encoding='utf-8') as file:
+            for _ in range(GENERATED_PASSWORD_COUNT):
+                file.write("%016x\n" % random_generator.getrandbits(64))
+
+        for list_name, password_list_filepath in password_list_filepaths.items():
+            # build the hash file offline
+            hash_file_filepath = os.path.join(temporary_directory,
+                                              list_name.replace(" ", "_") + ".bin")
+            benchmark_app_module.run_quietly(common_password_module.build_hash_file,
+                password_list_filepath, hash_file_filepath)
+            run_password_list_benchmark(list_name, password_list_filepath, hash_file_filepath)
+
+            # unmap the hash file so it can be removed
+            common_password_module.COMMON_PASSWORD_HASH_FILE_MAP.close()
+            common_password_module.COMMON_PASSWORD_HASH_FILE_MAP = None
+
+if __name__ == "__main__":
+    run_benchmark()
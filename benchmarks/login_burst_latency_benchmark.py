@@ -0,0 +1,124 @@
+"""This module contains the login burst latency benchmark, which serves the app with the
+multi-threaded WSGI server and measures the latency of non-login requests (reminder API
+revalidation requests) while other clients log in concurrently. It is run with password
+hashing performed in the request threads (the previous behavior, which holds the GIL) and
+by the password hashing service's worker processes (the default), and without a login
+burst for comparison. Run it from the project root directory with:
+
+    python -m benchmarks.login_burst_latency_benchmark"""
+
+import contextlib
+import logging
+import os
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from werkzeug.serving import make_server
+import password_hashing_module
+from benchmarks import benchmark_app_module
+
+# number of threads logging in concurrently during the login burst
+LOGIN_THREAD_COUNT = 8
+# number of seconds latency is measured for in each scenario
+BENCHMARK_DURATION_SECONDS = 10
+# number of seconds between the non-login requests
+REQUEST_INTERVAL_SECONDS = 0.02
+# URL of the non-login requests
+BENCHMARK_URL = "/api/reminders/?window=day"
+
+def run_hash_job_in_request_thread(hash_function, *hash_function_parameters):
+    """This function runs a hashing job in the request thread (as the server previously
+    did), and returns its result."""
+    return hash_function(*hash_function_parameters)
+
+def send_logins(server_url, username, stop_event, login_counter_list):
+    """This function logs the user in repeatedly until stop_event is set, counting the
+    logins in login_counter_list."""
+    login_data = urllib.parse.urlencode({"Username": username,
+        "Password": benchmark_app_module.BENCHMARK_USER_PASSWORD}).encode("utf-8")
+    while not stop_event.is_set():
+        with urllib.request.urlopen(server_url + "/", login_data, timeout=60) as response:
+            response.read()
+        login_counter_list.append(1)
+
+def measure_latencies(server_url, session_id):
+    """This function sends non-login requests for BENCHMARK_DURATION_SECONDS, and returns
+    a sorted list of their latencies (in milliseconds)."""
+    api_request = urllib.request.Request(server_url + BENCHMARK_URL,
+        headers={"Authorization": "Bearer " + session_id})
+    latency_list = []
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < BENCHMARK_DURATION_SECONDS:
+        request_start_time = time.perf_counter()
+        with urllib.request.urlopen(api_request, timeout=60) as response:
+            response.read()
+        latency_list.append((time.perf_counter() - request_start_time) * 1000)
+        time.sleep(REQUEST_INTERVAL_SECONDS)
+    return sorted(latency_list)
+
+def get_percentile(sorted_value_list, percentile):
+    """This function returns the value at the percentile of a sorted list."""
+    return sorted_value_list[min(len(sorted_value_list) - 1,
+                                 int(len(sorted_value_list) * percentile / 100))]
+
+def run_scenario(scenario_name, server_url, session_id, username, login_thread_count):
+    """This function measures the latency of non-login requests while login_thread_count
+    threads log in, and prints the results."""
+    stop_event = threading.Event()
+    login_counter_list = []
+    login_thread_list = [threading.Thread(target=send_logins, args=(server_url, username,
+        stop_event, login_counter_list), daemon=True) for _ in range(login_thread_count)]
+    for login_thread in login_thread_list:
+        login_thread.start()
+
+    latency_list = measure_latencies(server_url, session_id)
+    stop_event.set()
+    for login_thread in login_thread_list:
+        login_thread.join()
+
+    # (printed to the original standard output, as the server's output is discarded)
+    print(scenario_name.ljust(40) + " p50 " + str(round(get_percentile(latency_list, 50), 1))
+          .rjust(7) + " ms, p99 " + str(round(get_percentile(latency_list, 99), 1)).rjust(7)
+          + " ms (" + str(len(latency_list)) + " requests, " + str(len(login_counter_list))
+          + " logins)", file=sys.__stdout__)
+
+def run_benchmark():
+    """This function serves the app and runs each scenario."""
+    app, project_root_directory, release_server_resources = \
+        benchmark_app_module.create_benchmark_app()
+    wsgi_server = make_server("127.0.0.1", 0, app, threaded=True)
+    server_url = "http://127.0.0.1:" + str(wsgi_server.server_port)
+    threading.Thread(target=wsgi_server.serve_forever, daemon=True).start()
+
+    # discard the output printed while serving requests (werkzeug logs every request, and
+    # the database query messages are printed)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    with open(os.devnull, 'w', encoding='utf-8') as null_file, \
+            contextlib.redirect_stdout(null_file):
+        try:
+            run_scenarios(app, server_url)
+        finally:
+            wsgi_server.shutdown()
+            release_server_resources()
+            project_root_directory.cleanup()
+
+def run_scenarios(app, server_url):
+    """This function logs a user in and runs each scenario against the server."""
+    username = "bench_burst"
+    session_id = benchmark_app_module.register_and_log_in(app.test_client(), username)
+    # (start the hashing worker processes before measuring)
+    password_hashing_module.hash_password("")
+
+    run_scenario("No login burst", server_url, session_id, username, 0)
+    hashing_service_run_hash_job = password_hashing_module.run_hash_job
+    password_hashing_module.run_hash_job = run_hash_job_in_request_thread
+    run_scenario("Login burst, hashing in request threads", server_url, session_id,
+                 username, LOGIN_THREAD_COUNT)
+    password_hashing_module.run_hash_job = hashing_service_run_hash_job
+    run_scenario("Login burst, hashing service", server_url, session_id, username,
+                 LOGIN_THREAD_COUNT)
+
+if __name__ == "__main__":
+    run_benchmark()
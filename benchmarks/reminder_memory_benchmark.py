@@ -0,0 +1,109 @@
+"""This module contains the reminder memory benchmark, which measures the memory used to
+load REMINDER_COUNTS reminders from an SQLite database into ReminderContainer objects:
+with the previous container (which stored its attributes in a per-object dictionary, and
+was populated from a list of fetched rows) and with the current slotted container
+(populated by an sqlite row factory while the rows are fetched). Run it from the project
+root directory with:
+
+    python -m benchmarks.reminder_memory_benchmark"""
+
+from dataclasses import dataclass
+import sqlite3
+import sys
+import time
+import tracemalloc
+import uuid
+import reminder_container
+
+# numbers of reminders loaded
+REMINDER_COUNTS = [10000, 100000]
+# query used to load the reminders
+GET_ALL_REMINDER_ROWS = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch FROM reminders;
+"""
+
+@dataclass
+class PreviousReminderContainer:
+    """This class is the previous ReminderContainer (without slots), which stores its
+    attributes in a per-object dictionary."""
+    # constructor
+    def __init__(self, reminder_datetime, reminder_title, reminder_tags, reminder_description,
+                 deadline_proximity_color):
+        """This function is the constructor for the PreviousReminderContainer object."""
+        self.reminder_datetime = reminder_datetime
+        self.reminder_title = reminder_title
+        self.reminder_tags = reminder_tags
+        self.reminder_description = reminder_description
+        self.deadline_proximity_color = deadline_proximity_color
+
+def load_previous_reminder_containers(db_connection, current_epoch):
+    """This function loads the reminders as the server previously did (fetching the rows,
+    then populating a container from each row), and returns the list of containers."""
+    reminder_rows = db_connection.execute(GET_ALL_REMINDER_ROWS).fetchall()
+    return [PreviousReminderContainer(str(reminder_row[1]), str(reminder_row[2]),
+                str(reminder_row[3]), str(reminder_row[4]),
+                reminder_container.get_deadline_proximity_color(reminder_row[5] - current_epoch))
+            for reminder_row in reminder_rows]
+
+def load_reminder_containers(db_connection, current_epoch):
+    """This function loads the reminders with the reminder row factory, and returns the
+    list of containers."""
+    db_cursor = db_connection.cursor()
+    db_cursor.row_factory = reminder_container.create_reminder_row_factory(current_epoch)
+    return db_cursor.execute(GET_ALL_REMINDER_ROWS).fetchall()
+
+def get_container_size(container):
+    """This function returns the size (in bytes) of a container object, including its
+    attribute dictionary if it has one (but not its attribute values)."""
+    container_size = sys.getsizeof(container)
+    if hasattr(container, "__dict__"):
+        container_size += sys.getsizeof(container.__dict__)
+    return container_size
+
+def create_reminder_database(reminder_count, current_epoch):
+    """This function returns a connection to an in-memory database containing
+    reminder_count reminders."""
+    db_connection = sqlite3.connect(":memory:")
+    db_connection.execute("CREATE TABLE reminders(reminder_id VARCHAR, due_date VARCHAR,"
+                          " title VARCHAR, tags VARCHAR, description VARCHAR,"
+                          " due_epoch INTEGER);")
+    db_connection.executemany("INSERT INTO reminders VALUES (?, ?, ?, ?, ?, ?);",
+        [[str(uuid.uuid4()), time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(
+          current_epoch + reminder_index * 60)), "Reminder " + str(reminder_index),
+          "work, home", "Description of reminder " + str(reminder_index),
+          current_epoch + reminder_index * 60] for reminder_index in range(reminder_count)])
+    return db_connection
+
+def measure_load(load_function, db_connection, current_epoch):
+    """This function loads the reminders with load_function, and returns the memory held
+    by the loaded containers and the peak memory used while loading (in bytes), and the
+    size of one container (in bytes)."""
+    tracemalloc.start()
+    containers = load_function(db_connection, current_epoch)
+    held_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return held_bytes, peak_bytes, get_container_size(containers[0])
+
+def run_benchmark():
+    """This function runs the benchmark for each reminder count and prints the results."""
+    current_epoch = int(time.time())
+
+    for reminder_count in REMINDER_COUNTS:
+        db_connection = create_reminder_database(reminder_count, current_epoch)
+        print(str(reminder_count) + " reminders:")
+
+        for container_name, load_function in [
+                ("previous", load_previous_reminder_containers),
+                ("slotted", load_reminder_containers)]:
+            held_bytes, peak_bytes, container_size = measure_load(load_function,
+                db_connection, current_epoch)
+            print("  " + container_name.ljust(8) + " container " + str(container_size).rjust(4)
+                  + " B, held " + str(round(held_bytes / 1048576, 1)).rjust(6) + " MiB ("
+                  + str(held_bytes // reminder_count) + " B/reminder), peak "
+                  + str(round(peak_bytes / 1048576, 1)).rjust(6) + " MiB ("
+                  + str(peak_bytes // reminder_count) + " B/reminder)")
+
+        db_connection.close()
+
+if __name__ == "__main__":
+    run_benchmark()
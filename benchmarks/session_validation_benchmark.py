@@ -0,0 +1,63 @@
+"""This module contains the session validation benchmark, which measures how many
+authenticated API requests per second the app serves (on one thread, with the Flask test
+client) when session tokens are validated with sha256_crypt (the previous behavior) and
+with an HMAC (the default). Each request is a GET /api/reminders/?window=day answered with
+'304 Not Modified', so its cost is dominated by session validation. Run it from the
+project root directory with:
+
+    python -m benchmarks.session_validation_benchmark"""
+
+import sys
+import time
+import user_session_manager_module
+from benchmarks import benchmark_app_module
+
+# URL requested by the benchmark
+BENCHMARK_URL = "/api/reminders/?window=day"
+# number of seconds requests are sent for in each session token mode
+BENCHMARK_DURATION_SECONDS = 5
+
+def measure_requests_per_second(test_client, session_id):
+    """This function sends revalidation requests for the user's reminders for
+    BENCHMARK_DURATION_SECONDS, and returns the number of requests served per second."""
+    request_headers = {"Authorization": "Bearer " + session_id}
+    etag = benchmark_app_module.run_quietly(lambda: test_client.get(BENCHMARK_URL,
+        headers=request_headers)).headers["ETag"]
+    request_headers["If-None-Match"] = etag
+
+    request_count = 0
+    start_time = time.perf_counter()
+    while time.perf_counter() - start_time < BENCHMARK_DURATION_SECONDS:
+        api_response = benchmark_app_module.run_quietly(lambda: test_client.get(
+            BENCHMARK_URL, headers=request_headers))
+        if api_response.status_code != 304:
+            sys.exit("Unexpected response status " + api_response.status)
+        request_count += 1
+    return request_count / (time.perf_counter() - start_time)
+
+def run_benchmark():
+    """This function runs the benchmark in each session token mode and prints the
+    results."""
+    app, project_root_directory, release_server_resources = \
+        benchmark_app_module.create_benchmark_app()
+    test_client = app.test_client()
+
+    try:
+        requests_per_second_dictionary = {}
+        for session_token_mode in ["sha256_crypt", "hmac"]:
+            user_session_manager_module.SESSION_TOKEN_MODE = session_token_mode
+            session_id = benchmark_app_module.register_and_log_in(test_client,
+                "bench_" + session_token_mode)
+            requests_per_second_dictionary[session_token_mode] = \
+                measure_requests_per_second(test_client, session_id)
+            print(session_token_mode + ": " + str(round(
+                requests_per_second_dictionary[session_token_mode], 1)) + " requests/second")
+
+        print("Speedup: " + str(round(requests_per_second_dictionary["hmac"]
+            / requests_per_second_dictionary["sha256_crypt"], 1)) + "x")
+    finally:
+        benchmark_app_module.run_quietly(release_server_resources)
+        project_root_directory.cleanup()
+
+if __name__ == "__main__":
+    run_benchmark()
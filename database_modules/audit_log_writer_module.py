@@ -0,0 +1,125 @@
+"""This module contains the audit log writer, which records failed login attempts in the
+failed sign-in log database without slowing down login requests. Events are buffered in
+memory and written by a background thread in batches (a single transaction per batch),
+when the buffer holds AUDIT_LOG_FLUSH_BATCH_SIZE events or every
+AUDIT_LOG_FLUSH_INTERVAL_SECONDS seconds, whichever comes first. The buffer is flushed
+when the writer is stopped (when the server shuts down)."""
+
+from collections import deque
+import datetime
+import threading
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module
+
+# number of buffered events which triggers a flush
+AUDIT_LOG_FLUSH_BATCH_SIZE = 100
+# maximum number of seconds an event stays buffered before it's flushed
+AUDIT_LOG_FLUSH_INTERVAL_SECONDS = 5
+# maximum number of buffered events; if the buffer is full (for instance, if the database
+# can't keep up with a flood of failed logins), the oldest events are dropped
+AUDIT_LOG_MAX_BUFFERED_EVENTS = 10000
+
+# buffer containing the events waiting to be written (each a list of the
+# RECORD_LOGIN_ATTEMPT parameters), and the lock guarding it
+AUDIT_LOG_EVENT_BUFFER = deque(maxlen=AUDIT_LOG_MAX_BUFFERED_EVENTS)
+AUDIT_LOG_BUFFER_LOCK = threading.Lock()
+# dictionary containing counters describing the audit log writer's activity
+AUDIT_LOG_STATISTICS = {"recorded_events": 0, "written_events": 0, "dropped_events": 0}
+
+# event used to wake the flush thread early (when the buffer reaches the batch size), event
+# used to signal the flush thread to stop, and the flush thread itself
+FLUSH_REQUESTED_EVENT = threading.Event()
+FLUSH_THREAD_STOP_EVENT = threading.Event()
+FLUSH_THREAD = None
+
+def record_failed_login(ip_address, username):
+    """This function adds a failed login attempt from the IP address (using the username
+    entered) to the audit log buffer (it is written to the failed sign-in log database by
+    the flush thread)."""
+    with AUDIT_LOG_BUFFER_LOCK:
+        # check if the buffer is full (appending drops the oldest event)
+        if len(AUDIT_LOG_EVENT_BUFFER) == AUDIT_LOG_MAX_BUFFERED_EVENTS:
+            AUDIT_LOG_STATISTICS["dropped_events"] += 1
+
+        AUDIT_LOG_EVENT_BUFFER.append([str(uuid.uuid4()), str(datetime.datetime.now()),
+                                       str(ip_address), str(username)])
+        AUDIT_LOG_STATISTICS["recorded_events"] += 1
+        buffered_event_count = len(AUDIT_LOG_EVENT_BUFFER)
+
+    # wake the flush thread if a full batch is waiting
+    if buffered_event_count >= AUDIT_LOG_FLUSH_BATCH_SIZE:
+        FLUSH_REQUESTED_EVENT.set()
+
+def flush_audit_log():
+    """This function writes every buffered event to the failed sign-in log database, in
+    batches of at most AUDIT_LOG_FLUSH_BATCH_SIZE events."""
+    while True:
+        # take the next batch of events out of the buffer
+        with AUDIT_LOG_BUFFER_LOCK:
+            event_batch = [AUDIT_LOG_EVENT_BUFFER.popleft() for _ in
+                           range(min(AUDIT_LOG_FLUSH_BATCH_SIZE, len(AUDIT_LOG_EVENT_BUFFER)))]
+
+        if len(event_batch) == 0:
+            return
+
+        # write the batch in a single transaction
+        if database_access_module.perform_db_batch_query(server_constants.LOGIN_LOG_DB_NAME,
+                "Record failed login attempts", db_scripts.RECORD_LOGIN_ATTEMPT,
+                event_batch) is None:
+            # the events can't be written; drop them rather than retrying forever
+            print("Error! Dropped " + str(len(event_batch)) + " failed login event(s)")
+            with AUDIT_LOG_BUFFER_LOCK:
+                AUDIT_LOG_STATISTICS["dropped_events"] += len(event_batch)
+            return
+
+        with AUDIT_LOG_BUFFER_LOCK:
+            AUDIT_LOG_STATISTICS["written_events"] += len(event_batch)
+
+def start_audit_log_writer():
+    """This function starts the flush thread. Does nothing if it is already running."""
+    # pylint: disable=global-statement
+    global FLUSH_THREAD
+
+    # check if flush thread is already running
+    if FLUSH_THREAD is not None and FLUSH_THREAD.is_alive():
+        return
+
+    FLUSH_THREAD_STOP_EVENT.clear()
+    FLUSH_THREAD = threading.Thread(target=run_flush_loop, name="audit_log_writer",
+        daemon=True)
+    FLUSH_THREAD.start()
+
+def stop_audit_log_writer():
+    """This function stops the flush thread, after it writes every buffered event."""
+    FLUSH_THREAD_STOP_EVENT.set()
+    FLUSH_REQUESTED_EVENT.set()
+
+    if FLUSH_THREAD is not None:
+        FLUSH_THREAD.join()
+
+    # write any events recorded after the flush thread stopped
+    flush_audit_log()
+
+def run_flush_loop():
+    """This function is run by the flush thread; it flushes the buffer when a full batch
+    is waiting or the flush interval passes, until the writer is stopped."""
+    while not FLUSH_THREAD_STOP_EVENT.is_set():
+        FLUSH_REQUESTED_EVENT.wait(AUDIT_LOG_FLUSH_INTERVAL_SECONDS)
+        FLUSH_REQUESTED_EVENT.clear()
+
+        # try flushing the buffer (an error shouldn't stop the flush thread)
+        try:
+            flush_audit_log()
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            # print error message
+            print("Error occurred trying to flush the audit log")
+            print(str(exception))
+
+def get_audit_log_statistics():
+    """This function returns a dictionary containing the audit log writer's counters and
+    the number of buffered events."""
+    with AUDIT_LOG_BUFFER_LOCK:
+        audit_log_statistics = dict(AUDIT_LOG_STATISTICS)
+        audit_log_statistics["buffered_events"] = len(AUDIT_LOG_EVENT_BUFFER)
+    return audit_log_statistics
@@ -0,0 +1,222 @@
+"""This module contains the user reminder database connection pool, which keeps
+connections to user reminder databases open between requests (instead of opening a
+new connection for every query), caps the number of open database handles and closes
+connections that are least recently used or have been idle for too long."""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+import threading
+import time
+from database_modules import database_access_module
+
+# maximum number of reminder database connections kept in the pool at the same time.
+# When the cap is reached, the least recently used connection which isn't in use is
+# closed (connections removed from the pool while in use are closed once their query
+# finishes).
+MAX_OPEN_CONNECTIONS = 64
+# number of seconds a connection can go unused before it is closed
+IDLE_TIMEOUT_SECONDS = 300
+
+# ordered dictionary containing the open connections, ordered from least recently
+# used (first) to most recently used (last).
+# -The key is the pool key (the user ID of the reminder database)
+# -The value is a PooledConnection object
+POOLED_CONNECTION_DICTIONARY = OrderedDict()
+# lock guarding POOLED_CONNECTION_DICTIONARY and POOL_STATISTICS
+POOL_LOCK = threading.Lock()
+# counters used to size the pool (hits = connection reused, misses = connection
+# opened, evictions = connection closed to respect MAX_OPEN_CONNECTIONS or
+# IDLE_TIMEOUT_SECONDS)
+POOL_STATISTICS = {"hits": 0, "misses": 0, "evictions": 0}
+
+@dataclass
+class PooledConnection:
+    """This class is a container for a pooled database connection, the lock that
+    serializes its use, the time it was last used and whether it has been removed from
+    the pool (and closed)."""
+    # constructor
+    def __init__(self, db_connection):
+        self.db_connection = db_connection
+        self.connection_lock = threading.Lock()
+        self.last_used_time = time.monotonic()
+        self.is_evicted = False
+        self.is_closed = False
+
+@contextmanager
+def checkout_connection(pool_key, db_path, db_name, keep_connection_open=True):
+    """This function is a context manager which provides the pooled connection for
+    the specified pool key (opening a connection to the database at db_path if none is
+    open), holding the connection's lock for the duration of the 'with' block. None is
+    provided if the database couldn't be connected to.
+
+    If keep_connection_open is false and no connection for the pool key is open, a
+    temporary connection is provided and closed afterwards instead of being added to the
+    pool (used by background tasks, so they don't evict connections of active users)."""
+
+    # check if a temporary connection should be used
+    if not keep_connection_open:
+        with POOL_LOCK:
+            is_connection_pooled = pool_key in POOLED_CONNECTION_DICTIONARY
+
+        if not is_connection_pooled:
+            db_connection = database_access_module.try_get_database_connection(db_path,
+                db_name)
+            try:
+                yield db_connection
+            finally:
+                if db_connection is not None:
+                    db_connection.close()
+            return
+
+    while True:
+        pooled_connection = get_pooled_connection(pool_key, db_path, db_name)
+
+        # check if database connection was unsuccessful
+        if pooled_connection is None:
+            yield None
+            return
+
+        try:
+            with pooled_connection.connection_lock:
+                # the connection may have been evicted while waiting for the lock; if so,
+                # retry with a fresh connection.
+                if pooled_connection.is_closed:
+                    continue
+                try:
+                    yield pooled_connection.db_connection
+                finally:
+                    pooled_connection.last_used_time = time.monotonic()
+                return
+        finally:
+            # close the connection if it was evicted while in use
+            if pooled_connection.is_evicted:
+                try_close_evicted_connection(pooled_connection)
+
+def get_pooled_connection(pool_key, db_path, db_name):
+    """This function returns the PooledConnection for the specified pool key, opening
+    a connection to the database at db_path (and evicting the least recently used
+    connection if the pool is full) if needed. If a connection couldn't be made,
+    None is returned."""
+
+    # list of the connections removed from the pool, closed once POOL_LOCK is released
+    # (connections in use are closed when their query finishes, so waiting for it doesn't
+    # block this or any other checkout)
+    evicted_connection_list = []
+
+    try:
+        with POOL_LOCK:
+            # first, remove connections which have been idle for too long
+            evicted_connection_list += remove_idle_connections_locked()
+
+            # check if a connection to the database is already open
+            if pool_key in POOLED_CONNECTION_DICTIONARY:
+                POOL_STATISTICS["hits"] += 1
+                # mark as most recently used
+                POOLED_CONNECTION_DICTIONARY.move_to_end(pool_key)
+                return POOLED_CONNECTION_DICTIONARY[pool_key]
+
+            POOL_STATISTICS["misses"] += 1
+
+            # evict least recently used connections until there is room for a new one
+            while len(POOLED_CONNECTION_DICTIONARY) >= MAX_OPEN_CONNECTIONS:
+                evicted_connection_list.append(evict_connection_locked(
+                    get_eviction_candidate_locked()))
+
+            # try getting connection to database
+            db_connection = database_access_module.try_get_database_connection(db_path,
+                                                                                db_name)
+
+            # check if database connection was unsuccessful (db_connection null)
+            if db_connection is None:
+                return None
+
+            # add to dictionary
+            POOLED_CONNECTION_DICTIONARY[pool_key] = PooledConnection(db_connection)
+            return POOLED_CONNECTION_DICTIONARY[pool_key]
+    finally:
+        close_evicted_connections(evicted_connection_list)
+
+def get_eviction_candidate_locked():
+    """This function returns the pool key of the least recently used connection which
+    isn't in use or, if every connection is in use, of the least recently used connection.
+    POOL_LOCK must be held by the caller."""
+    for pool_key, pooled_connection in POOLED_CONNECTION_DICTIONARY.items():
+        if not pooled_connection.connection_lock.locked():
+            return pool_key
+    return next(iter(POOLED_CONNECTION_DICTIONARY))
+
+def close_idle_connections():
+    """This function closes all pooled connections which have been idle for longer than
+    IDLE_TIMEOUT_SECONDS."""
+    with POOL_LOCK:
+        evicted_connection_list = remove_idle_connections_locked()
+    close_evicted_connections(evicted_connection_list)
+
+def remove_idle_connections_locked():
+    """This function removes all pooled connections which have been idle for longer than
+    IDLE_TIMEOUT_SECONDS from the pool, and returns them as a list (to be closed with
+    close_evicted_connections). POOL_LOCK must be held by the caller."""
+    idle_cutoff_time = time.monotonic() - IDLE_TIMEOUT_SECONDS
+    evicted_connection_list = []
+
+    # connections are ordered by last use, so stop at the first one that isn't idle
+    for pool_key in list(POOLED_CONNECTION_DICTIONARY):
+        if POOLED_CONNECTION_DICTIONARY[pool_key].last_used_time > idle_cutoff_time:
+            break
+        evicted_connection_list.append(evict_connection_locked(pool_key))
+
+    return evicted_connection_list
+
+def evict_connection_locked(pool_key):
+    """This function removes the connection for the specified pool key from the pool, and
+    returns it (to be closed with close_evicted_connections). POOL_LOCK must be held by the
+    caller."""
+    POOL_STATISTICS["evictions"] += 1
+    pooled_connection = POOLED_CONNECTION_DICTIONARY.pop(pool_key)
+    pooled_connection.is_evicted = True
+    return pooled_connection
+
+def close_evicted_connections(evicted_connection_list, wait_for_queries=False):
+    """This function closes connections removed from the pool. Connections in use are
+    closed by the thread using them once its query finishes, unless wait_for_queries is
+    true (then this function waits for the queries to finish and closes them itself).
+    POOL_LOCK must not be held by the caller."""
+    for pooled_connection in evicted_connection_list:
+        if wait_for_queries:
+            with pooled_connection.connection_lock:
+                close_pooled_connection(pooled_connection)
+        else:
+            try_close_evicted_connection(pooled_connection)
+
+def try_close_evicted_connection(pooled_connection):
+    """This function closes a connection removed from the pool, unless it is in use (the
+    thread using it closes it once its query finishes)."""
+    if pooled_connection.connection_lock.acquire(blocking=False):
+        try:
+            close_pooled_connection(pooled_connection)
+        finally:
+            pooled_connection.connection_lock.release()
+
+def close_pooled_connection(pooled_connection):
+    """This function closes a pooled connection (unless it is already closed). The
+    connection's lock must be held by the caller."""
+    if not pooled_connection.is_closed:
+        pooled_connection.is_closed = True
+        pooled_connection.db_connection.close()
+
+def close_all_connections():
+    """This function closes every pooled connection (for instance, when the server is
+    shutting down)."""
+    with POOL_LOCK:
+        evicted_connection_list = [evict_connection_locked(pool_key)
+                                   for pool_key in list(POOLED_CONNECTION_DICTIONARY)]
+    close_evicted_connections(evicted_connection_list, wait_for_queries=True)
+
+def get_pool_statistics():
+    """This function returns a dictionary containing the hit, miss and eviction
+    counters of the pool, along with the number of currently open connections."""
+    with POOL_LOCK:
+        pool_statistics = dict(POOL_STATISTICS)
+        pool_statistics["open_connections"] = len(POOLED_CONNECTION_DICTIONARY)
+    return pool_statistics
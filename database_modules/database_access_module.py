@@ -1,16 +1,44 @@
 """This module contains functions related to accessing/initializing databases for the website."""
 
+import hashlib
+import os
 import sqlite3
 from sqlite3 import Error
+import threading
 import server_constants
-from database_modules import db_scripts, database_access_module
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    schema_migration_module, database_writer_module, reminder_query_cache_module
 
 # Dictionary that contains connection objects to various databases.
 # -The key is the database name
 # -The value is the connection object
 DATABASE_CONNECTION_DICTIONARY = {}
+# Dictionary that contains the locks guarding the connections in DATABASE_CONNECTION_DICTIONARY
+# (a connection is shared by all request threads, but can only run one query at a time)
+# -The key is the database name
+# -The value is the lock
+DATABASE_LOCK_DICTIONARY = {}
 DB_DIRECTORY_ROOT = ""
 
+# pragmas applied to every new database connection
+# -WAL journal mode lets readers keep reading while a write is being performed
+# -synchronous NORMAL only syncs at WAL checkpoints (safe from corruption in WAL mode; a
+#  power loss can only lose the most recently committed transactions)
+# -mmap_size/cache_size (negative means KiB) let reads be served from memory
+# -busy_timeout makes connections wait for another process's write lock instead of
+#  failing with "database is locked"
+DATABASE_CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 67108864",
+    "PRAGMA cache_size = -8192",
+    "PRAGMA busy_timeout = 5000"
+]
+
+# leading keywords of queries which write to the database (these are performed by the
+# database writer thread)
+WRITE_QUERY_KEYWORDS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+
 def connect_to_website_databases(db_directory_root, db_names):
     """This function populates the DATABASE_CONNECTION_DICTIONARY with connection objects
     to the databases used by the website. Returns true if all databases initialized
@@ -21,133 +49,438 @@ def connect_to_website_databases(db_directory_root, db_names):
     the file extension)"""
 
     database_access_module.DB_DIRECTORY_ROOT = db_directory_root
+    # create the database directory if it doesn't exist yet (the first time the server runs)
+    try:
+        os.makedirs(db_directory_root, exist_ok=True)
+    except OSError as exception:
+        # print error message
+        print("Error occurred trying to create the database directory!")
+        print(str(exception))
 
-    # reset the dictionary (in case calling this function after dictionary was initialized)
+    # reset the dictionaries (in case calling this function after dictionary was initialized)
     DATABASE_CONNECTION_DICTIONARY.clear()
+    DATABASE_LOCK_DICTIONARY.clear()
 
     for db_name in db_names:
         # try getting connection to database
         db_connection = try_get_database_connection(
-            db_directory_root + "\\" + db_name + ".sqlite", db_name)
+            get_database_path(db_directory_root, db_name), db_name)
 
         # check if database connection was successful (db_connection not null)
         if db_connection is not None:
-            # add to dictionary
+            # add to dictionaries
             DATABASE_CONNECTION_DICTIONARY[db_name] = db_connection
+            DATABASE_LOCK_DICTIONARY[db_name] = threading.Lock()
 
     # run the db initialization check
     run_db_init_check()
 
 
-def run_db_init_check():
-    """This function runs the database initialization check scripts, which are scripts run
-    at startup that ensure that the databases are initialized with the required tables if
-    any are missing (or database file was newly created)."""
+def close_website_databases():
+    """This function closes the connections in DATABASE_CONNECTION_DICTIONARY (for
+    instance, when the server is shutting down)."""
+    # perform any writes still waiting for the writer thread
+    database_writer_module.stop_writer_thread()
 
-    # run the user database initialization script
-    perform_db_query(server_constants.USERS_INFO_DB_NAME, "Initialization check script, user db",
-                     db_scripts.USER_DB_INIT_CHECK_SCRIPT, None)
+    for db_name, db_connection in DATABASE_CONNECTION_DICTIONARY.items():
+        with DATABASE_LOCK_DICTIONARY[db_name]:
+            db_connection.close()
+        print("Closed connection to " + db_name + " database.")
 
-    # run the failed sign in log database initialization script
-    perform_db_query(server_constants.LOGIN_LOG_DB_NAME, "Initialization check script, log in db",
-                     db_scripts.INITIALIZE_FAILED_SIGNIN_LOG_DB, None)
+    DATABASE_CONNECTION_DICTIONARY.clear()
+    DATABASE_LOCK_DICTIONARY.clear()
 
 
-def perform_user_reminder_db_query(user_id, query_name, query_string, query_parameters):
+def run_db_init_check():
+    """This function runs the database schema migrations, which are run at startup to ensure
+    that the databases are initialized with the required tables if any are missing (or
+    database file was newly created) and are at the latest schema version."""
+
+    # migrate each connected website database to the latest schema version
+    for db_name, db_connection in DATABASE_CONNECTION_DICTIONARY.items():
+        if db_name in schema_migration_module.WEBSITE_DB_MIGRATION_DICTIONARY:
+            with DATABASE_LOCK_DICTIONARY[db_name]:
+                schema_migration_module.ensure_database_schema(db_name, db_connection,
+                    schema_migration_module.WEBSITE_DB_MIGRATION_DICTIONARY[db_name])
+
+
+def perform_user_reminder_db_query(user_id, query_name, query_string, query_parameters,
+                                   keep_connection_open=True, row_factory=None):
     """This function attempts to perform/commit a database query (query_string) on the reminder
     database for the user with the user id specified (in the user_id parameter), and returns the
-    results of the query. If query is unsuccessful, None is returned."""
-
-    # -get connection to user database (or create it if doesn't exist)
-    # try getting connection to database
-    db_connection = try_get_database_connection(
-        database_access_module.DB_DIRECTORY_ROOT + "\\" + user_id + ".sqlite", "user "
-        + user_id + " reminder")
-
-    # check if database connection was successful (db_connection not null)
-    if db_connection is not None:
-        # made a successful connection to the user's database
-        # -get a cursor to the database
-        cursor = db_connection.cursor()
-        # try performing the query
-        try:
-            # declare variable to hold query results
-            query_results = None
+    rows returned by the query as a list. If query is unsuccessful, None is returned. The
+    connection to the database is kept open in the connection pool between queries, unless
+    keep_connection_open is false. If row_factory isn't None, it is used to build each row
+    (see sqlite3's Cursor.row_factory).
 
-            # run the initialization/check script to ensure the user database has
-            # the required tables
-            cursor.execute(db_scripts.INITIALIZE_USER_REMINDER_DB)
-            # commit results
-            db_connection.commit()
+    If reminders are stored in shard databases, the sharded version of the query (which
+    only affects the user's reminders) is performed on the user's shard database. Queries
+    which write to the database remove the user's pages from the reminder query cache."""
 
-            # run old query auto-delete script, as well as main query as parametric query
-            if query_parameters is not None:
-                cursor.execute(db_scripts.EXPIRED_REMINDER_AUTODELETE_SCRIPT)
-                query_results = cursor.execute(query_string, query_parameters)
-            else:
-                cursor.execute(db_scripts.EXPIRED_REMINDER_AUTODELETE_SCRIPT)
-                query_results = cursor.execute(query_string)
+    # check if reminders are stored in shard databases
+    if server_constants.REMINDER_STORAGE_MODE == "sharded":
+        # -use the sharded version of the query, whose first parameter is the user ID
+        query_string = db_scripts.SHARDED_REMINDER_QUERY_DICTIONARY[query_string]
+        query_parameters = [str(user_id)] + list(query_parameters or [])
 
-            # commit results to database.
-            db_connection.commit()
+    query_results = perform_reminder_db_query(get_reminder_db_key(user_id), query_name,
+        query_string, query_parameters, keep_connection_open, row_factory)
 
-            # print query success message
-            print("Successfully performed '" + query_name + "' query on reminder database "
-                  + "for user " + user_id)
-            # return query results
-            return query_results
+    # check if the query wrote to the user's reminders (once it's committed, so pages read
+    # before it aren't cached)
+    if is_write_query(query_string):
+        reminder_query_cache_module.invalidate_user_reminders(user_id)
+
+    return query_results
+
+
+def perform_reminder_db_query(reminder_db_key, query_name, query_string, query_parameters,
+                              keep_connection_open=True, row_factory=None):
+    """This function attempts to perform/commit a database query (query_string) on the reminder
+    database with the specified key (a user ID, or a shard database name), and returns the rows
+    returned by the query as a list. If query is unsuccessful, None is returned. Queries which
+    write to the database are performed by the database writer thread."""
+
+    # check if the query writes to the database
+    if is_write_query(query_string):
+        return database_writer_module.perform_write(lambda: execute_reminder_db_query(
+            reminder_db_key, query_name, query_string, query_parameters, keep_connection_open,
+            row_factory))
+
+    return execute_reminder_db_query(reminder_db_key, query_name, query_string, query_parameters,
+        keep_connection_open, row_factory)
+
+
+def execute_reminder_db_query(reminder_db_key, query_name, query_string, query_parameters,
+                              keep_connection_open, row_factory):
+    """This function performs/commits a database query on the reminder database with the
+    specified key, on the calling thread (see perform_reminder_db_query)."""
+
+    # -get pooled connection to reminder database (or create it if doesn't exist)
+    with connection_pool_module.checkout_connection(reminder_db_key,
+        get_database_path(database_access_module.DB_DIRECTORY_ROOT, reminder_db_key),
+        "reminder " + reminder_db_key, keep_connection_open) as db_connection:
+
+        # check if database connection was successful (db_connection not null)
+        if db_connection is not None:
+            # made a successful connection to the reminder database
+            # -get a cursor to the database
+            cursor = db_connection.cursor()
+            # -build rows with the row factory, if one was specified
+            if row_factory is not None:
+                cursor.row_factory = row_factory
+            # try performing the query
+            try:
+                # declare variable to hold query results
+                query_results = None
+
+                # ensure the reminder database has the required tables (only checked the
+                # first time the database is accessed)
+                if not schema_migration_module.ensure_database_schema(reminder_db_key,
+                    db_connection, get_reminder_db_migrations(reminder_db_key)):
+                    print("Error! Unable to initialize reminder database " + reminder_db_key)
+                    return None
+
+                # run main query as parametric query
+                # -expired reminders are deleted by the maintenance scheduler, not here
+                if query_parameters is not None:
+                    query_results = cursor.execute(query_string, query_parameters)
+                else:
+                    query_results = cursor.execute(query_string)
+
+                # fetch the results while the connection is still checked out (the
+                # connection is shared with other requests once it is returned to the pool)
+                query_results = query_results.fetchall()
+
+                # commit results to database.
+                db_connection.commit()
+
+                # print query success message
+                print("Successfully performed '" + query_name + "' query on reminder database "
+                      + reminder_db_key)
+                # return query results
+                return query_results
+
+            except Error as exception:
+                # undo any partially performed query, so the pooled connection is left clean
+                db_connection.rollback()
+                # print error message
+                print("Error occurred trying to perform query '" + str(query_name)
+                      + "' on reminder database "  + str(reminder_db_key))
+                print(str(exception))
+                return None
+
+    # should only occur due to file/io error
+    print("Error! Unable to access reminder database " + reminder_db_key + "!")
+    return None
+
+
+def perform_user_reminder_db_batch_query(user_id, query_name, query_string,
+                                         query_parameter_list):
+    """This function attempts to perform/commit a database query (query_string) once for each
+    parameter list in query_parameter_list on the reminder database for the user with the user
+    id specified, in a single transaction on the database writer thread. Returns the number of
+    rows modified, or None if the query is unsuccessful (in which case none of the queries are
+    committed). The user's pages are removed from the reminder query cache."""
+    return perform_user_reminder_db_batch_queries(user_id, query_name,
+        [[query_string, query_parameter_list]])
+
+
+def perform_user_reminder_db_batch_queries(user_id, query_name, query_batch_list):
+    """This function attempts to perform/commit several batch queries (each a list containing
+    a query string and a list of parameter lists, see perform_user_reminder_db_batch_query) on
+    the reminder database for the user with the user id specified, in order, in a single
+    transaction on the database writer thread. Returns the number of rows modified, or None
+    if any of the queries are unsuccessful (in which case none of them are committed). The
+    user's pages are removed from the reminder query cache.
+
+    If reminders are stored in shard databases, the sharded version of each query is
+    performed on the user's shard database."""
+
+    # check if reminders are stored in shard databases
+    if server_constants.REMINDER_STORAGE_MODE == "sharded":
+        # -use the sharded version of each query, whose first parameter is the user ID
+        query_batch_list = [[db_scripts.SHARDED_REMINDER_QUERY_DICTIONARY[query_string],
+                             [[str(user_id)] + list(query_parameters)
+                              for query_parameters in query_parameter_list]]
+                            for query_string, query_parameter_list in query_batch_list]
+
+    reminder_db_key = get_reminder_db_key(user_id)
+    modified_row_count = database_writer_module.perform_write(
+        lambda: execute_reminder_db_batch_queries(reminder_db_key, query_name,
+            query_batch_list))
+
+    # remove the user's cached pages (once the batch is committed)
+    reminder_query_cache_module.invalidate_user_reminders(user_id)
+
+    return modified_row_count
+
+
+def execute_reminder_db_batch_queries(reminder_db_key, query_name, query_batch_list):
+    """This function performs/commits batch queries on the reminder database with the
+    specified key, on the calling thread (see perform_user_reminder_db_batch_queries)."""
+
+    # -get pooled connection to reminder database (or create it if doesn't exist)
+    with connection_pool_module.checkout_connection(reminder_db_key,
+        get_database_path(database_access_module.DB_DIRECTORY_ROOT, reminder_db_key),
+        "reminder " + reminder_db_key, True) as db_connection:
+
+        # check if database connection was successful (db_connection not null)
+        if db_connection is not None:
+            try:
+                # ensure the reminder database has the required tables
+                if not schema_migration_module.ensure_database_schema(reminder_db_key,
+                    db_connection, get_reminder_db_migrations(reminder_db_key)):
+                    print("Error! Unable to initialize reminder database " + reminder_db_key)
+                    return None
+
+                # run each query for each of its parameter lists, then commit them together
+                modified_row_count = 0
+                for query_string, query_parameter_list in query_batch_list:
+                    modified_row_count += db_connection.executemany(query_string,
+                        query_parameter_list).rowcount
+                db_connection.commit()
+
+                # print query success message
+                print("Successfully performed '" + query_name + "' query ("
+                      + str(modified_row_count) + " rows) on reminder database "
+                      + reminder_db_key)
+                return modified_row_count
+
+            except Error as exception:
+                # undo the partially performed batch, so the pooled connection is left clean
+                db_connection.rollback()
+                # print error message
+                print("Error occurred trying to perform query '" + str(query_name)
+                      + "' on reminder database "  + str(reminder_db_key))
+                print(str(exception))
+                return None
+
+    # should only occur due to file/io error
+    print("Error! Unable to access reminder database " + reminder_db_key + "!")
+    return None
+
+
+def get_database_path(db_directory_root, db_name):
+    """This function returns the path of the database file with the specified name (excluding
+    the file extension) in the database directory."""
+    return os.path.join(db_directory_root, db_name + ".sqlite")
+
+
+def get_reminder_db_key(user_id):
+    """This function returns the key of the reminder database which stores the reminders of
+    the user with the specified user ID; either the user ID itself (one database per user),
+    or the name of the user's shard database."""
+
+    # check if reminders are stored in one database per user
+    if server_constants.REMINDER_STORAGE_MODE != "sharded":
+        return str(user_id)
+
+    return get_reminder_shard_db_key(user_id)
+
+
+def get_reminder_shard_db_key(user_id):
+    """This function returns the name of the shard database which stores the reminders of
+    the user with the specified user ID, when reminders are stored in shard databases."""
+
+    # pick the shard from a hash of the user ID (python's hash() isn't used since it
+    # changes between server processes)
+    shard_index = (int(hashlib.sha1(str(user_id).encode("utf-8")).hexdigest(), 16)
+                   % server_constants.REMINDER_SHARD_COUNT)
+    return server_constants.REMINDER_SHARD_DB_NAME_PREFIX + str(shard_index)
+
+
+def get_reminder_db_migrations(reminder_db_key):
+    """This function returns the migration list for the reminder database with the
+    specified key."""
+    if reminder_db_key.startswith(server_constants.REMINDER_SHARD_DB_NAME_PREFIX):
+        return schema_migration_module.SHARDED_REMINDER_DB_MIGRATIONS
+    return schema_migration_module.USER_REMINDER_DB_MIGRATIONS
+
+
+def get_reminder_db_keys():
+    """This function returns a list of the keys of all reminder databases used by the
+    current reminder storage mode."""
+
+    # check if reminders are stored in shard databases
+    if server_constants.REMINDER_STORAGE_MODE == "sharded":
+        return [server_constants.REMINDER_SHARD_DB_NAME_PREFIX + str(shard_index)
+                for shard_index in range(server_constants.REMINDER_SHARD_COUNT)]
+
+    return get_user_reminder_db_user_ids()
+
+
+def get_user_reminder_db_user_ids():
+    """This function returns a list of the user IDs of all user reminder databases (one
+    database per user) in the database directory."""
+
+    # names of the databases which aren't user reminder databases
+    website_db_names = [server_constants.USERS_INFO_DB_NAME, server_constants.LOGIN_LOG_DB_NAME,
+                        server_constants.SESSIONS_DB_NAME]
+
+    try:
+        db_file_names = os.listdir(database_access_module.DB_DIRECTORY_ROOT)
+    except OSError as exception:
+        # print error message
+        print("Error occurred trying to list the reminder databases!")
+        print(str(exception))
+        return []
+
+    # strip the file extension off the database file names to get the user IDs
+    return [db_file_name[:-len(".sqlite")] for db_file_name in sorted(db_file_names)
+            if db_file_name.endswith(".sqlite")
+            and db_file_name[:-len(".sqlite")] not in website_db_names
+            and not db_file_name.startswith(server_constants.REMINDER_SHARD_DB_NAME_PREFIX)]
 
-        except Error as exception:
-            # print error message
-            print("Error occurred trying to perform query '" + str(query_name)
-                  + "' on reminder database for user "  + str(user_id))
-            print(str(exception))
-            return None
-    else:
-        # should only occur due to file/io error
-        print("Error! Unable to access reminder database for user " + user_id + "!")
-        return None
 
 
 def perform_db_query(db_name, query_name, query_string, query_parameters):
     """This function attempts to perform/commit a database query (query_string) on the specified
-    database (db_name), and returns the results of the query. If query is unsuccessful, None is
-    returned."""
+    database (db_name), and returns the rows returned by the query as a list. If query is
+    unsuccessful, None is returned. Queries which write to the database are performed by the
+    database writer thread."""
+
+    # check if the query writes to the database
+    if is_write_query(query_string):
+        return database_writer_module.perform_write(lambda: execute_db_query(
+            db_name, query_name, query_string, query_parameters))
+
+    return execute_db_query(db_name, query_name, query_string, query_parameters)
+
+def execute_db_query(db_name, query_name, query_string, query_parameters):
+    """This function performs/commits a database query on the specified database, on the
+    calling thread (see perform_db_query)."""
 
     # ensure database name exists
     if db_name in DATABASE_CONNECTION_DICTIONARY:  #.keys()
-        # get cursor object, used to execute query
-        cursor = DATABASE_CONNECTION_DICTIONARY[db_name].cursor()
-        # try performing the query
-        try:
-            # declare variable to hold query results
-            query_results = None
+        db_connection = DATABASE_CONNECTION_DICTIONARY[db_name]
+
+        # only one thread can use the shared connection at a time
+        with DATABASE_LOCK_DICTIONARY[db_name]:
+            # get cursor object, used to execute query
+            cursor = db_connection.cursor()
+            # try performing the query
+            try:
+                # declare variable to hold query results
+                query_results = None
+
+                # run query as parametric query
+                if query_parameters is not None:
+                    query_results = cursor.execute(query_string, query_parameters)
+                else:
+                    query_results = cursor.execute(query_string)
+
+                # fetch the results while holding the lock (the cursor shares the
+                # connection's state)
+                query_results = query_results.fetchall()
+
+                # commit results to database.
+                db_connection.commit()
+
+                # print query success message
+                print("Successfully performed '" + query_name + "' query on database " + db_name)
+                # return query results
+                return query_results
+
+            except Error as exception:
+                # undo any partially performed query, so the shared connection is left clean
+                db_connection.rollback()
+                # print error message
+                print("Error occurred trying to perform query '" + str(query_name)
+                      + "' on database " + str(db_name))
+                print(str(exception))
+    else:
+        # print error message
+        print("Unable to perform query - no database named '" + db_name + "' exists!")
 
-            # run query as parametric query
-            if query_parameters is not None:
-                query_results = cursor.execute(query_string, query_parameters)
-            else:
-                query_results = cursor.execute(query_string)
+    # return false; query not performed
+    return None
 
-            # commit results to database.
-            DATABASE_CONNECTION_DICTIONARY[db_name].commit()
+def perform_db_batch_query(db_name, query_name, query_string, query_parameter_list):
+    """This function attempts to perform/commit a database query (query_string) once for each
+    parameter list in query_parameter_list on the specified database (db_name), in a single
+    transaction on the database writer thread. Returns the number of rows modified, or None
+    if the query is unsuccessful (in which case none of the queries are committed)."""
+    return database_writer_module.perform_write(lambda: execute_db_batch_query(
+        db_name, query_name, query_string, query_parameter_list))
+
+def execute_db_batch_query(db_name, query_name, query_string, query_parameter_list):
+    """This function performs/commits a batch database query on the specified database, on
+    the calling thread (see perform_db_batch_query)."""
+
+    # ensure database name exists
+    if db_name not in DATABASE_CONNECTION_DICTIONARY:
+        # print error message
+        print("Unable to perform query - no database named '" + db_name + "' exists!")
+        return None
+
+    db_connection = DATABASE_CONNECTION_DICTIONARY[db_name]
+
+    # only one thread can use the shared connection at a time
+    with DATABASE_LOCK_DICTIONARY[db_name]:
+        try:
+            # run the query for each parameter list, then commit them together
+            query_cursor = db_connection.executemany(query_string, query_parameter_list)
+            db_connection.commit()
 
             # print query success message
-            print("Successfully performed '" + query_name + "' query on database " + db_name)
-            # return true - query performed
-            return query_results
+            print("Successfully performed '" + query_name + "' query ("
+                  + str(len(query_parameter_list)) + " rows) on database " + db_name)
+            return query_cursor.rowcount
 
         except Error as exception:
+            # undo the partially performed batch, so the shared connection is left clean
+            db_connection.rollback()
             # print error message
-            print("Error occurred trying to perform query '" + str(query_name) + "' on database "
-                  + str(db_name))
+            print("Error occurred trying to perform query '" + str(query_name)
+                  + "' on database " + str(db_name))
             print(str(exception))
-    else:
-        # print error message
-        print("Unable to perform query - no database named '" + db_name + "' exists!")
+            return None
 
-    # return false; query not performed
-    return None
+def is_write_query(query_string):
+    """This function checks if the query writes to the database (judging by its first
+    keyword), and returns a boolean indicating the result."""
+    return query_string.lstrip().upper().startswith(WRITE_QUERY_KEYWORDS)
 
 def try_get_database_connection(db_path, db_name):
     """This function tries to connect to an sqlite database at the specified path, and
@@ -159,7 +492,9 @@ def try_get_database_connection(db_path, db_name):
 
     # try connecting to the database
     try:
-        db_connection = sqlite3.connect(db_path,check_same_thread=False)
+        new_db_connection = sqlite3.connect(db_path,check_same_thread=False)
+        configure_database_connection(new_db_connection)
+        db_connection = new_db_connection
         print("Connected to " + db_name + " database.")
     except Error as exception:
         # print error message and exception
@@ -170,3 +505,9 @@ def try_get_database_connection(db_path, db_name):
     # -if no connection succeeded, returns null. Otherwise returns the
     # connection object.
     return db_connection
+
+def configure_database_connection(db_connection):
+    """This function applies the pragmas in DATABASE_CONNECTION_PRAGMAS to a new database
+    connection."""
+    for pragma_statement in DATABASE_CONNECTION_PRAGMAS:
+        db_connection.execute(pragma_statement)
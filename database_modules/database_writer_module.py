@@ -0,0 +1,81 @@
+"""This module contains the database writer, a dedicated thread which performs every
+database write of the server process one at a time (in the order they were submitted),
+so that concurrent requests don't compete for database write locks. (Schema migrations are
+the exception; they run on the thread which first accesses a database, see
+schema_migration_module.)"""
+
+from concurrent.futures import Future
+import queue
+import threading
+
+# maximum number of writes waiting to be performed; when the queue is full, threads
+# submitting writes wait until there is room
+WRITE_QUEUE_MAX_SIZE = 10000
+
+# queue of writes waiting to be performed; each item is a list containing the write
+# function and the Future its result is reported through (None signals the writer
+# thread to stop)
+WRITE_QUEUE = queue.Queue(maxsize=WRITE_QUEUE_MAX_SIZE)
+# the writer thread, and the lock guarding its creation
+WRITER_THREAD = None
+WRITER_THREAD_LOCK = threading.Lock()
+
+def submit_write(write_function):
+    """This function queues write_function (called with no parameters) to be run by the
+    writer thread, and returns a Future which will hold its result. The writer thread is
+    started if it isn't running."""
+    write_future = Future()
+
+    # writes submitted by the writer thread itself are run immediately (waiting for them
+    # would deadlock the writer thread)
+    if threading.current_thread() is WRITER_THREAD:
+        run_write(write_function, write_future)
+        return write_future
+
+    start_writer_thread()
+    WRITE_QUEUE.put([write_function, write_future])
+    return write_future
+
+def perform_write(write_function):
+    """This function runs write_function on the writer thread, waits for it to finish and
+    returns its result."""
+    return submit_write(write_function).result()
+
+def start_writer_thread():
+    """This function starts the writer thread, if it isn't running."""
+    # pylint: disable=global-statement
+    global WRITER_THREAD
+
+    with WRITER_THREAD_LOCK:
+        if WRITER_THREAD is None or not WRITER_THREAD.is_alive():
+            WRITER_THREAD = threading.Thread(target=run_writer_loop, name="database_writer",
+                daemon=True)
+            WRITER_THREAD.start()
+
+def stop_writer_thread():
+    """This function stops the writer thread after it performs every write already
+    queued, and waits for it to finish."""
+    with WRITER_THREAD_LOCK:
+        if WRITER_THREAD is None or not WRITER_THREAD.is_alive():
+            return
+        WRITE_QUEUE.put(None)
+
+    WRITER_THREAD.join()
+
+def run_writer_loop():
+    """This function is run by the writer thread; it performs queued writes until it
+    is signalled to stop."""
+    while True:
+        queued_write = WRITE_QUEUE.get()
+        # check for the stop signal
+        if queued_write is None:
+            return
+        run_write(queued_write[0], queued_write[1])
+
+def run_write(write_function, write_future):
+    """This function runs a write function, reporting its result (or the exception it
+    raised) through write_future."""
+    try:
+        write_future.set_result(write_function())
+    except Exception as exception:  # pylint: disable=broad-exception-caught
+        write_future.set_exception(exception)
@@ -11,6 +11,15 @@ CREATE TABLE IF NOT EXISTS users(
 );
 """
 
+# migration script used to add unique indexes on the username and user ID columns of
+# the users table (the 'PRIMARY_KEY' in USER_DB_INIT_CHECK_SCRIPT is treated by SQLite as
+# part of the column type, not as a constraint). Makes user lookups indexed reads, and
+# prevents two users from registering with the same username.
+ADD_USER_UNIQUE_INDEXES = """
+CREATE UNIQUE INDEX IF NOT EXISTS users_username_index ON users(username);
+CREATE UNIQUE INDEX IF NOT EXISTS users_user_id_index ON users(user_id);
+"""
+
 # script used to add a user record into the database.
 # -entry values will be provided as parameters
 CREATE_USER_SCRIPT_TEMPLATE = """INSERT INTO users
@@ -31,6 +40,12 @@ GET_USER_RECORD_BY_USERNAME_TEMPLATE = """
 SELECT * FROM users
 WHERE username = ?"""
 
+# script used to get a record by user ID (if it exists)
+# -user ID will be provided as a parameter.
+GET_USER_RECORD_BY_USER_ID_TEMPLATE = """
+SELECT * FROM users
+WHERE user_id = ?"""
+
 
 # script used to initialize a user database (to store reminders)
 INITIALIZE_USER_REMINDER_DB = """
@@ -43,35 +58,501 @@ CREATE TABLE IF NOT EXISTS reminders(
 );
 """
 
+# migration script used to add the due date as an indexed integer (unix epoch) column,
+# so reminders within a time window can be found with an index range lookup.
+# -due_date strings are stored in local time, so they're converted to UTC first.
+ADD_REMINDER_DUE_EPOCH_COLUMN = """
+ALTER TABLE reminders ADD COLUMN due_epoch INTEGER;
+UPDATE reminders SET due_epoch = CAST(STRFTIME('%s', due_date, 'utc') AS INTEGER);
+CREATE INDEX IF NOT EXISTS reminders_due_epoch_index ON reminders(due_epoch);
+"""
+
 # script used to add a reminder to a user database
 INSERT_NEW_REMINDER = """
 INSERT INTO reminders
-    (reminder_id, due_date, title, tags, description)
+    (reminder_id, due_date, title, tags, description, due_epoch)
 VALUES
-    ( ? , ? , ? , ? , ? );"""
+    ( ? , ? , ? , ? , ? , ? );"""
+
+# migration script used to index reminders in the order they're listed in (due date, then
+# reminder ID to break ties), so a page of reminders is read straight from the index.
+# -the new index also serves lookups by due date alone, so the old index is dropped
+ADD_REMINDER_PAGINATION_INDEX = """
+CREATE INDEX IF NOT EXISTS reminders_due_epoch_id_index ON reminders(due_epoch, reminder_id);
+DROP INDEX IF EXISTS reminders_due_epoch_index;
+"""
+
+# migration script used to add the tag index; each tag of each reminder (normalized, see
+# reminder_tag_index_module) is stored in a row of the reminder_tags table, along with the
+# reminder's due date epoch, so a tag's reminders are read in order of due date straight
+# from the table. Tag rows are deleted along with their reminder by a trigger.
+# -the existing reminders' tags are added by the next migration
+#  (reminder_tag_index_module.backfill_reminder_tags)
+ADD_REMINDER_TAGS_TABLE = """
+CREATE TABLE IF NOT EXISTS reminder_tags(
+    tag VARCHAR NOT NULL,
+    due_epoch INTEGER NOT NULL,
+    reminder_id VARCHAR NOT NULL,
+    PRIMARY KEY (tag, due_epoch, reminder_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reminder_tags_reminder_id_index ON reminder_tags(reminder_id);
+CREATE TRIGGER IF NOT EXISTS reminders_delete_tags AFTER DELETE ON reminders
+BEGIN
+    DELETE FROM reminder_tags WHERE reminder_id = old.reminder_id;
+END;
+"""
+
+# script used to add a tag of a reminder to the tag index
+# -the tag, the reminder's due date epoch and the reminder's ID are filled in where ? is
+INSERT_REMINDER_TAG = """
+INSERT OR IGNORE INTO reminder_tags
+    (tag, due_epoch, reminder_id)
+VALUES
+    ( ? , ? , ? );"""
+
+# script used to get a page of the reminders with a tag, in order of due date
+# -the tag, the due date epoch and ID of the last reminder on the previous page and the page
+#  size are filled in where ? is
+GET_REMINDERS_WITH_TAG = """
+SELECT reminders.reminder_id, reminders.due_date, reminders.title, reminders.tags,
+    reminders.description, reminders.due_epoch
+FROM reminder_tags
+JOIN reminders ON reminders.due_epoch = reminder_tags.due_epoch
+    AND reminders.reminder_id = reminder_tags.reminder_id
+WHERE reminder_tags.tag = ? AND (reminder_tags.due_epoch, reminder_tags.reminder_id) > (?, ?)
+ORDER BY reminder_tags.due_epoch, reminder_tags.reminder_id
+LIMIT ?;
+"""
+
+# script used to get each of the user's tags and the number of reminders with it, in order
+# of tag
+GET_REMINDER_TAG_COUNTS = """
+SELECT tag, COUNT(*) FROM reminder_tags GROUP BY tag ORDER BY tag;
+"""
+
+# migration script used to remove a reminder's tag index rows when its ID, tags or due date
+# epoch are updated (used with one database per user and with shard databases); the writer
+# adds the reminder's new rows in the same transaction, like when the reminder is inserted
+# (tags are normalized in python, which SQLite's functions can't do the same way)
+ADD_REMINDER_TAGS_UPDATE_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS reminders_update_tags
+AFTER UPDATE OF reminder_id, tags, due_epoch ON reminders
+BEGIN
+    DELETE FROM reminder_tags WHERE reminder_id = old.reminder_id;
+END;
+"""
+
+# migration script used to add the full-text search index; an FTS5 table which indexes the
+# title, description and tags of each reminder (stored in the reminders table itself, which
+# the index refers to by rowid). Triggers keep the index in sync as reminders are inserted,
+# updated and deleted, and the existing reminders are indexed by the 'rebuild' command.
+# -matches are ranked by bm25, with title matches weighing the most, then tags, then the
+#  description (ordering by the rank column lets FTS5 sort the matches itself, so snippets
+#  are only made for the page returned)
+# -used by both user reminder databases and shard databases (whose reminders tables have
+#  the same columns)
+# -a VACUUM can change the rowids of the reminders table, so the index must be rebuilt after
+#  one (see reminder_search_index_module)
+ADD_REMINDER_SEARCH_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS reminder_search USING fts5(
+    title, description, tags,
+    content='reminders', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS reminders_insert_search AFTER INSERT ON reminders
+BEGIN
+    INSERT INTO reminder_search(rowid, title, description, tags)
+        VALUES (new.rowid, new.title, new.description, new.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS reminders_delete_search AFTER DELETE ON reminders
+BEGIN
+    INSERT INTO reminder_search(reminder_search, rowid, title, description, tags)
+        VALUES ('delete', old.rowid, old.title, old.description, old.tags);
+END;
+CREATE TRIGGER IF NOT EXISTS reminders_update_search AFTER UPDATE ON reminders
+BEGIN
+    INSERT INTO reminder_search(reminder_search, rowid, title, description, tags)
+        VALUES ('delete', old.rowid, old.title, old.description, old.tags);
+    INSERT INTO reminder_search(rowid, title, description, tags)
+        VALUES (new.rowid, new.title, new.description, new.tags);
+END;
+INSERT INTO reminder_search(reminder_search, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)');
+INSERT INTO reminder_search(reminder_search) VALUES ('rebuild');
+"""
+
+# script used to rebuild the full-text search index from the reminders table
+REBUILD_REMINDER_SEARCH_INDEX = """
+INSERT INTO reminder_search(reminder_search) VALUES ('rebuild');
+"""
+
+# migration script used to add the reminder change counter, which counts the writes to the
+# reminders table (and records the time, as a unix epoch, of the last one); triggers update
+# it, so writes made by every server process are counted. The reminder API's validators
+# are derived from it.
+ADD_REMINDER_CHANGE_COUNTER = """
+CREATE TABLE IF NOT EXISTS reminder_change_counter(
+    change_count INTEGER NOT NULL,
+    last_change_epoch INTEGER NOT NULL
+);
+INSERT INTO reminder_change_counter (change_count, last_change_epoch)
+    SELECT 0, CAST(strftime('%s', 'now') AS INTEGER)
+    WHERE NOT EXISTS (SELECT 1 FROM reminder_change_counter);
+CREATE TRIGGER IF NOT EXISTS reminders_insert_change_counter AFTER INSERT ON reminders
+BEGIN
+    UPDATE reminder_change_counter SET change_count = change_count + 1,
+        last_change_epoch = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+CREATE TRIGGER IF NOT EXISTS reminders_update_change_counter AFTER UPDATE ON reminders
+BEGIN
+    UPDATE reminder_change_counter SET change_count = change_count + 1,
+        last_change_epoch = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+CREATE TRIGGER IF NOT EXISTS reminders_delete_change_counter AFTER DELETE ON reminders
+BEGIN
+    UPDATE reminder_change_counter SET change_count = change_count + 1,
+        last_change_epoch = CAST(strftime('%s', 'now') AS INTEGER);
+END;
+"""
+
+# script used to read the reminder change counter (the number of writes and the time of the
+# last one)
+GET_REMINDER_CHANGE_COUNTER = """
+SELECT change_count, last_change_epoch FROM reminder_change_counter;
+"""
+
+# script used to get a page of the reminders matching a full-text search, best match first,
+# along with a snippet of the best matching field whose matched words are between the
+# characters \x02 and \x03
+# -the search (an FTS5 query), the page size and the number of matches on the previous
+#  pages are filled in where ? is
+SEARCH_REMINDERS = """
+SELECT reminders.reminder_id, reminders.due_date, reminders.title, reminders.tags,
+    reminders.description, reminders.due_epoch,
+    snippet(reminder_search, -1, char(2), char(3), '...', 16)
+FROM reminder_search
+JOIN reminders ON reminders.rowid = reminder_search.rowid
+WHERE reminder_search MATCH ?
+ORDER BY reminder_search.rank
+LIMIT ? OFFSET ?;
+"""
 
-# script used to identify reminder entries that are within a certain number
-# of hours from the present
-# -hour number is filled in where ? is.
+# script used to get a page of the reminder entries that are due within a time window, in
+# order of due date
+# -the due date epoch and ID of the last reminder on the previous page (the page cursor),
+#  window start (exclusive) and end (inclusive) epochs and the page size are filled in where
+#  ? is. The page cursor comes first, so the index range starts at the cursor (rather than
+#  scanning the previous pages).
 GET_REMINDERS_BY_DATETIME = """
-SELECT *
+SELECT reminder_id, due_date, title, tags, description, due_epoch
 FROM reminders
-WHERE ((JULIANDAY(due_date) - JULIANDAY('now', 'localtime')) * 24 <= ? AND
-    (JULIANDAY(due_date) - JULIANDAY('now', 'localtime')) * 24 > 0);
+WHERE (due_epoch, reminder_id) > (?, ?) AND due_epoch > ? AND due_epoch <= ?
+ORDER BY due_epoch, reminder_id
+LIMIT ?;
 """
 
-# when this script is run, all reminders that are over 3 days old will be
-# removed.
+# script used to count the reminders a page of GET_REMINDERS_BY_DATETIME starts (the
+# reminders from the page onwards, within the window)
+# -the count stops at the limit filled in where the last ? is (one more than the page size
+#  is enough to tell if there are more pages), so large windows aren't scanned to the end
+COUNT_REMINDERS_BY_DATETIME = """
+SELECT COUNT(*) FROM (
+    SELECT 1
+    FROM reminders
+    WHERE (due_epoch, reminder_id) > (?, ?) AND due_epoch > ? AND due_epoch <= ?
+    LIMIT ?);
+"""
+
+# when this script is run, all reminders that are due before the epoch filled in
+# where ? is (3 days before the present) will be removed.
 EXPIRED_REMINDER_AUTODELETE_SCRIPT = """
-DELETE FROM reminders WHERE (JULIANDAY('now', 'localtime') - JULIANDAY(due_date)) > 3;
+DELETE FROM reminders WHERE due_epoch < ?;
+"""
+
+# scripts used before the auto-delete script, to check if a user reminder database has
+# reminders due before the epoch filled in where ? is, and to get the IDs of the users with
+# such reminders in a shard database (only those users' reminders are changed)
+HAS_EXPIRED_REMINDERS = """
+SELECT EXISTS(SELECT 1 FROM reminders WHERE due_epoch < ?);
+"""
+
+GET_EXPIRED_REMINDER_USER_IDS = """
+SELECT DISTINCT user_id FROM reminders WHERE due_epoch < ?;
+"""
+
+# scripts used by the notification engine to read the reminders due within a time window
+# (from the start epoch, inclusive, to the end epoch, exclusive, filled in where ? is) from
+# a whole reminder database; a user reminder database's rows don't include the user ID
+# (the database's key), a shard database's rows start with it
+# -the last row contains the earliest due date epoch from the third epoch filled in (the end
+#  of the notification window) onwards, and its reminder ID is NULL
+GET_UPCOMING_REMINDERS = """
+SELECT reminder_id, title, due_epoch FROM reminders WHERE due_epoch >= ? AND due_epoch < ?
+UNION ALL
+SELECT NULL, NULL, MIN(due_epoch) FROM reminders WHERE due_epoch >= ?;
 """
 
+GET_UPCOMING_SHARD_REMINDERS = """
+SELECT user_id, reminder_id, title, due_epoch FROM reminders
+WHERE due_epoch >= ? AND due_epoch < ?
+UNION ALL
+SELECT NULL, NULL, NULL, MIN(due_epoch) FROM reminders WHERE due_epoch >= ?;
+"""
+
+# script used to get a page of the reminder entries whose due date has passed (up to 3 days
+# ago; older reminders are deleted by the maintenance scheduler, but may not have been swept
+# yet), in order of due date
+# -the page cursor, window start (inclusive, 3 days before the present) and end (exclusive,
+#  the present) epochs and the page size are filled in where ? is.
 GET_PAST_REMINDERS = """
-SELECT *
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders
+WHERE (due_epoch, reminder_id) > (?, ?) AND due_epoch >= ? AND due_epoch < ?
+ORDER BY due_epoch, reminder_id
+LIMIT ?;
+"""
+
+COUNT_PAST_REMINDERS = """
+SELECT COUNT(*) FROM (
+    SELECT 1
+    FROM reminders
+    WHERE (due_epoch, reminder_id) > (?, ?) AND due_epoch >= ? AND due_epoch < ?
+    LIMIT ?);
+"""
+
+# script used to get a chunk of every reminder (for exporting them), in order of due date
+# -the due date epoch and ID of the last reminder in the previous chunk and the chunk size
+#  are filled in where ? is
+GET_REMINDER_EXPORT_CHUNK = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
 FROM reminders
-WHERE (JULIANDAY('now', 'localtime') - JULIANDAY(due_date)) * 24 > 0;
+WHERE (due_epoch, reminder_id) > (?, ?)
+ORDER BY due_epoch, reminder_id
+LIMIT ?;
+"""
+
+# script used to get a chunk of the reminders without a due date epoch (for exporting them,
+# before the other reminders), in order of reminder ID
+# -the ID of the last reminder in the previous chunk and the chunk size are filled in where
+#  ? is
+GET_REMINDER_EXPORT_NULL_EPOCH_CHUNK = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders
+WHERE due_epoch IS NULL AND reminder_id > ?
+ORDER BY reminder_id
+LIMIT ?;
+"""
+
+# script used to initialize a reminder shard database (stores the reminders of every
+# user whose user ID hashes to the shard)
+INITIALIZE_SHARDED_REMINDER_DB = """
+CREATE TABLE IF NOT EXISTS reminders(
+    user_id VARCHAR NOT NULL,
+    reminder_id VARCHAR NOT NULL,
+    due_date VARCHAR,
+    title VARCHAR,
+    tags VARCHAR,
+    description VARCHAR,
+    due_epoch INTEGER
+);
+CREATE UNIQUE INDEX IF NOT EXISTS reminders_user_reminder_index
+    ON reminders(user_id, reminder_id);
+CREATE INDEX IF NOT EXISTS reminders_user_due_epoch_index ON reminders(user_id, due_epoch);
+CREATE INDEX IF NOT EXISTS reminders_due_epoch_index ON reminders(due_epoch);
+"""
+
+# migration script used to index each user's reminders in the order they're listed in
+# (see ADD_REMINDER_PAGINATION_INDEX); the new index replaces the (user ID, due date) index
+ADD_SHARDED_REMINDER_PAGINATION_INDEX = """
+CREATE INDEX IF NOT EXISTS reminders_user_due_epoch_id_index
+    ON reminders(user_id, due_epoch, reminder_id);
+DROP INDEX IF EXISTS reminders_user_due_epoch_index;
+"""
+
+# migration script used to add the tag index to a reminder shard database (see
+# ADD_REMINDER_TAGS_TABLE)
+# -the existing reminders' tags are added by the next migration
+#  (reminder_tag_index_module.backfill_sharded_reminder_tags)
+ADD_SHARDED_REMINDER_TAGS_TABLE = """
+CREATE TABLE IF NOT EXISTS reminder_tags(
+    user_id VARCHAR NOT NULL,
+    tag VARCHAR NOT NULL,
+    due_epoch INTEGER NOT NULL,
+    reminder_id VARCHAR NOT NULL,
+    PRIMARY KEY (user_id, tag, due_epoch, reminder_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS reminder_tags_reminder_id_index ON reminder_tags(reminder_id);
+CREATE TRIGGER IF NOT EXISTS reminders_delete_tags AFTER DELETE ON reminders
+BEGIN
+    DELETE FROM reminder_tags WHERE reminder_id = old.reminder_id;
+END;
+"""
+
+# migration script used to add the reminder change counters to a reminder shard database
+# (see ADD_REMINDER_CHANGE_COUNTER); each user's writes are counted separately, and users
+# whose reminders haven't been written to since have no row
+ADD_SHARDED_REMINDER_CHANGE_COUNTER = """
+CREATE TABLE IF NOT EXISTS reminder_change_counter(
+    user_id VARCHAR PRIMARY KEY,
+    change_count INTEGER NOT NULL,
+    last_change_epoch INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS reminders_insert_change_counter AFTER INSERT ON reminders
+BEGIN
+    INSERT INTO reminder_change_counter (user_id, change_count, last_change_epoch)
+        VALUES (new.user_id, 1, CAST(strftime('%s', 'now') AS INTEGER))
+        ON CONFLICT (user_id) DO UPDATE SET change_count = change_count + 1,
+            last_change_epoch = excluded.last_change_epoch;
+END;
+CREATE TRIGGER IF NOT EXISTS reminders_update_change_counter AFTER UPDATE ON reminders
+BEGIN
+    INSERT INTO reminder_change_counter (user_id, change_count, last_change_epoch)
+        VALUES (new.user_id, 1, CAST(strftime('%s', 'now') AS INTEGER))
+        ON CONFLICT (user_id) DO UPDATE SET change_count = change_count + 1,
+            last_change_epoch = excluded.last_change_epoch;
+END;
+CREATE TRIGGER IF NOT EXISTS reminders_delete_change_counter AFTER DELETE ON reminders
+BEGIN
+    INSERT INTO reminder_change_counter (user_id, change_count, last_change_epoch)
+        VALUES (old.user_id, 1, CAST(strftime('%s', 'now') AS INTEGER))
+        ON CONFLICT (user_id) DO UPDATE SET change_count = change_count + 1,
+            last_change_epoch = excluded.last_change_epoch;
+END;
 """
 
+# sharded versions of the reminder scripts; the first parameter of each is the user ID
+SHARDED_INSERT_NEW_REMINDER = """
+INSERT INTO reminders
+    (user_id, reminder_id, due_date, title, tags, description, due_epoch)
+VALUES
+    ( ? , ? , ? , ? , ? , ? , ? );"""
+
+# -also used to import reminders from user reminder databases (ignores reminders that
+#  were already imported)
+SHARDED_IMPORT_REMINDER = """
+INSERT OR IGNORE INTO reminders
+    (user_id, reminder_id, due_date, title, tags, description, due_epoch)
+VALUES
+    ( ? , ? , ? , ? , ? , ? , ? );"""
+
+SHARDED_GET_REMINDERS_BY_DATETIME = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders
+WHERE user_id = ? AND (due_epoch, reminder_id) > (?, ?) AND due_epoch > ? AND due_epoch <= ?
+ORDER BY due_epoch, reminder_id
+LIMIT ?;
+"""
+
+SHARDED_GET_PAST_REMINDERS = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders
+WHERE user_id = ? AND (due_epoch, reminder_id) > (?, ?) AND due_epoch >= ? AND due_epoch < ?
+ORDER BY due_epoch, reminder_id
+LIMIT ?;
+"""
+
+SHARDED_COUNT_REMINDERS_BY_DATETIME = """
+SELECT COUNT(*) FROM (
+    SELECT 1
+    FROM reminders
+    WHERE user_id = ? AND (due_epoch, reminder_id) > (?, ?) AND due_epoch > ? AND due_epoch <= ?
+    LIMIT ?);
+"""
+
+SHARDED_COUNT_PAST_REMINDERS = """
+SELECT COUNT(*) FROM (
+    SELECT 1
+    FROM reminders
+    WHERE user_id = ? AND (due_epoch, reminder_id) > (?, ?) AND due_epoch >= ? AND due_epoch < ?
+    LIMIT ?);
+"""
+
+SHARDED_GET_REMINDER_EXPORT_NULL_EPOCH_CHUNK = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders
+WHERE user_id = ? AND due_epoch IS NULL AND reminder_id > ?
+ORDER BY reminder_id
+LIMIT ?;
+"""
+
+SHARDED_GET_REMINDER_EXPORT_CHUNK = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders
+WHERE user_id = ? AND (due_epoch, reminder_id) > (?, ?)
+ORDER BY due_epoch, reminder_id
+LIMIT ?;
+"""
+
+SHARDED_INSERT_REMINDER_TAG = """
+INSERT OR IGNORE INTO reminder_tags
+    (user_id, tag, due_epoch, reminder_id)
+VALUES
+    ( ? , ? , ? , ? );"""
+
+SHARDED_GET_REMINDERS_WITH_TAG = """
+SELECT reminders.reminder_id, reminders.due_date, reminders.title, reminders.tags,
+    reminders.description, reminders.due_epoch
+FROM reminder_tags
+JOIN reminders ON reminders.user_id = reminder_tags.user_id
+    AND reminders.due_epoch = reminder_tags.due_epoch
+    AND reminders.reminder_id = reminder_tags.reminder_id
+WHERE reminder_tags.user_id = ? AND reminder_tags.tag = ?
+    AND (reminder_tags.due_epoch, reminder_tags.reminder_id) > (?, ?)
+ORDER BY reminder_tags.due_epoch, reminder_tags.reminder_id
+LIMIT ?;
+"""
+
+SHARDED_GET_REMINDER_TAG_COUNTS = """
+SELECT tag, COUNT(*) FROM reminder_tags WHERE user_id = ? GROUP BY tag ORDER BY tag;
+"""
+
+# -the index is shared by every user in the shard, so bm25 weighs words by how common they
+#  are in the whole shard (not just the user's reminders); only the matches are limited to
+#  the user's reminders
+SHARDED_SEARCH_REMINDERS = """
+SELECT reminders.reminder_id, reminders.due_date, reminders.title, reminders.tags,
+    reminders.description, reminders.due_epoch,
+    snippet(reminder_search, -1, char(2), char(3), '...', 16)
+FROM reminder_search
+JOIN reminders ON reminders.rowid = reminder_search.rowid
+WHERE reminders.user_id = ? AND reminder_search MATCH ?
+ORDER BY reminder_search.rank
+LIMIT ? OFFSET ?;
+"""
+
+SHARDED_GET_REMINDER_CHANGE_COUNTER = """
+SELECT change_count, last_change_epoch FROM reminder_change_counter WHERE user_id = ?;
+"""
+
+# script used to read every reminder from a user reminder database (to import them into
+# a shard database)
+GET_ALL_REMINDERS = """
+SELECT reminder_id, due_date, title, tags, description, due_epoch
+FROM reminders;
+"""
+
+# script used to read every tag index row from a user reminder database (to import them
+# into a shard database along with the reminders)
+GET_ALL_REMINDER_TAGS = """
+SELECT tag, due_epoch, reminder_id
+FROM reminder_tags;
+"""
+
+# dictionary which associates user reminder database scripts (keys) with their sharded
+# versions (values)
+SHARDED_REMINDER_QUERY_DICTIONARY = {
+    INSERT_NEW_REMINDER: SHARDED_INSERT_NEW_REMINDER,
+    GET_REMINDERS_BY_DATETIME: SHARDED_GET_REMINDERS_BY_DATETIME,
+    GET_PAST_REMINDERS: SHARDED_GET_PAST_REMINDERS,
+    COUNT_REMINDERS_BY_DATETIME: SHARDED_COUNT_REMINDERS_BY_DATETIME,
+    COUNT_PAST_REMINDERS: SHARDED_COUNT_PAST_REMINDERS,
+    GET_REMINDER_EXPORT_CHUNK: SHARDED_GET_REMINDER_EXPORT_CHUNK,
+    GET_REMINDER_EXPORT_NULL_EPOCH_CHUNK: SHARDED_GET_REMINDER_EXPORT_NULL_EPOCH_CHUNK,
+    INSERT_REMINDER_TAG: SHARDED_INSERT_REMINDER_TAG,
+    GET_REMINDERS_WITH_TAG: SHARDED_GET_REMINDERS_WITH_TAG,
+    GET_REMINDER_TAG_COUNTS: SHARDED_GET_REMINDER_TAG_COUNTS,
+    SEARCH_REMINDERS: SHARDED_SEARCH_REMINDERS,
+    GET_REMINDER_CHANGE_COUNTER: SHARDED_GET_REMINDER_CHANGE_COUNTER,
+}
+
 INITIALIZE_FAILED_SIGNIN_LOG_DB = """
 CREATE TABLE IF NOT EXISTS failed_logins(
     event_id VARCHAR PRIMARY_KEY,
@@ -82,13 +563,104 @@ CREATE TABLE IF NOT EXISTS failed_logins(
 # this script deletes old entries from the signin log (over a week old)
 # to avoid the database growing out of control. If needed the webmaster
 # can make a backup of the sign-in log before the 1-week deadline.
+# -the cutoff (a local date/time string in the same format as event_datetime, which sorts
+#  in date order) is filled in where ? is, so the event_datetime index is used
 DELETE_OLD_SIGNIN_ENTRIES = """
-DELETE FROM failed_logins WHERE (JULIANDAY('now', 'localtime') - JULIANDAY(event_datetime)) > 7
+DELETE FROM failed_logins WHERE event_datetime < ?
+"""
+
+# migration script used to record the username entered in each failed login attempt, so
+# the login rate limiter can count recent failures per username.
+ADD_FAILED_LOGIN_USERNAME_COLUMN = """
+ALTER TABLE failed_logins ADD COLUMN event_username VARCHAR;
+CREATE INDEX IF NOT EXISTS failed_logins_event_datetime_index ON failed_logins(event_datetime);
 """
 
 # this script adds a login attempt to the
 RECORD_LOGIN_ATTEMPT = """
 INSERT INTO failed_logins
-    (event_id, event_datetime, event_ip_address)
+    (event_id, event_datetime, event_ip_address, event_username)
 VALUES
-    ( ? , ? , ? );"""
+    ( ? , ? , ? , ? );"""
+
+# migration script used to add the login attempt table, which the login rate limiter used to
+# count recent login attempts in (removed by DROP_LOGIN_ATTEMPTS_TABLE).
+INITIALIZE_LOGIN_ATTEMPTS_TABLE = """
+CREATE TABLE IF NOT EXISTS login_attempts(
+    attempt_id VARCHAR PRIMARY KEY,
+    attempt_epoch INTEGER NOT NULL,
+    ip_address VARCHAR NOT NULL,
+    username VARCHAR
+);
+CREATE INDEX IF NOT EXISTS login_attempts_ip_address_index
+    ON login_attempts(ip_address, attempt_epoch);
+CREATE INDEX IF NOT EXISTS login_attempts_username_index
+    ON login_attempts(username, attempt_epoch);
+CREATE INDEX IF NOT EXISTS login_attempts_attempt_epoch_index ON login_attempts(attempt_epoch);
+"""
+
+# migration script used to remove the login attempt table (the login rate limiter counts
+# failed login attempts in memory again, seeded from failed_logins)
+DROP_LOGIN_ATTEMPTS_TABLE = """
+DROP TABLE IF EXISTS login_attempts;
+"""
+
+# script used to get the failed login attempts made since a date/time (filled in where ? is)
+GET_RECENT_FAILED_LOGINS = """
+SELECT event_datetime, event_ip_address, event_username FROM failed_logins
+WHERE event_datetime >= ?
+"""
+
+# script used to initialize the sessions database (used when sessions are stored in
+# SQLite, so they can be shared by multiple server processes)
+INITIALIZE_SESSIONS_DB = """
+CREATE TABLE IF NOT EXISTS sessions(
+    session_id VARCHAR PRIMARY KEY,
+    user_id VARCHAR,
+    user_auth_token VARCHAR,
+    jinja_page_vars VARCHAR,
+    last_access_epoch INTEGER
+);
+CREATE INDEX IF NOT EXISTS sessions_last_access_index ON sessions(last_access_epoch);
+"""
+
+# script used to add a session to the sessions database
+INSERT_SESSION = """
+INSERT OR REPLACE INTO sessions
+    (session_id, user_id, user_auth_token, jinja_page_vars, last_access_epoch)
+VALUES
+    ( ? , ? , ? , ? , ? );"""
+
+# script used to get a session by session ID, if it was accessed after the epoch
+# filled in where the second ? is (it hasn't expired)
+GET_SESSION = """
+SELECT user_id, user_auth_token, jinja_page_vars, last_access_epoch
+FROM sessions
+WHERE session_id = ? AND last_access_epoch >= ?;
+"""
+
+# script used to extend a session (update the time it was last accessed)
+UPDATE_SESSION_LAST_ACCESS = """
+UPDATE sessions
+SET last_access_epoch = ?
+WHERE session_id = ?;
+"""
+
+# script used to remove a session (log a user out)
+DELETE_SESSION = """
+DELETE FROM sessions WHERE session_id = ?;
+"""
+
+# script used to remove sessions last accessed before the epoch filled in where ? is
+DELETE_EXPIRED_SESSIONS = """
+DELETE FROM sessions WHERE last_access_epoch < ?;
+"""
+
+# script used to remove the least recently used sessions, keeping the number of
+# sessions filled in where ? is
+DELETE_LEAST_RECENT_SESSIONS = """
+DELETE FROM sessions WHERE session_id IN (
+    SELECT session_id FROM sessions
+    ORDER BY last_access_epoch DESC
+    LIMIT -1 OFFSET ?);
+"""
@@ -0,0 +1,167 @@
+"""This module contains the maintenance scheduler, which runs database upkeep tasks
+(such as deleting expired reminders and old failed sign-in log entries) periodically on
+a background thread, so that requests from clients don't have to perform them."""
+
+from collections import deque
+from dataclasses import dataclass
+import datetime
+import threading
+import time
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    reminder_query_cache_module
+
+# number of seconds the scheduler thread waits between checking for due tasks
+SCHEDULER_TICK_SECONDS = 5
+# number of seconds between expired reminder sweeps
+EXPIRED_REMINDER_SWEEP_INTERVAL_SECONDS = 60
+# maximum number of reminder databases swept per expired reminder sweep (the
+# remaining databases are swept in the following sweeps)
+EXPIRED_REMINDER_SWEEP_BATCH_SIZE = 50
+# number of seconds between deletions of old failed sign-in log entries
+OLD_SIGNIN_ENTRY_SWEEP_INTERVAL_SECONDS = 3600
+# number of days failed sign-in log entries are kept for
+SIGNIN_LOG_RETENTION_DAYS = 7
+# number of seconds between checks for idle pooled database connections
+IDLE_CONNECTION_SWEEP_INTERVAL_SECONDS = 60
+
+# list containing the MaintenanceTask objects run by the scheduler
+MAINTENANCE_TASK_LIST = []
+# lock guarding MAINTENANCE_TASK_LIST
+MAINTENANCE_TASK_LOCK = threading.Lock()
+# queue of the keys of reminder databases (user IDs or shard database names) waiting to be
+# swept for expired reminders
+# -refilled once every database has been swept
+PENDING_SWEEP_DB_KEY_QUEUE = deque()
+
+# event used to signal the scheduler thread to stop, and the scheduler thread itself
+SCHEDULER_STOP_EVENT = threading.Event()
+SCHEDULER_THREAD = None
+
+@dataclass
+class MaintenanceTask:
+    """This class is a container for a maintenance task run periodically by the
+    scheduler."""
+    # constructor
+    def __init__(self, task_name, interval_seconds, task_function):
+        self.task_name = task_name
+        self.interval_seconds = interval_seconds
+        self.task_function = task_function
+        self.next_run_time = time.monotonic() + interval_seconds
+
+def register_maintenance_task(task_name, interval_seconds, task_function):
+    """This function adds a task to the scheduler, which will call task_function (with
+    no parameters) every interval_seconds seconds."""
+    with MAINTENANCE_TASK_LOCK:
+        MAINTENANCE_TASK_LIST.append(MaintenanceTask(task_name, interval_seconds,
+            task_function))
+
+def start_maintenance_scheduler():
+    """This function registers the default maintenance tasks and starts the scheduler
+    thread. Does nothing if the scheduler is already running."""
+    # pylint: disable=global-statement
+    global SCHEDULER_THREAD
+
+    # check if scheduler is already running
+    if SCHEDULER_THREAD is not None and SCHEDULER_THREAD.is_alive():
+        return
+
+    # register default tasks
+    register_maintenance_task("Delete expired reminders",
+        EXPIRED_REMINDER_SWEEP_INTERVAL_SECONDS, sweep_expired_reminders)
+    register_maintenance_task("Delete old entries, failed sign-in log",
+        OLD_SIGNIN_ENTRY_SWEEP_INTERVAL_SECONDS, delete_old_signin_entries)
+    register_maintenance_task("Close idle database connections",
+        IDLE_CONNECTION_SWEEP_INTERVAL_SECONDS, connection_pool_module.close_idle_connections)
+
+    # start scheduler thread
+    SCHEDULER_STOP_EVENT.clear()
+    SCHEDULER_THREAD = threading.Thread(target=run_scheduler_loop,
+        name="maintenance_scheduler", daemon=True)
+    SCHEDULER_THREAD.start()
+    print("Started maintenance scheduler")
+
+def stop_maintenance_scheduler():
+    """This function stops the scheduler thread, waiting for any running task to finish,
+    and removes all registered tasks."""
+    SCHEDULER_STOP_EVENT.set()
+
+    if SCHEDULER_THREAD is not None:
+        SCHEDULER_THREAD.join()
+
+    with MAINTENANCE_TASK_LOCK:
+        MAINTENANCE_TASK_LIST.clear()
+
+def run_scheduler_loop():
+    """This function is run by the scheduler thread; it runs each registered task when
+    it is due, until the scheduler is stopped."""
+    while not SCHEDULER_STOP_EVENT.wait(SCHEDULER_TICK_SECONDS):
+        # get the tasks which are due to run
+        with MAINTENANCE_TASK_LOCK:
+            due_task_list = [task for task in MAINTENANCE_TASK_LIST
+                             if task.next_run_time <= time.monotonic()]
+
+        for task in due_task_list:
+            # try running the task (an error in one task shouldn't stop the scheduler)
+            try:
+                task.task_function()
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                # print error message
+                print("Error occurred trying to run maintenance task '" + task.task_name + "'")
+                print(str(exception))
+            task.next_run_time = time.monotonic() + task.interval_seconds
+
+def sweep_expired_reminders():
+    """This function deletes expired reminders from the next batch of (at most
+    EXPIRED_REMINDER_SWEEP_BATCH_SIZE) reminder databases."""
+
+    # check if every database has been swept; if so, start a new pass
+    if len(PENDING_SWEEP_DB_KEY_QUEUE) == 0:
+        PENDING_SWEEP_DB_KEY_QUEUE.extend(database_access_module.get_reminder_db_keys())
+
+    for _ in range(min(EXPIRED_REMINDER_SWEEP_BATCH_SIZE, len(PENDING_SWEEP_DB_KEY_QUEUE))):
+        reminder_db_key = PENDING_SWEEP_DB_KEY_QUEUE.popleft()
+        expiry_epoch = int(time.time()) - server_constants.EXPIRED_REMINDER_RETENTION_HOURS * 3600
+
+        # find the users with expired reminders in the database (connections opened only for
+        # the sweep aren't kept in the connection pool, so sweeping doesn't evict active users)
+        expired_reminder_user_ids = get_expired_reminder_user_ids(reminder_db_key,
+            expiry_epoch)
+        if len(expired_reminder_user_ids) == 0:
+            continue
+
+        # run the auto-delete script
+        database_access_module.perform_reminder_db_query(reminder_db_key,
+            "Delete expired reminders", db_scripts.EXPIRED_REMINDER_AUTODELETE_SCRIPT,
+            [expiry_epoch], keep_connection_open=False)
+
+        # remove the cached pages of the users whose reminders were deleted
+        for user_id in expired_reminder_user_ids:
+            reminder_query_cache_module.invalidate_user_reminders(user_id)
+
+def get_expired_reminder_user_ids(reminder_db_key, expiry_epoch):
+    """This function returns a list of the IDs of the users with reminders due before
+    expiry_epoch in the reminder database with the key (a user ID, or a shard database
+    name). Returns an empty list if the query failed."""
+
+    # check if reminders are stored in shard databases (which store many users' reminders)
+    if server_constants.REMINDER_STORAGE_MODE == "sharded":
+        query_results = database_access_module.perform_reminder_db_query(reminder_db_key,
+            "Find users with expired reminders", db_scripts.GET_EXPIRED_REMINDER_USER_IDS,
+            [expiry_epoch], keep_connection_open=False)
+        return [row[0] for row in query_results or []]
+
+    # a user reminder database's key is the user's ID
+    query_results = database_access_module.perform_reminder_db_query(reminder_db_key,
+        "Check for expired reminders", db_scripts.HAS_EXPIRED_REMINDERS, [expiry_epoch],
+        keep_connection_open=False)
+    return [reminder_db_key] if query_results and query_results[0][0] else []
+
+def delete_old_signin_entries():
+    """This function deletes old (> 1 week) entries in the failed login attempt log, to
+    avoid the file blowing up in size out of control."""
+    # -if webmaster wants they can make a copy of the database for further analysis,
+    # but if database gets too big that will slow the website down.
+    database_access_module.perform_db_query(server_constants.LOGIN_LOG_DB_NAME,
+        "Delete old entries, failed sign-in log", db_scripts.DELETE_OLD_SIGNIN_ENTRIES,
+        [str(datetime.datetime.now() - datetime.timedelta(days=SIGNIN_LOG_RETENTION_DAYS))])
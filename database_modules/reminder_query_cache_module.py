@@ -0,0 +1,169 @@
+"""This module contains the reminder query cache, which keeps recently viewed pages of
+reminders (the results of the home page's reminder filters) in memory, so repeatedly
+clicking the filter buttons doesn't query the reminder databases every time.
+
+Pages are cached per user, and a user's pages are removed whenever their reminders are
+written to (see invalidate_user_reminders). Each process only invalidates its own cache,
+so pages are also only used for REMINDER_CACHE_TTL_SECONDS seconds; this also limits how
+far the window of a cached first page (which starts at the time it was cached) can drift
+from the present.
+
+The generations (change counters) of the REMINDER_GENERATION_MAX_USERS most recently
+written users are kept; when a user's is removed, so are their cached pages, and users
+without a kept generation share a generation which is changed on every removal (so a
+user's generation never returns to an earlier value)."""
+
+from collections import OrderedDict
+import threading
+import time
+
+# number of seconds a cached page is used before it is read from the database again
+REMINDER_CACHE_TTL_SECONDS = 15
+# maximum number of reminders in all cached pages; when exceeded, the least recently used
+# pages are removed
+REMINDER_CACHE_MAX_REMINDERS = 50000
+# maximum number of users whose reminder generation is kept; when exceeded, the least
+# recently written users' generations (and cached pages) are removed
+REMINDER_GENERATION_MAX_USERS = 10000
+
+# ordered dictionary which associates cache keys (a tuple of the user ID and the page's
+# description, such as its window, cursor and size) with a list containing the cached page,
+# the number of reminders in it and the time it was cached (values), ordered from least
+# recently used (first) to most recently used (last).
+REMINDER_CACHE = OrderedDict()
+# dictionary which associates user IDs (keys) with the set of their cache keys (values)
+REMINDER_CACHE_USER_KEY_DICTIONARY = {}
+# ordered dictionary which associates user IDs (keys) with the generation of their reminders
+# (values; a number changed whenever they are written to by this process), ordered from
+# least recently written (first) to most recently written (last); a page read before a
+# write isn't cached after it
+REMINDER_GENERATION_DICTIONARY = OrderedDict()
+# lock guarding the dictionaries above, the generation variables below,
+# REMINDER_CACHE_STATISTICS and CACHED_REMINDER_COUNT
+REMINDER_CACHE_LOCK = threading.Lock()
+# number of reminders in all cached pages
+CACHED_REMINDER_COUNT = 0
+# last generation assigned (generations are never reused)
+LAST_REMINDER_GENERATION = 0
+# generation of users who aren't in REMINDER_GENERATION_DICTIONARY (changed whenever a user
+# is removed from it)
+UNTRACKED_REMINDER_GENERATION = 0
+# counters used to measure the effectiveness of the cache
+REMINDER_CACHE_STATISTICS = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+def get_reminder_generation(user_id):
+    """This function returns the generation of the user's reminders (changed whenever they
+    are written to). Read it before querying a page, and pass it to cache_reminder_page."""
+    with REMINDER_CACHE_LOCK:
+        return REMINDER_GENERATION_DICTIONARY.get(str(user_id), UNTRACKED_REMINDER_GENERATION)
+
+def get_cached_reminder_page(user_id, page_key):
+    """This function returns the cached page of the user's reminders described by page_key,
+    or None if the page isn't cached (or has been cached for too long)."""
+    cache_key = (str(user_id), page_key)
+
+    with REMINDER_CACHE_LOCK:
+        # check if page is cached and hasn't expired
+        if (cache_key in REMINDER_CACHE and REMINDER_CACHE[cache_key][2]
+                >= time.monotonic() - REMINDER_CACHE_TTL_SECONDS):
+            REMINDER_CACHE_STATISTICS["hits"] += 1
+            # mark as most recently used
+            REMINDER_CACHE.move_to_end(cache_key)
+            return REMINDER_CACHE[cache_key][0]
+
+        REMINDER_CACHE_STATISTICS["misses"] += 1
+        return None
+
+def cache_reminder_page(user_id, page_key, reminder_generation, reminder_page, reminder_count):
+    """This function adds a page of the user's reminders (containing reminder_count reminders)
+    to the cache, unless the user's reminders were written to since reminder_generation was
+    read. The least recently used pages are removed if the cache is full."""
+    # pylint: disable=global-statement
+    global CACHED_REMINDER_COUNT
+
+    user_id = str(user_id)
+    cache_key = (user_id, page_key)
+
+    with REMINDER_CACHE_LOCK:
+        # check if the page is out of date
+        if reminder_generation != REMINDER_GENERATION_DICTIONARY.get(user_id,
+                UNTRACKED_REMINDER_GENERATION):
+            return
+
+        remove_cached_page_locked(cache_key)
+        REMINDER_CACHE[cache_key] = [reminder_page, reminder_count, time.monotonic()]
+        REMINDER_CACHE_USER_KEY_DICTIONARY.setdefault(user_id, set()).add(cache_key)
+        # -pages count as at least one reminder, so empty pages are also limited
+        CACHED_REMINDER_COUNT += max(1, reminder_count)
+
+        # remove least recently used pages until within the maximum cache size
+        while CACHED_REMINDER_COUNT > REMINDER_CACHE_MAX_REMINDERS:
+            remove_cached_page_locked(next(iter(REMINDER_CACHE)))
+            REMINDER_CACHE_STATISTICS["evictions"] += 1
+
+def invalidate_user_reminders(user_id):
+    """This function removes every cached page of the user's reminders, and marks pages being
+    read as out of date (run whenever the user's reminders are written to)."""
+    # pylint: disable=global-statement
+    global UNTRACKED_REMINDER_GENERATION
+
+    user_id = str(user_id)
+
+    with REMINDER_CACHE_LOCK:
+        REMINDER_GENERATION_DICTIONARY[user_id] = get_next_reminder_generation_locked()
+        REMINDER_GENERATION_DICTIONARY.move_to_end(user_id)
+        remove_user_cached_pages_locked(user_id)
+        REMINDER_CACHE_STATISTICS["invalidations"] += 1
+
+        # remove the least recently written users' generations (and their cached pages)
+        # until within the maximum number of users
+        while len(REMINDER_GENERATION_DICTIONARY) > REMINDER_GENERATION_MAX_USERS:
+            removed_user_id = REMINDER_GENERATION_DICTIONARY.popitem(last=False)[0]
+            remove_user_cached_pages_locked(removed_user_id)
+            # -give the untracked users a new generation (so the removed user's generation
+            #  doesn't return to an earlier value)
+            UNTRACKED_REMINDER_GENERATION = get_next_reminder_generation_locked()
+
+def get_next_reminder_generation_locked():
+    """This function returns a new reminder generation. REMINDER_CACHE_LOCK must be
+    held."""
+    # pylint: disable=global-statement
+    global LAST_REMINDER_GENERATION
+
+    LAST_REMINDER_GENERATION += 1
+    return LAST_REMINDER_GENERATION
+
+def remove_user_cached_pages_locked(user_id):
+    """This function removes every cached page of the user's reminders.
+    REMINDER_CACHE_LOCK must be held."""
+    for cache_key in list(REMINDER_CACHE_USER_KEY_DICTIONARY.get(user_id, [])):
+        remove_cached_page_locked(cache_key)
+
+def remove_cached_page_locked(cache_key):
+    """This function removes the page with the cache key from the cache (if it is cached).
+    REMINDER_CACHE_LOCK must be held."""
+    # pylint: disable=global-statement
+    global CACHED_REMINDER_COUNT
+
+    if cache_key not in REMINDER_CACHE:
+        return
+
+    CACHED_REMINDER_COUNT -= max(1, REMINDER_CACHE.pop(cache_key)[1])
+    user_cache_key_set = REMINDER_CACHE_USER_KEY_DICTIONARY[cache_key[0]]
+    user_cache_key_set.discard(cache_key)
+    if len(user_cache_key_set) == 0:
+        del REMINDER_CACHE_USER_KEY_DICTIONARY[cache_key[0]]
+
+def get_reminder_cache_statistics():
+    """This function returns a dictionary containing the counters of the reminder query
+    cache, along with its hit rate and the number of cached pages and reminders."""
+    with REMINDER_CACHE_LOCK:
+        cache_statistics = dict(REMINDER_CACHE_STATISTICS)
+        cache_statistics["cached_pages"] = len(REMINDER_CACHE)
+        cache_statistics["cached_reminders"] = CACHED_REMINDER_COUNT
+        cache_statistics["tracked_users"] = len(REMINDER_GENERATION_DICTIONARY)
+
+    lookup_count = cache_statistics["hits"] + cache_statistics["misses"]
+    cache_statistics["hit_rate"] = (cache_statistics["hits"] / lookup_count
+                                    if lookup_count > 0 else 0.0)
+    return cache_statistics
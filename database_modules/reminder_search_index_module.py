@@ -0,0 +1,74 @@
+"""This module contains the reminder search index tool, which fills the full-text search
+index (see db_scripts.ADD_REMINDER_SEARCH_TABLE) of every reminder database used by the
+current reminder storage mode. Run it from the project root directory with:
+
+    python -m database_modules.reminder_search_index_module
+
+The index is created and filled from the existing reminders by a schema migration the first
+time the server opens each reminder database; the tool does this for every database up
+front, so users' first requests after upgrading aren't slowed down by it. The index of
+databases which already have one is rebuilt (for instance, after a VACUUM, or after the
+database was restored or edited outside the server)."""
+
+import os
+from sqlite3 import Error
+import server_constants
+from database_modules import db_scripts, database_access_module, schema_migration_module
+
+def build_reminder_search_indexes(db_directory_root):
+    """This function fills the search index of every reminder database in the database
+    directory. Returns the number of databases which were indexed successfully."""
+
+    database_access_module.DB_DIRECTORY_ROOT = db_directory_root
+    indexed_db_count = 0
+
+    for reminder_db_key in database_access_module.get_reminder_db_keys():
+        if build_reminder_search_index(db_directory_root, reminder_db_key):
+            indexed_db_count += 1
+
+    print("Indexed " + str(indexed_db_count) + " reminder database(s)")
+    return indexed_db_count
+
+def build_reminder_search_index(db_directory_root, reminder_db_key):
+    """This function fills the search index of the reminder database with the specified key,
+    by migrating the database to the latest schema version (which adds and fills the index)
+    or, if it already is, rebuilding the index. Returns true if successful, false if not."""
+
+    db_connection = database_access_module.try_get_database_connection(
+        database_access_module.get_database_path(db_directory_root, reminder_db_key),
+        "reminder " + reminder_db_key)
+
+    # check if database connection was unsuccessful
+    if db_connection is None:
+        return False
+
+    try:
+        migrations = database_access_module.get_reminder_db_migrations(reminder_db_key)
+        schema_version = db_connection.execute("PRAGMA user_version").fetchone()[0]
+
+        # migrate the database (filling the index if the migration adding it is run)
+        if not schema_migration_module.run_migrations(reminder_db_key, db_connection,
+                                                      migrations):
+            return False
+
+        # rebuild the index if the database already had one
+        if schema_version >= len(migrations):
+            db_connection.execute(db_scripts.REBUILD_REMINDER_SEARCH_INDEX)
+            db_connection.commit()
+
+        print("Indexed reminder database " + reminder_db_key)
+        return True
+
+    except Error as exception:
+        db_connection.rollback()
+        # print error message
+        print("Error occurred trying to index reminder database " + reminder_db_key)
+        print(str(exception))
+        return False
+
+    finally:
+        db_connection.close()
+
+if __name__ == "__main__":
+    build_reminder_search_indexes(os.path.join(
+        server_constants.PROJECT_ROOT_DIRECTORY, server_constants.DATABASE_DIRECTORY_NAME))
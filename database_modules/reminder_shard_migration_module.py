@@ -0,0 +1,135 @@
+"""This module contains the reminder shard migration tool, which imports the reminders
+stored in user reminder databases (one database per user) into the shard databases
+used when server_constants.REMINDER_STORAGE_MODE is "sharded". Run it (while the server
+is stopped) from the project root directory with:
+
+    python -m database_modules.reminder_shard_migration_module
+
+Reminders that were already imported are skipped, so the tool can be run again if it
+is interrupted. The user reminder databases are left in place, and can be deleted once
+the import has been checked. The tool exits with an error status if the user reminder
+databases can't be found, or if any of them couldn't be imported."""
+
+import os
+import sys
+from sqlite3 import Error
+import server_constants
+from database_modules import db_scripts, database_access_module, schema_migration_module
+
+def import_user_reminder_databases(db_directory_root):
+    """This function imports the reminders of every user reminder database in the database
+    directory into the user's shard database. Returns the number of user reminder
+    databases which were imported successfully, or None if the user reminder databases
+    couldn't be found."""
+
+    # check if the database directory exists
+    if not os.path.isdir(db_directory_root):
+        print("Error - database directory " + db_directory_root + " doesn't exist!")
+        return None
+
+    database_access_module.DB_DIRECTORY_ROOT = db_directory_root
+    user_ids = database_access_module.get_user_reminder_db_user_ids()
+
+    # check if user reminder databases were written outside the database directory
+    # -older versions built database paths with Windows path separators, which on other
+    #  platforms created files beside the database directory (named
+    #  "databases\<user ID>.sqlite") instead of within it
+    if not user_ids:
+        misplaced_db_paths = get_misplaced_user_reminder_db_paths(db_directory_root)
+        if misplaced_db_paths:
+            print("Error - no user reminder databases were found in " + db_directory_root
+                  + ", but " + str(len(misplaced_db_paths)) + " were found beside it:")
+            for misplaced_db_path in misplaced_db_paths:
+                print("  " + misplaced_db_path)
+            print("Move them into the database directory (named <user ID>.sqlite) and run"
+                  " the tool again.")
+            return None
+
+    imported_db_count = 0
+    for user_id in user_ids:
+        if import_user_reminder_database(db_directory_root, user_id):
+            imported_db_count += 1
+
+    print("Imported " + str(imported_db_count) + " of " + str(len(user_ids))
+          + " user reminder database(s)")
+    return imported_db_count
+
+def get_misplaced_user_reminder_db_paths(db_directory_root):
+    """This function returns a list of the paths of user reminder databases which were
+    created beside the database directory (with the directory name and a Windows path
+    separator as a file name prefix) instead of within it."""
+    db_directory_root = os.path.abspath(db_directory_root)
+    misplaced_db_name_prefix = os.path.basename(db_directory_root) + "\\"
+    parent_directory = os.path.dirname(db_directory_root)
+
+    try:
+        file_names = os.listdir(parent_directory)
+    except OSError:
+        return []
+
+    return [os.path.join(parent_directory, file_name) for file_name in sorted(file_names)
+            if file_name.startswith(misplaced_db_name_prefix)
+            and file_name.endswith(".sqlite")]
+
+def import_user_reminder_database(db_directory_root, user_id):
+    """This function imports the reminders of the user reminder database for the user ID
+    into the user's shard database, in a single transaction. Returns true if successful,
+    false if not."""
+
+    # get the key of the user's shard database
+    shard_db_key = database_access_module.get_reminder_shard_db_key(user_id)
+
+    user_db_connection = database_access_module.try_get_database_connection(
+        database_access_module.get_database_path(db_directory_root, user_id),
+        "user " + user_id + " reminder")
+    shard_db_connection = database_access_module.try_get_database_connection(
+        database_access_module.get_database_path(db_directory_root, shard_db_key),
+        "reminder " + shard_db_key)
+
+    # check if either database connection was unsuccessful
+    if user_db_connection is None or shard_db_connection is None:
+        return False
+
+    try:
+        # migrate both databases to the latest schema version (so the user's reminders
+        # have a due_epoch column)
+        if not (schema_migration_module.run_migrations(user_id, user_db_connection,
+                    schema_migration_module.USER_REMINDER_DB_MIGRATIONS)
+                and schema_migration_module.run_migrations(shard_db_key, shard_db_connection,
+                    schema_migration_module.SHARDED_REMINDER_DB_MIGRATIONS)):
+            return False
+
+        # copy the reminders into the shard database
+        reminder_rows = user_db_connection.execute(db_scripts.GET_ALL_REMINDERS).fetchall()
+        import_cursor = shard_db_connection.executemany(db_scripts.SHARDED_IMPORT_REMINDER,
+            [[user_id] + list(reminder_row) for reminder_row in reminder_rows])
+        # -along with the reminders' tag index rows
+        tag_rows = user_db_connection.execute(db_scripts.GET_ALL_REMINDER_TAGS).fetchall()
+        shard_db_connection.executemany(db_scripts.SHARDED_INSERT_REMINDER_TAG,
+            [[user_id] + list(tag_row) for tag_row in tag_rows])
+        shard_db_connection.commit()
+
+        # (reminders which were already imported aren't counted)
+        print("Imported " + str(import_cursor.rowcount) + " reminder(s) for user " + user_id
+              + " into " + shard_db_key)
+        return True
+
+    except Error as exception:
+        shard_db_connection.rollback()
+        # print error message
+        print("Error occurred trying to import reminders for user " + user_id)
+        print(str(exception))
+        return False
+
+    finally:
+        user_db_connection.close()
+        shard_db_connection.close()
+
+if __name__ == "__main__":
+    DB_DIRECTORY_ROOT = os.path.join(server_constants.PROJECT_ROOT_DIRECTORY,
+                                     server_constants.DATABASE_DIRECTORY_NAME)
+    # exit with an error status if any user reminder database wasn't imported
+    IMPORTED_DB_COUNT = import_user_reminder_databases(DB_DIRECTORY_ROOT)
+    if (IMPORTED_DB_COUNT is None
+            or IMPORTED_DB_COUNT < len(database_access_module.get_user_reminder_db_user_ids())):
+        sys.exit(1)
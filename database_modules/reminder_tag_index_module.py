@@ -0,0 +1,58 @@
+"""This module contains functions related to the reminder tag index (the reminder_tags
+table), which stores each tag of each reminder in its own indexed row, so reminders with a
+tag can be found without reading and splitting every reminder's tag string.
+
+Tags are normalized before they are indexed or searched for: the tag string is split at
+commas, and each tag has its surrounding whitespace removed and is case-folded. Empty tags
+aren't indexed."""
+
+from database_modules import db_scripts
+
+# number of reminders read at a time when adding existing reminders to the tag index
+TAG_BACKFILL_CHUNK_SIZE = 1000
+
+def normalize_reminder_tag(reminder_tag):
+    """This function returns the normalized form of a tag (used to index and search for it)."""
+    return str(reminder_tag).strip().casefold()
+
+def split_reminder_tags(reminder_tags):
+    """This function returns a sorted list of the distinct normalized tags in a reminder's
+    tag string."""
+    return sorted({normalize_reminder_tag(reminder_tag)
+                   for reminder_tag in str(reminder_tags or "").split(",")} - {""})
+
+def create_reminder_tag_rows(reminder_id, reminder_tags, due_epoch):
+    """This function returns a list of the INSERT_REMINDER_TAG parameters for each tag in a
+    reminder's tag string."""
+    return [[reminder_tag, due_epoch, reminder_id]
+            for reminder_tag in split_reminder_tags(reminder_tags)]
+
+def backfill_reminder_tags(db_connection):
+    """This function adds the tags of every reminder in a user reminder database to its
+    tag index (run as the migration after the one which creates the reminder_tags table)."""
+    run_tag_backfill(db_connection,
+        "SELECT reminder_id, tags, due_epoch FROM reminders WHERE due_epoch IS NOT NULL",
+        db_scripts.INSERT_REMINDER_TAG, lambda reminder_row: create_reminder_tag_rows(
+            reminder_row[0], reminder_row[1], reminder_row[2]))
+
+def backfill_sharded_reminder_tags(db_connection):
+    """This function adds the tags of every reminder in a reminder shard database to its
+    tag index (run as the migration after the one which creates the reminder_tags table)."""
+    run_tag_backfill(db_connection,
+        "SELECT reminder_id, tags, due_epoch, user_id FROM reminders"
+        " WHERE due_epoch IS NOT NULL",
+        db_scripts.SHARDED_INSERT_REMINDER_TAG, lambda reminder_row: [
+            [reminder_row[3]] + tag_row for tag_row in create_reminder_tag_rows(
+                reminder_row[0], reminder_row[1], reminder_row[2])])
+
+def run_tag_backfill(db_connection, select_query, insert_query, create_tag_rows):
+    """This function reads the reminders (with select_query) TAG_BACKFILL_CHUNK_SIZE at a
+    time, and inserts the tag rows create_tag_rows returns for each of them (with
+    insert_query). The caller (the migration runner) commits the transaction."""
+    reminder_cursor = db_connection.execute(select_query)
+    while True:
+        reminder_rows = reminder_cursor.fetchmany(TAG_BACKFILL_CHUNK_SIZE)
+        if len(reminder_rows) == 0:
+            return
+        db_connection.executemany(insert_query, [tag_row for reminder_row in reminder_rows
+                                                 for tag_row in create_tag_rows(reminder_row)])
@@ -0,0 +1,168 @@
+"""This module contains the schema migration runner, which brings databases up to the
+current schema version (tracked by the database's 'PRAGMA user_version' value) and
+remembers which databases were already checked, so the initialization scripts only
+run once per database instead of on every query.
+
+Migrations are the one kind of write not performed by the database writer thread (see
+database_writer_module); they run on the thread which first accesses the database, in a
+'BEGIN IMMEDIATE' transaction. This is safe because every other write to a database from
+this process is performed after ensure_database_schema returns for it, so waits for the
+database's migration lock instead of competing for SQLite's write lock, while other server
+processes are kept out by the write lock itself (and wait for it with busy_timeout). The
+website databases are migrated before the server serves requests. Running migrations on
+the writer thread instead could deadlock (the thread waiting for it would be holding the
+pooled connection a queued write to the same database needs), and a long backfill would
+hold up every other write."""
+
+import threading
+import sqlite3
+from sqlite3 import Error
+import server_constants
+from database_modules import db_scripts, reminder_tag_index_module
+
+# lists of migrations for each kind of database. The schema version of a database is
+# the number of migrations that have been applied to it; to change a schema, append a
+# migration to the end of the list (never edit or reorder existing migrations).
+# -a migration is either an SQLite script string, or a function which takes the
+#  database connection as its only parameter.
+USER_DB_MIGRATIONS = [
+    db_scripts.USER_DB_INIT_CHECK_SCRIPT,
+    db_scripts.ADD_USER_UNIQUE_INDEXES,
+]
+
+FAILED_SIGNIN_LOG_DB_MIGRATIONS = [
+    db_scripts.INITIALIZE_FAILED_SIGNIN_LOG_DB,
+    db_scripts.ADD_FAILED_LOGIN_USERNAME_COLUMN,
+    db_scripts.INITIALIZE_LOGIN_ATTEMPTS_TABLE,
+    db_scripts.DROP_LOGIN_ATTEMPTS_TABLE,
+]
+
+SESSIONS_DB_MIGRATIONS = [
+    db_scripts.INITIALIZE_SESSIONS_DB,
+]
+
+USER_REMINDER_DB_MIGRATIONS = [
+    db_scripts.INITIALIZE_USER_REMINDER_DB,
+    db_scripts.ADD_REMINDER_DUE_EPOCH_COLUMN,
+    db_scripts.ADD_REMINDER_PAGINATION_INDEX,
+    db_scripts.ADD_REMINDER_TAGS_TABLE,
+    reminder_tag_index_module.backfill_reminder_tags,
+    db_scripts.ADD_REMINDER_SEARCH_TABLE,
+    db_scripts.ADD_REMINDER_CHANGE_COUNTER,
+    db_scripts.ADD_REMINDER_TAGS_UPDATE_TRIGGER,
+]
+
+SHARDED_REMINDER_DB_MIGRATIONS = [
+    db_scripts.INITIALIZE_SHARDED_REMINDER_DB,
+    db_scripts.ADD_SHARDED_REMINDER_PAGINATION_INDEX,
+    db_scripts.ADD_SHARDED_REMINDER_TAGS_TABLE,
+    reminder_tag_index_module.backfill_sharded_reminder_tags,
+    db_scripts.ADD_REMINDER_SEARCH_TABLE,
+    db_scripts.ADD_SHARDED_REMINDER_CHANGE_COUNTER,
+    db_scripts.ADD_REMINDER_TAGS_UPDATE_TRIGGER,
+]
+
+# dictionary which associates the names of the website databases (keys) with their
+# migration lists (values).
+WEBSITE_DB_MIGRATION_DICTIONARY = {
+    server_constants.USERS_INFO_DB_NAME: USER_DB_MIGRATIONS,
+    server_constants.LOGIN_LOG_DB_NAME: FAILED_SIGNIN_LOG_DB_MIGRATIONS,
+    server_constants.SESSIONS_DB_NAME: SESSIONS_DB_MIGRATIONS,
+}
+
+# set containing the keys of databases (database names or user IDs) which have been
+# migrated to the current schema version by this process.
+INITIALIZED_DATABASE_SET = set()
+# dictionary which associates the keys of databases being migrated (keys) with the lock
+# held while migrating them (values), so migrating one database doesn't hold up the first
+# access to other databases
+MIGRATION_LOCK_DICTIONARY = {}
+# lock guarding INITIALIZED_DATABASE_SET and MIGRATION_LOCK_DICTIONARY
+INITIALIZED_DATABASE_LOCK = threading.Lock()
+
+def ensure_database_schema(db_key, db_connection, migrations):
+    """This function migrates the database (with the key db_key) to the latest schema
+    version in the migrations list, unless it was already migrated by this process.
+    Returns true if the database schema is up to date, false if a migration failed."""
+
+    # check if database was already initialized
+    if db_key in INITIALIZED_DATABASE_SET:
+        return True
+
+    with INITIALIZED_DATABASE_LOCK:
+        # check again, in case another thread finished migrating the database meanwhile
+        if db_key in INITIALIZED_DATABASE_SET:
+            return True
+        migration_lock = MIGRATION_LOCK_DICTIONARY.setdefault(db_key, threading.Lock())
+
+    with migration_lock:
+        # check again, in case another thread migrated the database while waiting
+        if db_key in INITIALIZED_DATABASE_SET:
+            return True
+
+        # run migrations, and remember the database if they succeeded
+        if not run_migrations(db_key, db_connection, migrations):
+            return False
+
+        with INITIALIZED_DATABASE_LOCK:
+            INITIALIZED_DATABASE_SET.add(db_key)
+            # (the lock is no longer needed once the database is migrated)
+            MIGRATION_LOCK_DICTIONARY.pop(db_key, None)
+        return True
+
+def run_migrations(db_key, db_connection, migrations):
+    """This function applies each migration that hasn't been applied to the database yet
+    (based on the database's user_version), each in its own transaction. Returns true
+    if the database is at the latest schema version, false if a migration failed."""
+
+    while True:
+        try:
+            # lock the database for writing before reading the schema version, so another
+            # server process can't apply the same migration at the same time
+            db_connection.execute("BEGIN IMMEDIATE")
+            # get the current schema version of the database
+            schema_version = db_connection.execute("PRAGMA user_version").fetchone()[0]
+
+            # check if the database is at the latest schema version
+            if schema_version >= len(migrations):
+                db_connection.commit()
+                return True
+
+            # run migration and record new schema version in the same transaction
+            migration = migrations[schema_version]
+            if callable(migration):
+                migration(db_connection)
+            else:
+                for statement in split_script_statements(migration):
+                    db_connection.execute(statement)
+            db_connection.execute("PRAGMA user_version = " + str(schema_version + 1))
+            db_connection.commit()
+            print("Migrated database " + str(db_key) + " to schema version "
+                  + str(schema_version + 1))
+        except Error as exception:
+            # undo the partially applied migration
+            db_connection.rollback()
+            # print error message
+            print("Error occurred trying to migrate database " + str(db_key))
+            print(str(exception))
+            return False
+
+def split_script_statements(script):
+    """This function splits an SQLite script into its individual statements (so they can
+    be run inside a single transaction), and returns them as a list."""
+    statement_list = []
+    pending_statement = ""
+
+    for script_line in script.splitlines(keepends=True):
+        pending_statement += script_line
+        # statements are complete once they end with a semicolon (also handles
+        # trigger bodies, which contain semicolons inside BEGIN ... END)
+        if sqlite3.complete_statement(pending_statement):
+            if pending_statement.strip():
+                statement_list.append(pending_statement.strip())
+            pending_statement = ""
+
+    if pending_statement.strip():
+        statement_list.append(pending_statement.strip())
+
+    return statement_list
@@ -1,38 +1,156 @@
 """This module contains functions related to accessing/updating the user
 information database."""
 
+from collections import OrderedDict
+import threading
+import time
 import server_constants
 from database_modules import db_scripts, database_access_module
 
+# maximum number of user records kept in the user record cache; when exceeded, the
+# least recently used record is removed
+USER_RECORD_CACHE_MAX_SIZE = 1024
+# number of seconds a cached user record is used before it is read from the database
+# again (limits how long other server processes can use a stale record, since each
+# process only invalidates its own cache)
+USER_RECORD_CACHE_TTL_SECONDS = 30
 
-def does_user_exist(user_name):
-    """This function checks if a user already exists in the program database,
-    returning a boolean indicating the result."""
+# ordered dictionary which associates usernames (keys) with a list containing the
+# user's record and the time it was cached (values), ordered from least recently used
+# (first) to most recently used (last).
+USER_RECORD_CACHE = OrderedDict()
+# dictionary which associates the user IDs of cached records (keys) with the
+# usernames they're cached under (values).
+USER_RECORD_CACHE_USER_ID_DICTIONARY = {}
+# lock guarding USER_RECORD_CACHE, USER_RECORD_CACHE_USER_ID_DICTIONARY and
+# USER_RECORD_CACHE_STATISTICS
+USER_RECORD_CACHE_LOCK = threading.Lock()
+# counters used to measure the effectiveness of the cache
+USER_RECORD_CACHE_STATISTICS = {"hits": 0, "misses": 0}
 
-    # declare function variables
-    # -construct the username check script by appending the username to the script template.
 
-    # run the query, store the result (which is either None if no entry exists, or 1 if
-    # an entry exists)
-    query_data = database_access_module.perform_db_query(server_constants.USERS_INFO_DB_NAME,
-        "Does_Username_Exist_Check", db_scripts.GET_USER_RECORD_BY_USERNAME_TEMPLATE,
-                                                         [user_name]).fetchone()
+def get_user_record(user_name):
+    """This function returns the record of the user with the username specified in the
+    'user_name' parameter, from the user record cache if possible (otherwise from the user
+    information database). If no user with the username exists (or the query failed),
+    None is returned."""
 
-    # return result of check of query_data being none (indicating that username isn't taken)
-    # -function returns false if query data is none (indicating that  user doesn't exist)
-    # -function returns true if query data exists (indicating user exists)
-    return bool(query_data is not None)
+    # check if the record is cached
+    user_record = get_cached_user_record(user_name)
+    if user_record is not None:
+        return user_record
 
-def get_user_record(user_name):
-    """This function runs a query on the user information database, searching for a
-    record that contains the username specified in the 'user_name' parameter, and
-    returns it."""
+    # read the record from the database, and cache it
+    user_record = read_user_record(db_scripts.GET_USER_RECORD_BY_USERNAME_TEMPLATE, user_name)
+    if user_record is not None:
+        cache_user_record(user_record)
+    return user_record
+
+def get_user_record_by_user_id(user_id):
+    """This function returns the record of the user with the ID number specified in the
+    'user_id' parameter, from the user record cache if possible (otherwise from the user
+    information database). If no user with the ID exists (or the query failed), None is
+    returned."""
+
+    # check if the record is cached
+    with USER_RECORD_CACHE_LOCK:
+        user_name = USER_RECORD_CACHE_USER_ID_DICTIONARY.get(str(user_id))
+    if user_name is not None:
+        user_record = get_cached_user_record(user_name)
+        if user_record is not None:
+            return user_record
+    else:
+        with USER_RECORD_CACHE_LOCK:
+            USER_RECORD_CACHE_STATISTICS["misses"] += 1
+
+    # read the record from the database, and cache it
+    user_record = read_user_record(db_scripts.GET_USER_RECORD_BY_USER_ID_TEMPLATE, str(user_id))
+    if user_record is not None:
+        cache_user_record(user_record)
+    return user_record
+
+def read_user_record(query_string, query_parameter):
+    """This function runs a user record query on the user information database, and
+    returns the record found (or None if no record was found or the query failed)."""
+
+    # run the query (an indexed read, since usernames and user IDs are unique)
+    query_results = database_access_module.perform_db_query(server_constants.USERS_INFO_DB_NAME,
+        "Get user record", query_string, [query_parameter])
+
+    # check if query failed
+    if query_results is None:
+        return None
+
+    # return the record (None if no user matched)
+    return query_results[0] if query_results else None
+
+def get_cached_user_record(user_name):
+    """This function returns the cached record of the user with the username, or None
+    if the record isn't cached (or has been cached for too long)."""
+    with USER_RECORD_CACHE_LOCK:
+        # check if record is cached and hasn't expired
+        if (user_name in USER_RECORD_CACHE and USER_RECORD_CACHE[user_name][1]
+                >= time.monotonic() - USER_RECORD_CACHE_TTL_SECONDS):
+            USER_RECORD_CACHE_STATISTICS["hits"] += 1
+            # mark as most recently used
+            USER_RECORD_CACHE.move_to_end(user_name)
+            return USER_RECORD_CACHE[user_name][0]
 
-    # run the query, store the result
-    query_data = database_access_module.perform_db_query(server_constants.USERS_INFO_DB_NAME,
-        "Does Username Exist Check", db_scripts.GET_USER_RECORD_BY_USERNAME_TEMPLATE,
-                                                         [user_name]).fetchone()
-    return query_data
+        USER_RECORD_CACHE_STATISTICS["misses"] += 1
+        return None
+
+def cache_user_record(user_record):
+    """This function adds a user record to the user record cache, removing the least
+    recently used records if the cache is full."""
+    with USER_RECORD_CACHE_LOCK:
+        # user ID and username are the first two columns of the record
+        USER_RECORD_CACHE[user_record[1]] = [user_record, time.monotonic()]
+        USER_RECORD_CACHE.move_to_end(user_record[1])
+        USER_RECORD_CACHE_USER_ID_DICTIONARY[user_record[0]] = user_record[1]
+
+        # remove least recently used records until within the maximum cache size
+        while len(USER_RECORD_CACHE) > USER_RECORD_CACHE_MAX_SIZE:
+            removed_user_record = USER_RECORD_CACHE.popitem(last=False)[1][0]
+            USER_RECORD_CACHE_USER_ID_DICTIONARY.pop(removed_user_record[0], None)
+
+def invalidate_cached_user_record(user_name=None, user_id=None):
+    """This function removes the record of the user with the username or user ID (either
+    can be specified) from the user record cache, so it is read from the database the
+    next time it is needed."""
+    with USER_RECORD_CACHE_LOCK:
+        # find the username the record is cached under
+        if user_id is not None:
+            user_name = USER_RECORD_CACHE_USER_ID_DICTIONARY.get(str(user_id), user_name)
+
+        if user_name in USER_RECORD_CACHE:
+            removed_user_record = USER_RECORD_CACHE.pop(user_name)[0]
+            USER_RECORD_CACHE_USER_ID_DICTIONARY.pop(removed_user_record[0], None)
+
+def get_user_record_cache_statistics():
+    """This function returns a dictionary containing the hit and miss counters of the
+    user record cache, along with its hit rate and the number of cached records."""
+    with USER_RECORD_CACHE_LOCK:
+        cache_statistics = dict(USER_RECORD_CACHE_STATISTICS)
+        cache_statistics["cached_records"] = len(USER_RECORD_CACHE)
+
+    lookup_count = cache_statistics["hits"] + cache_statistics["misses"]
+    cache_statistics["hit_rate"] = (cache_statistics["hits"] / lookup_count
+                                    if lookup_count > 0 else 0.0)
+    return cache_statistics
+
+def create_user_record(user_id, user_name, person_name, email, password_hash):
+    """This function adds a record for a new user to the user information database.
+    Returns true if the user was added, false if not (for instance, if a user with the
+    same username already exists)."""
+    query_results = database_access_module.perform_db_query(server_constants.USERS_INFO_DB_NAME,
+        "Register_New_User", db_scripts.CREATE_USER_SCRIPT_TEMPLATE,
+        [str(user_id), str(user_name), str(person_name), str(email), str(password_hash)])
+
+    # remove any cached record for the username
+    invalidate_cached_user_record(user_name=str(user_name))
+
+    # query fails if the username is taken (violates the unique username index)
+    return bool(query_results is not None)
 
 def update_user_password_hash(user_id, new_password_hash):
     """This function updates the password hash for the user whose ID number is
@@ -40,3 +158,6 @@ def update_user_password_hash(user_id, new_password_hash):
     database_access_module.perform_db_query(server_constants.USERS_INFO_DB_NAME,
         "Update user password hash", db_scripts.UPDATE_USER_PASSWORD_HASH,
                                             [new_password_hash, user_id])
+
+    # remove the cached record (which contains the old password hash)
+    invalidate_cached_user_record(user_id=user_id)
@@ -3,14 +3,34 @@ the Flask web server, receives requests from clients, serves web pages and calls
 functions in other modules to handle back-end related tasks like database processing,
 user authentication, retrieving data and other functions."""
 
-from flask import Flask, render_template, request
+import os
+from flask import Flask, jsonify, render_template, request, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from webpage_modules import login_module, new_reminder_page_module, registration_module, \
-    update_password_module, user_homepage_module
+    update_password_module, user_homepage_module, common_password_module, \
+    login_rate_limiter_module, reminder_transfer_module, reminder_api_module, \
+    reminder_search_module
 import user_session_manager_module
-from database_modules import database_access_module
+import reminder_notification_module
+from database_modules import database_access_module, maintenance_scheduler_module, \
+    connection_pool_module, audit_log_writer_module
 import server_constants
+import wsgi_server_module
+import password_hashing_module
+
+# number of seconds between removals of expired user sessions
+SESSION_EXPIRY_SWEEP_INTERVAL_SECONDS = 300
+# number of rendered template fragments joined into each chunk of a streamed page (sending
+# every fragment separately makes streamed pages much slower to send)
+STREAMED_PAGE_BUFFER_SIZE = 100
+# name and path of the cookie containing the session token, which browsers send when opening
+# the notification stream (EventSource can't set headers); it is only sent to the stream
+# and can't be read by scripts
+NOTIFICATION_STREAM_COOKIE_NAME = "session_id"
+NOTIFICATION_STREAM_COOKIE_PATH = "/api/notifications/stream/"
 
 app = Flask(__name__)
+app.config["MAX_CONTENT_LENGTH"] = server_constants.MAX_REQUEST_SIZE_BYTES
 @app.route('/', methods=['POST', 'GET'])
 # contains the index (home page) code, which is the log in screen
 def index():
@@ -43,6 +63,11 @@ def index():
             jinja_var_dict["UserID"], jinja_var_dict["PasswordHash"],
             jinja_var_dict["Username"], jinja_var_dict["Name"], str(request.remote_addr))
 
+        # check if the session couldn't be created (hashing service is overloaded)
+        if session_token is None:
+            return render_template("index.html", jinja_variables = {"BANNER_MESSAGE":
+                "Error! The server is busy, please try again in a moment."})
+
         # remove user information from jinja variable dict (not used in HTML page)
         del jinja_var_dict["UserID"]
         del jinja_var_dict["PasswordHash"]
@@ -57,8 +82,13 @@ def index():
         jinja_var_dict["Reminder_Entries"] = {}
 
         # proceed to home page
-        return render_template("user_homepage.html",
-            jinja_variables = jinja_var_dict)
+        # -store the session token in the notification stream cookie
+        homepage_response = app.make_response(render_template("user_homepage.html",
+            jinja_variables = jinja_var_dict))
+        homepage_response.set_cookie(NOTIFICATION_STREAM_COOKIE_NAME, session_token,
+            path=NOTIFICATION_STREAM_COOKIE_PATH, secure=request.is_secure, httponly=True,
+            samesite="Strict")
+        return homepage_response
 
     # no actionable request occurred, post the original page
     return render_template("index.html", jinja_variables =
@@ -148,6 +178,8 @@ def user_homepage():
                 print(request.form['post_action'])
                 # declare variables
                 jinja_page_vars = {}
+                # -number of reminders to list per page (for the reminder filters)
+                page_size = user_homepage_module.read_page_size(request.form.get('page_size'))
 
                 # pick an action based on the post action
                 match str(request.form['post_action']):
@@ -159,9 +191,13 @@ def user_homepage():
                         login_page_jinja_variables = {}
                         login_page_jinja_variables["BANNER_MESSAGE"] = ("You're logged out."
                             " Come back soon!")
-                        # return user to homepage
-                        return render_template("index.html",
-                            jinja_variables=login_page_jinja_variables)
+                        # return user to homepage (removing the notification stream
+                        # cookie)
+                        logout_response = app.make_response(render_template("index.html",
+                            jinja_variables=login_page_jinja_variables))
+                        logout_response.delete_cookie(NOTIFICATION_STREAM_COOKIE_NAME,
+                            path=NOTIFICATION_STREAM_COOKIE_PATH)
+                        return logout_response
                     case "new_reminder":
                         # user wants to make a new reminder
                         # -load page jinja variable dictionary
@@ -182,7 +218,8 @@ def user_homepage():
                         #  timeframe.
                         jinja_page_vars["Reminder_Entries"] = (
                             user_homepage_module.get_reminders_within_time_period(
-                                post_session_id, 24, jinja_page_vars
+                                post_session_id, 24, jinja_page_vars,
+                                request.form.get('page_cursor'), page_size
                             ))
                     case "rems_within_week":
                         # -user wants reminders within the next 168 hours (1 week).
@@ -194,7 +231,8 @@ def user_homepage():
                         #  timeframe.
                         jinja_page_vars["Reminder_Entries"] = (
                            user_homepage_module.get_reminders_within_time_period(
-                               post_session_id, 168, jinja_page_vars
+                               post_session_id, 168, jinja_page_vars,
+                               request.form.get('page_cursor'), page_size
                            ))
                     case "rems_within_month":
                         # -user wants reminders within the next 731 hours (1 month).
@@ -206,7 +244,8 @@ def user_homepage():
                         #  timeframe.
                         jinja_page_vars["Reminder_Entries"] = (
                             user_homepage_module.get_reminders_within_time_period(
-                                post_session_id, 731, jinja_page_vars
+                                post_session_id, 731, jinja_page_vars,
+                                request.form.get('page_cursor'), page_size
                             ))
                     case "rems_within_year":
                         # -user wants reminders within the next 8760 hours (1 year).
@@ -218,7 +257,8 @@ def user_homepage():
                         #  timeframe.
                         jinja_page_vars["Reminder_Entries"] = (
                             user_homepage_module.get_reminders_within_time_period(
-                                post_session_id, 8760, jinja_page_vars
+                                post_session_id, 8760, jinja_page_vars,
+                                request.form.get('page_cursor'), page_size
                             ))
                     case "past_rems":
                         # -user wants past reminders (within 3 days/72 hours after current time).
@@ -230,7 +270,8 @@ def user_homepage():
                         #  timeframe.
                         jinja_page_vars["Reminder_Entries"] = (
                             user_homepage_module.get_reminders_within_time_period(
-                                post_session_id, -72, jinja_page_vars
+                                post_session_id, -72, jinja_page_vars,
+                                request.form.get('page_cursor'), page_size
                             ))
                     case "reload_page":
                         # reload page, due to redirect
@@ -242,8 +283,19 @@ def user_homepage():
                         # add entry in dictionary for reminder entries (blank)
                         jinja_page_vars["Reminder_Entries"] = {}
 
+                # -carry forward the post action and page size, used by the 'load more' button
+                #  to request the next page of the same filter
+                jinja_page_vars["REMINDER_FILTER_ACTION"] = str(request.form['post_action'])
+                jinja_page_vars["PAGE_SIZE"] = page_size
+
                 # render/return the home page by default (jinja variables set according to
                 # the post request form name)
+                # -in streamed mode, the page is sent as it's rendered (the request context is
+                #  kept while the reminder entries are read)
+                if server_constants.REMINDER_TABLE_RENDER_MODE == "streamed":
+                    return app.response_class(stream_with_context(
+                        stream_page_template("user_homepage.html",
+                            jinja_variables=jinja_page_vars)))
                 return render_template("user_homepage.html", jinja_variables=jinja_page_vars)
 
             # session ID is invalid
@@ -342,27 +394,275 @@ def reset_password():
     return render_template("index.html",
         jinja_variables=jinja_page_var_dict)
 
-def main():
-    """This function is the main entry point of the application; it establishes
-    connections to the website databases, loads information from files into the
-    program and initializes/launches the Flask server."""
-
-    print("Starting flask server")
+@app.route('/import_reminders/', methods=['POST'])
+def import_reminders():
+    """This function contains code for responding to clients uploading a CSV or JSON file
+    of reminders to import (form fields: session_id, reminder_file and, optionally,
+    file_format). Uploads larger than MAX_REQUEST_SIZE_BYTES are rejected; the uploaded
+    file is spooled (in memory, or in a temporary file) before it is imported. Returns a
+    JSON summary of the import."""
+
+    # check if the upload is too large, before it is read
+    # -uploads without a content length are limited as they are read (MAX_CONTENT_LENGTH)
+    file_size_error = {"error": "Reminder files must be at most "
+                       + str(server_constants.MAX_REQUEST_SIZE_BYTES) + " bytes."}
+    if (request.content_length or 0) > server_constants.MAX_REQUEST_SIZE_BYTES:
+        return jsonify(file_size_error), 413
+    try:
+        post_session_id = str(request.form.get('session_id'))
+        reminder_file = request.files.get('reminder_file')
+    except RequestEntityTooLarge:
+        return jsonify(file_size_error), 413
+
+    # check if user's session ID is valid (session ID is correct, and the response it
+    # arrived from came from the IP address the session was issued to)
+    if not user_session_manager_module.is_session_id_valid(post_session_id,
+        str(request.remote_addr)):
+        return jsonify({"error": "Invalid session token. Please log in again."}), 403
+
+    # check if a file of a supported format was uploaded
+    if reminder_file is None:
+        return jsonify({"error": "No reminder file was uploaded."}), 400
+    file_format = reminder_transfer_module.get_transfer_file_format(
+        request.form.get('file_format'), reminder_file.filename)
+    if file_format is None:
+        return jsonify({"error": "Reminder files must be CSV or JSON files."}), 400
+
+    # import the reminders
+    return jsonify(reminder_transfer_module.import_reminders(
+        user_session_manager_module.get_user_id_from_session_id(post_session_id),
+        reminder_file.stream, file_format))
+
+@app.route('/export_reminders/', methods=['POST'])
+def export_reminders():
+    """This function contains code for responding to clients requesting a CSV or JSON file
+    containing all of their reminders (form fields: session_id and, optionally,
+    file_format). The file is sent as it is read from the database."""
+
+    # check if user's session ID is valid
+    post_session_id = str(request.form.get('session_id'))
+    if not user_session_manager_module.is_session_id_valid(post_session_id,
+        str(request.remote_addr)):
+        return jsonify({"error": "Invalid session token. Please log in again."}), 403
+
+    # check if the file format is supported (CSV by default)
+    file_format = reminder_transfer_module.get_transfer_file_format(
+        request.form.get('file_format', "csv"), None)
+    if file_format is None:
+        return jsonify({"error": "Reminders can be exported as CSV or JSON files."}), 400
+
+    # send the file as it is written
+    return app.response_class(reminder_transfer_module.export_reminders(
+            user_session_manager_module.get_user_id_from_session_id(post_session_id),
+            file_format),
+        mimetype=reminder_transfer_module.TRANSFER_FILE_MIMETYPE_DICTIONARY[file_format],
+        headers={"Content-Disposition": "attachment; filename=reminders." + file_format})
+
+@app.route('/api/reminders/', methods=['GET'])
+def api_get_reminders_in_window():
+    """This function contains code for responding to API requests for the user's reminders
+    within a window; either a named window ('window' parameter: day, week, month, year or
+    past) or the window between two epochs ('start' and 'end' parameters). The page cursor
+    and size can be specified ('cursor' and 'page_size' parameters)."""
+    window_bounds = reminder_api_module.get_window_bounds(request.args.get('window'),
+        request.args.get('start'), request.args.get('end'))
+    if window_bounds is None:
+        return jsonify({"error": "Specify a window (day, week, month, year or past), or the"
+                        " start and end of the window (as unix epochs)."}), 400
+
+    return serve_reminder_api_request(lambda user_id:
+        reminder_api_module.get_reminders_in_window(user_id, window_bounds,
+            request.args.get('cursor'),
+            reminder_api_module.read_api_page_size(request.args.get('page_size'))),
+        window_bounds[2])
+
+@app.route('/api/reminders/by_tag/', methods=['GET'])
+def api_get_reminders_with_tag():
+    """This function contains code for responding to API requests for the user's reminders
+    with a tag ('tag' parameter). The page cursor and size can be specified ('cursor' and
+    'page_size' parameters)."""
+    reminder_tag = request.args.get('tag', "")
+    if len(reminder_tag.strip()) == 0:
+        return jsonify({"error": "Specify a tag."}), 400
+
+    return serve_reminder_api_request(lambda user_id:
+        reminder_api_module.get_reminders_with_tag(user_id, reminder_tag,
+            request.args.get('cursor'),
+            reminder_api_module.read_api_page_size(request.args.get('page_size'))))
+
+@app.route('/api/reminders/search/', methods=['GET'])
+def api_search_reminders():
+    """This function contains code for responding to API requests for the user's reminders
+    matching a full-text search ('q' parameter), best match first, each with a highlighted
+    snippet. The page cursor and size can be specified ('cursor' and 'page_size'
+    parameters)."""
+    search_text = request.args.get('q', "")
+    if reminder_search_module.create_search_query(search_text) is None:
+        return jsonify({"error": "Specify the words to search for."}), 400
+
+    return serve_reminder_api_request(lambda user_id:
+        reminder_search_module.search_reminders(user_id, search_text,
+            request.args.get('cursor'),
+            reminder_api_module.read_api_page_size(request.args.get('page_size'))))
+
+@app.route('/api/tags/autocomplete/', methods=['GET'])
+def api_get_tag_suggestions():
+    """This function contains code for responding to API requests for the user's tags which
+    start with a prefix ('prefix' parameter, all tags if not specified), most used first. The
+    number of tags can be specified ('count' parameter)."""
+    return serve_reminder_api_request(lambda user_id:
+        reminder_api_module.get_tag_suggestions(user_id, request.args.get('prefix', ""),
+            reminder_api_module.read_suggestion_count(request.args.get('count'))))
+
+def serve_reminder_api_request(get_response_dictionary, window_anchor=0):
+    """This function authenticates an API request (with the session token in its
+    'Authorization: Bearer' header), and returns '304 Not Modified' if the client's copy of
+    the response is current (only the user's reminder change counter is read); otherwise it
+    returns the response built by get_response_dictionary (called with the user's ID)."""
+
+    # check if the session token is valid (session ID is correct, and the request came from
+    # the IP address the session was issued to)
+    session_id = str(request.headers.get('Authorization', "")).removeprefix("Bearer ").strip()
+    if not user_session_manager_module.is_session_id_valid(session_id,
+        str(request.remote_addr)):
+        return jsonify({"error": "Invalid session token. Please log in again."}), 401
+    user_id = user_session_manager_module.get_user_id_from_session_id(session_id)
+
+    # check if the client's copy is current
+    # -If-Modified-Since is only used if the request has no If-None-Match header
+    response_validators = reminder_api_module.get_response_validators(user_id, window_anchor)
+    if response_validators is None:
+        return jsonify({"error": "Unable to retrieve reminders, please try again."}), 500
+    etag, last_modified = response_validators
+    if (request.if_none_match.contains(etag) if request.if_none_match
+            else request.if_modified_since is not None
+            and request.if_modified_since >= last_modified):
+        api_response = app.response_class(status=304)
+    else:
+        response_dictionary = get_response_dictionary(user_id)
+        if response_dictionary is None:
+            return jsonify({"error": "Unable to retrieve reminders, please try again."}), 500
+        api_response = jsonify(response_dictionary)
+
+    # clients must check the response is current before using their copy
+    api_response.set_etag(etag)
+    api_response.last_modified = last_modified
+    api_response.cache_control.private = True
+    api_response.cache_control.no_cache = True
+    return api_response
+
+@app.route('/api/notifications/stream/', methods=['GET'])
+def api_stream_notifications():
+    """This function contains code for responding to clients opening a stream of the user's
+    reminder notifications (as server-sent events, see reminder_notification_module). The
+    session token is read from the 'Authorization: Bearer' header or, for browsers (whose
+    EventSource can't set headers), the notification stream cookie set when logging in.
+    (Tokens aren't accepted as URL parameters, which are recorded in server logs and
+    browser history.)"""
+
+    # check if the session token is valid (session ID is correct, and the request came from
+    # the IP address the session was issued to)
+    session_id = (str(request.headers.get('Authorization', "")).removeprefix("Bearer ").strip()
+                  or str(request.cookies.get(NOTIFICATION_STREAM_COOKIE_NAME, "")))
+    if not user_session_manager_module.is_session_id_valid(session_id,
+        str(request.remote_addr)):
+        return jsonify({"error": "Invalid session token. Please log in again."}), 401
+    user_id = user_session_manager_module.get_user_id_from_session_id(session_id)
+
+    # open the stream
+    notification_queue = reminder_notification_module.open_notification_stream(user_id)
+    if notification_queue is None:
+        return jsonify({"error": "Too many notification streams are open."}), 429
+
+    return app.response_class(
+        reminder_notification_module.stream_notifications(user_id, notification_queue),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def stream_page_template(template_name, **context):
+    """This function returns a generator which renders the template (with the context) a
+    chunk at a time, for pages sent while they're being rendered. It must be run in a
+    request context (wrap it with stream_with_context)."""
+    app.update_template_context(context)
+    template_stream = app.jinja_env.get_template(template_name).stream(context)
+    template_stream.enable_buffering(STREAMED_PAGE_BUFFER_SIZE)
+    return template_stream
+
+def create_app(run_maintenance_tasks=True):
+    """This function is the app factory; it establishes connections to the website
+    databases, loads information from files into the program, starts the maintenance
+    scheduler (if run_maintenance_tasks is true) and returns the Flask app. Use this as
+    the entry point when serving the app with an external WSGI server."""
+
+    print("Initializing server process")
     # connect to databases
+    website_db_names = [server_constants.USERS_INFO_DB_NAME, server_constants.LOGIN_LOG_DB_NAME]
+    # -the sessions database is only needed if sessions are stored in SQLite
+    if server_constants.SESSION_STORE_BACKEND == "sqlite":
+        website_db_names.append(server_constants.SESSIONS_DB_NAME)
     database_access_module.connect_to_website_databases(
-        (server_constants.PROJECT_ROOT_DIRECTORY + "databases"),
-        [server_constants.USERS_INFO_DB_NAME, server_constants.LOGIN_LOG_DB_NAME])
+        os.path.join(server_constants.PROJECT_ROOT_DIRECTORY,
+                     server_constants.DATABASE_DIRECTORY_NAME), website_db_names)
+
+    # load recent failed login attempts into the login rate limiter
+    login_rate_limiter_module.load_recent_failed_logins()
+
+    # start the background thread which writes failed login attempts to the sign-in log
+    audit_log_writer_module.start_audit_log_writer()
+
+    # start the background thread which deletes expired reminders and old sign-in log entries
+    # -only one server process needs to run the maintenance tasks
+    if run_maintenance_tasks:
+        maintenance_scheduler_module.start_maintenance_scheduler()
+        # -also remove expired user sessions
+        maintenance_scheduler_module.register_maintenance_task("Remove expired sessions",
+            SESSION_EXPIRY_SWEEP_INTERVAL_SECONDS,
+            user_session_manager_module.remove_expired_sessions)
+
+    # start the background thread which sends reminder notifications
+    # -every server process sends them to its own clients, but only one prints and posts them
+    reminder_notification_module.start_notification_engine(run_maintenance_tasks)
 
     # try loading the 10,000 most common passwords
-    update_password_module.try_load_most_common_passwords(
-        server_constants.PROJECT_ROOT_DIRECTORY + "static\\CommonPassword.txt")
+    common_password_module.try_load_common_passwords(
+        os.path.join(server_constants.PROJECT_ROOT_DIRECTORY,
+                     server_constants.COMMON_PASSWORD_FILE_PATH))
 
     # initialize page jinja dictionaries
     login_module.init_jinja_var_dictionary()
     registration_module.init_jinja_var_dictionary()
     new_reminder_page_module.init_jinja_var_dictionary()
 
-    # launch the flask app
-    Flask.run(app)
+    return app
 
-main()
+def release_server_resources():
+    """This function stops the maintenance scheduler and notification engine, writes any
+    buffered failed login attempts, stops the password hashing worker processes and closes
+    all database connections (run when the server shuts down)."""
+    maintenance_scheduler_module.stop_maintenance_scheduler()
+    reminder_notification_module.stop_notification_engine()
+    audit_log_writer_module.stop_audit_log_writer()
+    password_hashing_module.stop_password_hashing_service()
+    connection_pool_module.close_all_connections()
+    database_access_module.close_website_databases()
+
+def main():
+    """This function is the main entry point of the application; it launches the web
+    server (with the number of worker processes set in server_constants), which creates
+    the app in each worker process."""
+
+    print("Starting web server")
+    # sessions stored in memory can't be shared by multiple worker processes
+    if (server_constants.SERVER_WORKER_COUNT > 1
+            and server_constants.SESSION_STORE_BACKEND != "sqlite"):
+        print("Warning! Sessions are stored in memory but the server has multiple worker"
+              " processes; set SESSION_STORE_BACKEND to 'sqlite' so all workers share"
+              " sessions.")
+
+    # launch the web server
+    wsgi_server_module.serve_app(create_app, release_server_resources,
+        server_constants.SERVER_HOST, server_constants.SERVER_PORT,
+        server_constants.SERVER_WORKER_COUNT)
+
+if __name__ == "__main__":
+    main()
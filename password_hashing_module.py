@@ -0,0 +1,134 @@
+"""This module contains the password hashing service, which runs password hashing and
+verification (sha256_crypt, which is deliberately slow) in a pool of worker processes.
+Request threads wait for the result without holding the GIL, so other requests are
+served while passwords are being hashed.
+
+The number of hashing jobs waiting or running is limited; if the limit is reached (for
+instance, during a flood of login attempts), new jobs are rejected immediately instead
+of queueing up behind the flood. Jobs which take longer than HASH_JOB_TIMEOUT_SECONDS
+are abandoned. Rejected or abandoned jobs return None, and the caller should ask the
+user to try again."""
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+from passlib.hash import sha256_crypt
+
+# number of worker processes used to hash passwords
+HASHING_WORKER_PROCESS_COUNT = max(1, min(4, (os.cpu_count() or 2) // 2))
+# maximum number of hashing jobs waiting or running at once
+MAX_PENDING_HASH_JOBS = 32
+# number of seconds a request waits for a hashing job before giving up
+HASH_JOB_TIMEOUT_SECONDS = 10
+
+# the worker process pool (created when first used), and the lock guarding its creation
+HASHING_PROCESS_POOL = None
+HASHING_PROCESS_POOL_LOCK = threading.Lock()
+# semaphore limiting the number of pending jobs (released when a job finishes, even if its
+# request stopped waiting for it)
+PENDING_HASH_JOB_SEMAPHORE = threading.BoundedSemaphore(MAX_PENDING_HASH_JOBS)
+# dictionary containing counters describing the service's activity, and the lock guarding it
+HASHING_STATISTICS = {"completed_jobs": 0, "rejected_jobs": 0, "timed_out_jobs": 0}
+HASHING_STATISTICS_LOCK = threading.Lock()
+
+def hash_password(password_string):
+    """This function returns the sha256_crypt hash of password_string (computed by a worker
+    process), or None if the service is overloaded or the job timed out."""
+    return run_hash_job(sha256_crypt.hash, password_string)
+
+def verify_password(password_string, password_hash):
+    """This function checks if password_string matches the sha256_crypt password_hash
+    (checked by a worker process), and returns a boolean indicating the result, or None if
+    the service is overloaded or the job timed out."""
+    return run_hash_job(sha256_crypt.verify, password_string, password_hash)
+
+def run_hash_job(hash_function, *hash_function_parameters):
+    """This function runs hash_function with the parameters in a worker process, waits for
+    it to finish and returns its result (or None if the job was rejected or timed out)."""
+
+    # reject the job if too many jobs are pending
+    if not PENDING_HASH_JOB_SEMAPHORE.acquire(blocking=False):
+        count_hashing_event("rejected_jobs")
+        print("Password hashing service is overloaded, rejected a hashing job")
+        return None
+
+    try:
+        hash_job_future = get_hashing_process_pool().submit(hash_function,
+            *hash_function_parameters)
+    except (BrokenProcessPool, RuntimeError) as exception:
+        # the pool is broken (a worker process died) or shut down; discard it so a new pool
+        # is created for the next job
+        PENDING_HASH_JOB_SEMAPHORE.release()
+        discard_hashing_process_pool()
+        # print error message
+        print("Error occurred trying to start a password hashing job")
+        print(str(exception))
+        return None
+
+    # free the job's slot when it finishes
+    hash_job_future.add_done_callback(lambda _future: PENDING_HASH_JOB_SEMAPHORE.release())
+
+    try:
+        hash_job_result = hash_job_future.result(timeout=HASH_JOB_TIMEOUT_SECONDS)
+    except FutureTimeoutError:
+        # stop waiting (the job is cancelled if it hasn't started yet)
+        hash_job_future.cancel()
+        count_hashing_event("timed_out_jobs")
+        print("Password hashing job timed out")
+        return None
+    except BrokenProcessPool as exception:
+        discard_hashing_process_pool()
+        # print error message
+        print("Error occurred trying to run a password hashing job")
+        print(str(exception))
+        return None
+
+    count_hashing_event("completed_jobs")
+    return hash_job_result
+
+def get_hashing_process_pool():
+    """This function returns the worker process pool, creating it if it doesn't exist."""
+    # pylint: disable=global-statement
+    global HASHING_PROCESS_POOL
+
+    with HASHING_PROCESS_POOL_LOCK:
+        if HASHING_PROCESS_POOL is None:
+            # worker processes are spawned (rather than forked) so they don't inherit the
+            # server's threads and database connections
+            HASHING_PROCESS_POOL = ProcessPoolExecutor(
+                max_workers=HASHING_WORKER_PROCESS_COUNT,
+                mp_context=multiprocessing.get_context("spawn"))
+        return HASHING_PROCESS_POOL
+
+def discard_hashing_process_pool():
+    """This function shuts down the worker process pool without waiting for its jobs."""
+    # pylint: disable=global-statement
+    global HASHING_PROCESS_POOL
+
+    with HASHING_PROCESS_POOL_LOCK:
+        if HASHING_PROCESS_POOL is not None:
+            HASHING_PROCESS_POOL.shutdown(wait=False, cancel_futures=True)
+            HASHING_PROCESS_POOL = None
+
+def stop_password_hashing_service():
+    """This function shuts down the worker process pool (run when the server shuts down),
+    waiting for running jobs to finish."""
+    # pylint: disable=global-statement
+    global HASHING_PROCESS_POOL
+
+    with HASHING_PROCESS_POOL_LOCK:
+        if HASHING_PROCESS_POOL is not None:
+            HASHING_PROCESS_POOL.shutdown(wait=True, cancel_futures=True)
+            HASHING_PROCESS_POOL = None
+
+def count_hashing_event(counter_name):
+    """This function adds one to the counter with the name in HASHING_STATISTICS."""
+    with HASHING_STATISTICS_LOCK:
+        HASHING_STATISTICS[counter_name] += 1
+
+def get_hashing_statistics():
+    """This function returns a dictionary containing the service's counters."""
+    with HASHING_STATISTICS_LOCK:
+        return dict(HASHING_STATISTICS)
@@ -2,27 +2,40 @@
 a class that defines an object which is a container for reminder-related
 information."""
 
+from bisect import bisect_right
 from dataclasses import dataclass
 from datetime import datetime
 
-@dataclass
+# colors used to indicate how close a reminder's deadline is, and the lower bound (in whole
+# hours left) of each color's bucket. Red = deadline within the next 24 hours, orange = within
+# 48 hours, yellow = within 72 hours, green = longer deadline (at least 3 days out). Deadlines
+# which have passed are light gray (#989898).
+DEADLINE_PROXIMITY_HOUR_BOUNDS = [0, 24, 48, 72]
+DEADLINE_PROXIMITY_COLORS = ["#989898", "#e3735d", "#dba723", "#d1d435", "#3bc930"]
+
+# (attributes are stored in slots rather than a per-object dictionary, which makes
+# containers much smaller; pages can list thousands of reminders)
+@dataclass(slots=True)
 class ReminderContainer:
     """This class is used to store data related to an individual reminder that a user
     creates (such as reminder title, date/time due, notes and tags)."""
-    # constructor
-    def __init__(self, reminder_datetime, reminder_title, reminder_tags, reminder_description):
-        """This function is the constructor for the ReminderContainer object."""
-        # assign variables
-        self.reminder_datetime = reminder_datetime
-        self.reminder_title = reminder_title
-        self.reminder_tags = reminder_tags
-        self.reminder_description = reminder_description
-        # color used to color the cells of the reminder row that this ReminderContainer's
-        # data is populated to. Orange = deadline within the next 24 hours, Yellow = by tomorrow
-        # within next 48 hours), green = longer deadline (at least 2 days out). Default color is
-        # light gray (#989898)
-        self.deadline_proximity_color = self.get_deadline_proximity_color_from_datetime(
-            reminder_datetime)
+    reminder_datetime: str
+    reminder_title: str
+    reminder_tags: str
+    reminder_description: str
+    # color used to color the cells of the reminder row that this ReminderContainer's
+    # data is populated to (see DEADLINE_PROXIMITY_COLORS); if None, it is computed from
+    # reminder_datetime
+    deadline_proximity_color: str = None
+    # due date as a unix epoch, and reminder ID (None if not known)
+    reminder_due_epoch: int = None
+    reminder_id: str = None
+
+    def __post_init__(self):
+        """This function computes the deadline proximity color, if it wasn't specified."""
+        if self.deadline_proximity_color is None:
+            self.deadline_proximity_color = self.get_deadline_proximity_color_from_datetime(
+                self.reminder_datetime)
 
     def get_deadline_proximity_color_from_datetime(self, reminder_datetime):
         """This function returns an RGB color as a hexadecimal string, used to visually
@@ -32,25 +45,30 @@ class ReminderContainer:
         # convert the reminder datetime to a python datetime object
         reminder_deadline = datetime.strptime(reminder_datetime, '%Y-%m-%d %H:%M:%S')
 
-        # get hours by subtracting datetime.now() from reminder_datetime_obj, getting seconds and
-        # dividing by 3600.
-        hours_left = int((reminder_deadline - datetime.now()).total_seconds() / 3600)
-
-        # return the appropriate color based on hours left
-        if 0 <= hours_left < 24:
-            # deadline imminent - color red
-            return "#e3735d"
-        if 24 <= hours_left < 48:
-            # deadline within 48 hours but greater than 24 - color orange
-            return "#dba723"
-        if 48 <= hours_left < 72:
-            # deadline within 72 hours but greater than 48 - color yellow
-            return "#d1d435"
-        if 72 <= hours_left:
-            # deadline is more than 72 hours (3 days) away - color green
-            return "#3bc930"
-
-        # return default cell color (gray) if for whatever reason none of the
-        # above situations apply (for instance, a reminder whose due date has
-        # passed)
-        return "#989898"
+        # get seconds left by subtracting datetime.now() from reminder_datetime_obj
+        return get_deadline_proximity_color((reminder_deadline - datetime.now()).total_seconds())
+
+def get_deadline_proximity_color(seconds_left):
+    """This function returns the deadline proximity color (an RGB color as a hexadecimal
+    string) for a reminder whose deadline is seconds_left seconds from the current time."""
+    # look up the bucket containing the number of whole hours left
+    return DEADLINE_PROXIMITY_COLORS[bisect_right(DEADLINE_PROXIMITY_HOUR_BOUNDS,
+                                                  int(seconds_left / 3600))]
+
+def create_reminder_row_factory(current_epoch):
+    """This function returns an sqlite row factory which populates a ReminderContainer from
+    each reminder row (reminder_id, due_date, title, tags, description, due_epoch) returned
+    by a query, with its deadline proximity color computed from the row's due date epoch
+    relative to current_epoch (so every reminder on a page is colored relative to the same
+    moment)."""
+
+    def create_reminder_container_from_row(_cursor, reminder_row):
+        """This function populates a ReminderContainer from a reminder row."""
+        return ReminderContainer(reminder_row[1], reminder_row[2], reminder_row[3],
+            reminder_row[4],
+            # -rows without a due date epoch (unparseable due date) are colored gray
+            get_deadline_proximity_color(reminder_row[5] - current_epoch)
+            if reminder_row[5] is not None else DEADLINE_PROXIMITY_COLORS[0],
+            reminder_row[5], reminder_row[0])
+
+    return create_reminder_container_from_row
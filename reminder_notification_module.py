@@ -0,0 +1,386 @@
+"""This module contains the reminder notification engine, which notifies users when their
+reminders cross the deadline proximity thresholds (the hour bounds of the home page's
+deadline colors, see reminder_container.DEADLINE_PROXIMITY_HOUR_BOUNDS); 72, 48 and 24
+hours before they are due, and when they are due.
+
+Upcoming threshold crossings are kept in a min-heap ordered by the time they happen, so the
+engine's thread sleeps until the next one (and is woken early if an earlier one is added)
+rather than polling the reminder databases. Crossings are loaded from the reminder databases
+a window of NOTIFICATION_LOAD_WINDOW_HOURS at a time (one indexed query per database, run
+halfway through the previous window), and the crossings of reminders saved after their
+window was loaded are added as they are saved (see schedule_reminder_notifications), so the
+heap only holds the next one or two windows' crossings. Crossings which happened before the
+engine started (such as while the server was stopped) aren't notified.
+
+To avoid opening every reminder database for every window, the engine keeps the earliest due
+date from the end of the last window loaded onwards of each database it reads (see
+NEXT_DUE_EPOCH_DICTIONARY). A database is only read again once that reminder is within the
+window, or once the database's files have been modified (or its reminders were saved
+through this process); otherwise checking it costs a stat of its database and WAL files.
+
+Notifications are printed, posted to server_constants.NOTIFICATION_WEBHOOK_URL (if set), and
+sent to the user's connected clients as server-sent events (see stream_notifications). Each
+server process runs its own engine, but only the primary worker prints and posts them (so
+they aren't repeated by every process). A process only adds the crossings of reminders saved
+through it; with several worker processes, clients connected to another process aren't sent
+a new reminder's crossings until they are loaded with a later window."""
+
+import heapq
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+import server_constants
+from reminder_container import DEADLINE_PROXIMITY_HOUR_BOUNDS, DEADLINE_PROXIMITY_COLORS
+from database_modules import db_scripts, database_access_module
+
+# number of hours of threshold crossings loaded from the reminder databases at a time
+NOTIFICATION_LOAD_WINDOW_HOURS = 6
+# thresholds (in hours left before a reminder is due) at which notifications are sent
+NOTIFICATION_THRESHOLD_HOURS = sorted(DEADLINE_PROXIMITY_HOUR_BOUNDS, reverse=True)
+
+# maximum number of notification streams a user can have open at once (such as one per
+# browser tab)
+MAX_NOTIFICATION_STREAMS_PER_USER = 5
+# maximum number of notifications waiting to be sent to a stream's client; when exceeded
+# (the client isn't reading them), new notifications for the stream are dropped
+NOTIFICATION_STREAM_QUEUE_SIZE = 100
+# number of seconds between the comments sent to a stream's client when there are no
+# notifications (so the connection isn't closed as idle)
+NOTIFICATION_STREAM_KEEPALIVE_SECONDS = 15
+# number of seconds the engine waits for the webhook to respond
+NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS = 2
+
+# min-heap containing the upcoming threshold crossings, each a list of the time (unix epoch)
+# of the crossing, the user ID, the reminder ID, the threshold (hours left), the reminder's
+# title and its due date epoch
+NOTIFICATION_HEAP = []
+# set containing a tuple of the user ID, reminder ID and threshold of each crossing in the
+# heap (so a crossing loaded with its window and added when its reminder was saved is only
+# notified once)
+SCHEDULED_NOTIFICATION_KEY_SET = set()
+# time (unix epoch) before which the crossings have been loaded; 0 if the engine isn't running
+LOADED_UNTIL_EPOCH = 0
+# dictionary which associates the keys of the reminder databases read by the engine (keys)
+# with a list containing the signature of the database's files when it was read (see
+# get_reminder_db_file_signature), the end of the window loaded and the earliest due date
+# epoch from then onwards (None if there were no reminders due from then onwards) (values)
+NEXT_DUE_EPOCH_DICTIONARY = {}
+# dictionary which associates user IDs (keys) with a list of the queues of their open
+# notification streams (values)
+NOTIFICATION_STREAM_DICTIONARY = {}
+# counters describing the engine's activity
+NOTIFICATION_STATISTICS = {"loaded_windows": 0, "read_databases": 0, "skipped_databases": 0,
+                           "sent_notifications": 0, "dropped_stream_notifications": 0,
+                           "webhook_errors": 0}
+# condition guarding the variables above, which the engine's thread waits on for the next
+# crossing (notified when an earlier crossing is added, or the engine is stopped)
+NOTIFICATION_CONDITION = threading.Condition()
+
+# true if this process prints notifications and posts them to the webhook (the primary worker)
+IS_NOTIFICATION_PUBLISHER = False
+# event used to signal the engine's thread (and open streams) to stop, and the engine's thread
+ENGINE_STOP_EVENT = threading.Event()
+ENGINE_THREAD = None
+
+def start_notification_engine(is_primary_worker):
+    """This function starts the engine's thread, which loads the first window of crossings
+    and sends notifications as they happen. If is_primary_worker is true, notifications are
+    also printed and posted to the webhook. Does nothing if the engine is already running."""
+    # pylint: disable=global-statement
+    global ENGINE_THREAD, IS_NOTIFICATION_PUBLISHER
+
+    # check if engine is already running
+    if ENGINE_THREAD is not None and ENGINE_THREAD.is_alive():
+        return
+
+    IS_NOTIFICATION_PUBLISHER = is_primary_worker
+    ENGINE_STOP_EVENT.clear()
+    ENGINE_THREAD = threading.Thread(target=run_notification_loop,
+        name="notification_engine", daemon=True)
+    ENGINE_THREAD.start()
+
+def stop_notification_engine():
+    """This function stops the engine's thread and closes the open notification streams,
+    and removes every scheduled crossing."""
+    # pylint: disable=global-statement
+    global LOADED_UNTIL_EPOCH
+
+    ENGINE_STOP_EVENT.set()
+    with NOTIFICATION_CONDITION:
+        NOTIFICATION_CONDITION.notify_all()
+
+    if ENGINE_THREAD is not None:
+        ENGINE_THREAD.join()
+
+    with NOTIFICATION_CONDITION:
+        NOTIFICATION_HEAP.clear()
+        SCHEDULED_NOTIFICATION_KEY_SET.clear()
+        NEXT_DUE_EPOCH_DICTIONARY.clear()
+        LOADED_UNTIL_EPOCH = 0
+
+def schedule_reminder_notifications(user_id, reminder_list):
+    """This function adds the upcoming crossings of newly saved reminders (each a list of the
+    reminder ID, title and due date epoch) of the user, within the windows already loaded
+    (later crossings are loaded with their window). Run after the reminders are saved."""
+    with NOTIFICATION_CONDITION:
+        next_crossing_epoch = NOTIFICATION_HEAP[0][0] if NOTIFICATION_HEAP else None
+        # read the user's reminder database when the next window is loaded
+        NEXT_DUE_EPOCH_DICTIONARY.pop(database_access_module.get_reminder_db_key(user_id), None)
+
+        for reminder_id, reminder_title, due_epoch in reminder_list:
+            schedule_crossings_locked(str(user_id), reminder_id, reminder_title, due_epoch,
+                time.time(), LOADED_UNTIL_EPOCH)
+
+        # wake the engine's thread if the next crossing is now earlier
+        if NOTIFICATION_HEAP and NOTIFICATION_HEAP[0][0] != next_crossing_epoch:
+            NOTIFICATION_CONDITION.notify_all()
+
+def schedule_crossings_locked(user_id, reminder_id, reminder_title, due_epoch, window_start,
+                              window_end):
+    """This function adds the crossings of a reminder which happen within the window (from
+    window_start, inclusive, to window_end, exclusive) to the heap, unless they are already
+    in it. NOTIFICATION_CONDITION must be held."""
+    if due_epoch is None:
+        return
+
+    for threshold_hours in NOTIFICATION_THRESHOLD_HOURS:
+        crossing_epoch = due_epoch - threshold_hours * 3600
+        notification_key = (user_id, reminder_id, threshold_hours)
+        if (window_start <= crossing_epoch < window_end
+                and notification_key not in SCHEDULED_NOTIFICATION_KEY_SET):
+            heapq.heappush(NOTIFICATION_HEAP, [crossing_epoch, user_id, reminder_id,
+                                               threshold_hours, reminder_title, due_epoch])
+            SCHEDULED_NOTIFICATION_KEY_SET.add(notification_key)
+
+def load_notification_window(window_start, window_end):
+    """This function adds the crossings which happen within the window (from window_start,
+    inclusive, to window_end, exclusive) to the heap, reading the reminders due within the
+    window (or up to the highest threshold after it) from every reminder database which may
+    have some (see NEXT_DUE_EPOCH_DICTIONARY)."""
+    # pylint: disable=global-statement
+    global LOADED_UNTIL_EPOCH
+
+    # reminders saved from now on have their crossings within the window added as they are
+    # saved (crossings loaded by both are only added once)
+    with NOTIFICATION_CONDITION:
+        LOADED_UNTIL_EPOCH = window_end
+
+    due_epoch_range = [window_start, window_end + max(NOTIFICATION_THRESHOLD_HOURS) * 3600]
+    reminder_db_key_list = database_access_module.get_reminder_db_keys()
+    with NOTIFICATION_CONDITION:
+        # forget the databases which no longer exist
+        for reminder_db_key in set(NEXT_DUE_EPOCH_DICTIONARY) - set(reminder_db_key_list):
+            del NEXT_DUE_EPOCH_DICTIONARY[reminder_db_key]
+
+    for reminder_db_key in reminder_db_key_list:
+        # stop loading if the engine is stopped
+        if ENGINE_STOP_EVENT.is_set():
+            return
+
+        # skip the database if it has no reminders due within the range (its files haven't
+        # changed since it was read, and its next reminder is due after the range)
+        # -the files' signature is read before the database, so changes made while it is
+        #  read are noticed next time
+        db_file_signature = get_reminder_db_file_signature(reminder_db_key)
+        with NOTIFICATION_CONDITION:
+            next_due_entry = NEXT_DUE_EPOCH_DICTIONARY.get(reminder_db_key)
+            if (next_due_entry is not None and next_due_entry[0] == db_file_signature
+                    and next_due_entry[1] <= window_start
+                    and (next_due_entry[2] is None or next_due_entry[2] >= due_epoch_range[1])):
+                NOTIFICATION_STATISTICS["skipped_databases"] += 1
+                continue
+
+        # read the reminders (connections opened only for loading aren't kept in the
+        # connection pool, so loading doesn't evict active users)
+        # -rows contain the user ID (shard databases only), reminder ID, title and due epoch
+        if server_constants.REMINDER_STORAGE_MODE == "sharded":
+            query_results = database_access_module.perform_reminder_db_query(reminder_db_key,
+                "Load upcoming reminders", db_scripts.GET_UPCOMING_SHARD_REMINDERS,
+                due_epoch_range + [window_end], keep_connection_open=False)
+        else:
+            query_results = database_access_module.perform_reminder_db_query(reminder_db_key,
+                "Load upcoming reminders", db_scripts.GET_UPCOMING_REMINDERS,
+                due_epoch_range + [window_end], keep_connection_open=False)
+            if query_results is not None:
+                query_results = [[reminder_db_key] + list(row) for row in query_results]
+
+        # check if query failed (the database is read again with the next window)
+        if query_results is None:
+            continue
+
+        with NOTIFICATION_CONDITION:
+            NOTIFICATION_STATISTICS["read_databases"] += 1
+            for row in query_results:
+                # -the row without a reminder ID contains the earliest due epoch from the end
+                #  of the window onwards
+                if row[1] is None:
+                    NEXT_DUE_EPOCH_DICTIONARY[reminder_db_key] = [db_file_signature,
+                                                                  window_end, row[3]]
+                else:
+                    schedule_crossings_locked(row[0], row[1], row[2], row[3],
+                        max(window_start, time.time()), window_end)
+
+    with NOTIFICATION_CONDITION:
+        NOTIFICATION_STATISTICS["loaded_windows"] += 1
+
+def get_reminder_db_file_signature(reminder_db_key):
+    """This function returns a tuple containing the modification time and size of the
+    reminder database's file and WAL file (None for files which don't exist), which changes
+    whenever the database is written to."""
+    db_path = database_access_module.get_database_path(
+        database_access_module.DB_DIRECTORY_ROOT, reminder_db_key)
+    db_file_signature = []
+
+    for file_path in [db_path, db_path + "-wal"]:
+        try:
+            file_stat = os.stat(file_path)
+            db_file_signature.append((file_stat.st_mtime_ns, file_stat.st_size))
+        except OSError:
+            db_file_signature.append(None)
+
+    return tuple(db_file_signature)
+
+def run_notification_loop():
+    """This function is run by the engine's thread; it loads each window of crossings
+    halfway through the previous one, and sends the notifications of crossings as they
+    happen, until the engine is stopped."""
+    load_window_seconds = NOTIFICATION_LOAD_WINDOW_HOURS * 3600
+
+    while not ENGINE_STOP_EVENT.is_set():
+        with NOTIFICATION_CONDITION:
+            current_epoch = time.time()
+            next_window_load_epoch = LOADED_UNTIL_EPOCH - load_window_seconds / 2
+
+            # take the crossings which have happened out of the heap
+            due_notification_list = []
+            while NOTIFICATION_HEAP and NOTIFICATION_HEAP[0][0] <= current_epoch:
+                due_notification = heapq.heappop(NOTIFICATION_HEAP)
+                SCHEDULED_NOTIFICATION_KEY_SET.discard(tuple(due_notification[1:4]))
+                due_notification_list.append(due_notification)
+
+            # wait until the next crossing or window load (unless either is due)
+            if len(due_notification_list) == 0 and current_epoch < next_window_load_epoch:
+                NOTIFICATION_CONDITION.wait(min(next_window_load_epoch,
+                    NOTIFICATION_HEAP[0][0] if NOTIFICATION_HEAP else next_window_load_epoch)
+                    - current_epoch)
+                continue
+
+        # try sending the notifications and loading the next window (an error shouldn't stop
+        # the engine's thread)
+        try:
+            for due_notification in due_notification_list:
+                send_notification(due_notification)
+
+            if current_epoch >= next_window_load_epoch:
+                window_start = max(LOADED_UNTIL_EPOCH, int(current_epoch))
+                load_notification_window(window_start, window_start + load_window_seconds)
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            # print error message
+            print("Error occurred in the notification engine")
+            print(str(exception))
+
+def send_notification(due_notification):
+    """This function sends the notification of a crossing (a list from the heap) to the
+    user's open notification streams and, if this process is the primary worker, prints it
+    and posts it to the webhook."""
+    threshold_hours = due_notification[3]
+    notification_dictionary = {
+        "reminder_id": due_notification[2], "title": due_notification[4],
+        "due_epoch": due_notification[5], "hours_left": threshold_hours,
+        # -the color the reminder's deadline proximity changes to at the threshold
+        "color": DEADLINE_PROXIMITY_COLORS[DEADLINE_PROXIMITY_HOUR_BOUNDS.index(threshold_hours)]}
+
+    # send the notification to the user's streams
+    with NOTIFICATION_CONDITION:
+        for notification_queue in NOTIFICATION_STREAM_DICTIONARY.get(due_notification[1], []):
+            try:
+                notification_queue.put_nowait(notification_dictionary)
+            except queue.Full:
+                NOTIFICATION_STATISTICS["dropped_stream_notifications"] += 1
+        NOTIFICATION_STATISTICS["sent_notifications"] += 1
+
+    if not IS_NOTIFICATION_PUBLISHER:
+        return
+
+    print("Reminder notification for user " + due_notification[1] + ": '"
+          + str(due_notification[4]) + "' is "
+          + ("due" if threshold_hours == 0 else "due in " + str(threshold_hours) + " hours"))
+
+    # post the notification to the webhook
+    if server_constants.NOTIFICATION_WEBHOOK_URL is not None:
+        post_webhook_notification(dict(notification_dictionary, user_id=due_notification[1]))
+
+def post_webhook_notification(notification_dictionary):
+    """This function posts a notification to server_constants.NOTIFICATION_WEBHOOK_URL as
+    JSON."""
+    webhook_request = urllib.request.Request(server_constants.NOTIFICATION_WEBHOOK_URL,
+        data=json.dumps(notification_dictionary).encode("utf-8"),
+        headers={"Content-Type": "application/json"}, method="POST")
+
+    try:
+        with urllib.request.urlopen(webhook_request,
+                                    timeout=NOTIFICATION_WEBHOOK_TIMEOUT_SECONDS):
+            pass
+    except (OSError, ValueError) as exception:
+        with NOTIFICATION_CONDITION:
+            NOTIFICATION_STATISTICS["webhook_errors"] += 1
+        # print error message
+        print("Error occurred trying to post a reminder notification to the webhook")
+        print(str(exception))
+
+def open_notification_stream(user_id):
+    """This function opens a notification stream for the user, and returns its queue (pass
+    it to stream_notifications). Returns None if the user has too many open streams."""
+    with NOTIFICATION_CONDITION:
+        stream_queue_list = NOTIFICATION_STREAM_DICTIONARY.setdefault(str(user_id), [])
+        if len(stream_queue_list) >= MAX_NOTIFICATION_STREAMS_PER_USER:
+            return None
+
+        notification_queue = queue.Queue(maxsize=NOTIFICATION_STREAM_QUEUE_SIZE)
+        stream_queue_list.append(notification_queue)
+        return notification_queue
+
+def close_notification_stream(user_id, notification_queue):
+    """This function closes one of the user's notification streams."""
+    user_id = str(user_id)
+
+    with NOTIFICATION_CONDITION:
+        stream_queue_list = NOTIFICATION_STREAM_DICTIONARY.get(user_id, [])
+        if notification_queue in stream_queue_list:
+            stream_queue_list.remove(notification_queue)
+        if len(stream_queue_list) == 0:
+            NOTIFICATION_STREAM_DICTIONARY.pop(user_id, None)
+
+def stream_notifications(user_id, notification_queue):
+    """This function is a generator which yields the user's notifications (from the queue of
+    an open notification stream) as server-sent events, until the client disconnects or the
+    engine is stopped. The stream is closed when the generator is closed."""
+    try:
+        # -tell the client to wait a few seconds before reconnecting if the stream ends
+        yield "retry: 5000\n\n"
+
+        while not ENGINE_STOP_EVENT.is_set():
+            try:
+                notification_dictionary = notification_queue.get(
+                    timeout=NOTIFICATION_STREAM_KEEPALIVE_SECONDS)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+
+            yield ("event: reminder_notification\ndata: "
+                   + json.dumps(notification_dictionary) + "\n\n")
+    finally:
+        close_notification_stream(user_id, notification_queue)
+
+def get_notification_statistics():
+    """This function returns a dictionary containing the engine's counters, the number of
+    scheduled crossings and the number of open notification streams."""
+    with NOTIFICATION_CONDITION:
+        notification_statistics = dict(NOTIFICATION_STATISTICS)
+        notification_statistics["scheduled_notifications"] = len(NOTIFICATION_HEAP)
+        notification_statistics["open_streams"] = sum(
+            len(stream_queue_list) for stream_queue_list in NOTIFICATION_STREAM_DICTIONARY.values())
+    return notification_statistics
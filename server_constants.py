@@ -1,12 +1,62 @@
 """This module contains variables used by multiple sother parts of the server."""
 
+import os
+
 USERS_INFO_DB_NAME = "users"
 LOGIN_LOG_DB_NAME = "failed_signin_log"
+SESSIONS_DB_NAME = "sessions"
+
+# how reminders are stored
+# -"per_user": in one database per user (named with the user's ID)
+# -"sharded": in REMINDER_SHARD_COUNT shard databases, each storing the reminders of the
+#  users whose user IDs hash to it. Existing per-user databases can be imported with
+#  "python -m database_modules.reminder_shard_migration_module". Search results are
+#  ranked with the word statistics of the whole shard, rather than the user's reminders.
+REMINDER_STORAGE_MODE = "per_user"
+REMINDER_SHARD_COUNT = 16
+REMINDER_SHARD_DB_NAME_PREFIX = "reminder_shard_"
+
+# where user sessions are stored
+# -"memory": in the memory of the server process (sessions can't be shared by multiple
+#  server processes)
+# -"sqlite": in the sessions database (sessions are shared by all server processes)
+SESSION_STORE_BACKEND = "memory"
+
+# how the reminder table on the user home page is rendered
+# -"streamed": the page is sent while the reminders are read from the database, a chunk at a
+#  time (the first bytes of the page are sent before the whole table is read, and only one
+#  chunk is held in memory)
+# -"buffered": the reminders are read, then the whole page is rendered before it is sent
+REMINDER_TABLE_RENDER_MODE = "streamed"
+
+# number of hours reminders are kept (and shown as expired reminders) after their due date
+EXPIRED_REMINDER_RETENTION_HOURS = 72
+
+# project's root directory (the directory containing this file). main.py,
+# reminder-container.py, server_constants.py, user_session_manager_module.py, and all
+# project folders (database_modules, databases, static, templates, and webpage_modules)
+# must be contained within it. Paths are joined with os.path.join, so the project can be
+# run on Windows and POSIX systems alike.
+PROJECT_ROOT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+# name of the directory (within PROJECT_ROOT_DIRECTORY) containing the databases
+DATABASE_DIRECTORY_NAME = "databases"
+
+# path (relative to PROJECT_ROOT_DIRECTORY) of the common password list; either a text
+# file with one password per line, or a hash file (.bin) built from one with
+# "python -m webpage_modules.common_password_module" (for lists of millions of passwords)
+COMMON_PASSWORD_FILE_PATH = os.path.join("static", "CommonPassword.txt")
+
+# address and port the web server listens on
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 5000
+# number of worker processes serving requests (each serves requests with multiple
+# threads). Multiple worker processes require SESSION_STORE_BACKEND to be "sqlite", and
+# are only supported on platforms that can fork processes (not Windows).
+SERVER_WORKER_COUNT = 1
+
+# maximum size of a request (in bytes), which limits the size of imported reminder files
+MAX_REQUEST_SIZE_BYTES = 32 * 1024 * 1024
 
-# NOTE: In order for project to work correctly, this variable must be set to the
-# project's root directory. main.py, reminder-container.py, server_constants.py,
-# user_session_manager_module.py, and all project folders (database_modules, databases,
-# static, templates, and webpage_modules) must be contained within the directory specified
-# here
-PROJECT_ROOT_DIRECTORY = ("C:\\Users\\jmicallef1\\Downloads\\UMGC\\SDEV 300 "
-"(Developing Python Applications)\\Project 6\\pythonProject\\")
+# URL reminder notifications are posted to (as JSON), such as a local service which forwards
+# them by e-mail or chat; None to only log them and send them to connected clients
+NOTIFICATION_WEBHOOK_URL = None
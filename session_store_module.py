@@ -0,0 +1,151 @@
+"""This module contains the session stores, which store the UserSessionContainer objects
+of logged in users. Sessions expire after going unused for SESSION_TTL_SECONDS (each use
+extends the session), and the least recently used sessions are removed once there are
+more than MAX_SESSION_COUNT sessions. Two stores are available: an in-memory store
+(sessions are only visible to the server process that created them) and an SQLite store
+(sessions are stored in a database file shared by all server processes).
+
+The session manager (user_session_manager_module) uses this module; this module doesn't
+import the session manager."""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import json
+import threading
+import time
+import server_constants
+from database_modules import db_scripts, database_access_module
+
+# number of seconds a session can go unused before it expires
+SESSION_TTL_SECONDS = 4 * 3600
+# maximum number of sessions stored; when exceeded, the least recently used session
+# is removed
+MAX_SESSION_COUNT = 10000
+# number of seconds between updates of a session's last access time in the SQLite store
+# (avoids a database write on every request)
+SQLITE_LAST_ACCESS_UPDATE_INTERVAL_SECONDS = 60
+
+@dataclass
+class UserSessionContainer:
+    """This class is a container for information for a particular user's session."""
+    # constructor
+    def __init__(self, user_id, user_session_token, jinja_var_dict):
+        self.user_id = user_id
+        self.user_auth_token = user_session_token
+        self.jinja_page_var_dict = jinja_var_dict
+
+class MemorySessionStore:
+    """This class stores sessions in a dictionary in the memory of the server process."""
+    # constructor
+    def __init__(self):
+        # ordered dictionary, which associates session IDs (keys) with a list containing the
+        # session's UserSessionContainer and the time it was last accessed (values), ordered
+        # from least recently used (first) to most recently used (last).
+        self.session_dictionary = OrderedDict()
+        self.session_lock = threading.Lock()
+
+    def get_session(self, session_id):
+        """This function returns the session container for the session ID (extending the
+        session), or None if the session doesn't exist or has expired."""
+        with self.session_lock:
+            # check if session ID is on file
+            if session_id not in self.session_dictionary:
+                return None
+
+            session_entry = self.session_dictionary[session_id]
+            # check if session expired
+            if session_entry[1] < time.monotonic() - SESSION_TTL_SECONDS:
+                del self.session_dictionary[session_id]
+                return None
+
+            # extend the session and mark it as most recently used
+            session_entry[1] = time.monotonic()
+            self.session_dictionary.move_to_end(session_id)
+            return session_entry[0]
+
+    def add_session(self, session_id, session_container):
+        """This function stores a session container under the session ID, removing the
+        least recently used sessions if the store is full."""
+        with self.session_lock:
+            self.session_dictionary[session_id] = [session_container, time.monotonic()]
+            self.session_dictionary.move_to_end(session_id)
+
+            # remove least recently used sessions until within the maximum session count
+            while len(self.session_dictionary) > MAX_SESSION_COUNT:
+                self.session_dictionary.popitem(last=False)
+
+    def remove_session(self, session_id):
+        """This function removes the session with the session ID, if it exists."""
+        with self.session_lock:
+            self.session_dictionary.pop(session_id, None)
+
+    def remove_expired_sessions(self):
+        """This function removes all sessions which have expired."""
+        expiry_cutoff_time = time.monotonic() - SESSION_TTL_SECONDS
+
+        with self.session_lock:
+            # sessions are ordered by last access, so stop at the first one that is active
+            for session_id in list(self.session_dictionary):
+                if self.session_dictionary[session_id][1] >= expiry_cutoff_time:
+                    break
+                del self.session_dictionary[session_id]
+
+class SQLiteSessionStore:
+    """This class stores sessions in the sessions database, so that sessions can be
+    shared by multiple server processes."""
+
+    def get_session(self, session_id):
+        """This function returns the session container for the session ID (extending the
+        session), or None if the session doesn't exist or has expired."""
+        current_epoch = int(time.time())
+
+        query_results = database_access_module.perform_db_query(
+            server_constants.SESSIONS_DB_NAME, "Get session", db_scripts.GET_SESSION,
+            [str(session_id), current_epoch - SESSION_TTL_SECONDS])
+
+        # check if the query failed or the session doesn't exist/has expired
+        session_record = query_results[0] if query_results else None
+        if session_record is None:
+            return None
+
+        # extend the session (at most once per update interval)
+        if session_record[3] < current_epoch - SQLITE_LAST_ACCESS_UPDATE_INTERVAL_SECONDS:
+            database_access_module.perform_db_query(server_constants.SESSIONS_DB_NAME,
+                "Update session last access time", db_scripts.UPDATE_SESSION_LAST_ACCESS,
+                [current_epoch, str(session_id)])
+
+        # populate a session container from the record
+        return UserSessionContainer(session_record[0], session_record[1],
+            json.loads(session_record[2]))
+
+    def add_session(self, session_id, session_container):
+        """This function stores a session container under the session ID, removing the
+        least recently used sessions if the store is full."""
+        database_access_module.perform_db_query(server_constants.SESSIONS_DB_NAME,
+            "Add session", db_scripts.INSERT_SESSION,
+            [str(session_id), str(session_container.user_id),
+             str(session_container.user_auth_token),
+             json.dumps(session_container.jinja_page_var_dict), int(time.time())])
+
+        # remove least recently used sessions beyond the maximum session count
+        database_access_module.perform_db_query(server_constants.SESSIONS_DB_NAME,
+            "Remove least recently used sessions", db_scripts.DELETE_LEAST_RECENT_SESSIONS,
+            [MAX_SESSION_COUNT])
+
+    def remove_session(self, session_id):
+        """This function removes the session with the session ID, if it exists."""
+        database_access_module.perform_db_query(server_constants.SESSIONS_DB_NAME,
+            "Remove session", db_scripts.DELETE_SESSION, [str(session_id)])
+
+    def remove_expired_sessions(self):
+        """This function removes all sessions which have expired."""
+        database_access_module.perform_db_query(server_constants.SESSIONS_DB_NAME,
+            "Remove expired sessions", db_scripts.DELETE_EXPIRED_SESSIONS,
+            [int(time.time()) - SESSION_TTL_SECONDS])
+
+def create_session_store(session_store_backend):
+    """This function returns a new session store for the backend name ("memory" or
+    "sqlite")."""
+    if session_store_backend == "sqlite":
+        return SQLiteSessionStore()
+    return MemorySessionStore()
@@ -0,0 +1,143 @@
+"""This module contains tests for the reminder database connection pool, run against real
+SQLite databases in a temporary database directory."""
+
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from database_modules import database_access_module, connection_pool_module
+
+# directory containing main.py and server_constants.py
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# script run in a separate server process; creates the app in a temporary project root
+# directory, opens a pooled reminder database connection, releases the server's resources
+# and prints the number of open pooled and website database connections
+RELEASE_RESOURCES_SCRIPT = """
+import os
+import shutil
+import sys
+import server_constants
+shutil.copytree(os.path.join(server_constants.PROJECT_ROOT_DIRECTORY, "static"),
+                os.path.join(sys.argv[1], "static"))
+server_constants.PROJECT_ROOT_DIRECTORY = sys.argv[1]
+import main
+from database_modules import database_access_module, connection_pool_module
+main.create_app(False)
+database_access_module.perform_reminder_db_query("pool_test", "Read reminders",
+    "SELECT COUNT(*) FROM reminders;", [])
+open_connection_count = connection_pool_module.get_pool_statistics()["open_connections"]
+main.release_server_resources()
+print("Open connections:", open_connection_count,
+      connection_pool_module.get_pool_statistics()["open_connections"],
+      len(database_access_module.DATABASE_CONNECTION_DICTIONARY))
+"""
+
+class ConnectionPoolTest(unittest.TestCase):
+    """This class tests checking out, evicting and closing pooled connections."""
+
+    def setUp(self):
+        """This function empties the pool, resets its counters and creates a temporary
+        database directory."""
+        connection_pool_module.close_all_connections()
+        for counter_name in connection_pool_module.POOL_STATISTICS:
+            connection_pool_module.POOL_STATISTICS[counter_name] = 0
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_max_open_connections = connection_pool_module.MAX_OPEN_CONNECTIONS
+
+    def tearDown(self):
+        """This function closes the pooled connections, restores the pool's size and
+        removes the temporary database directory."""
+        connection_pool_module.close_all_connections()
+        connection_pool_module.MAX_OPEN_CONNECTIONS = self.previous_max_open_connections
+        self.db_directory.cleanup()
+
+    def checkout(self, pool_key):
+        """This function returns a context manager which checks out the pooled connection
+        for the pool key (a database in the temporary database directory)."""
+        return connection_pool_module.checkout_connection(pool_key,
+            database_access_module.get_database_path(self.db_directory.name, pool_key),
+            pool_key)
+
+    def test_connections_are_reused(self):
+        """This function checks that a database's connection is opened once, and reused by
+        later checkouts."""
+        with self.checkout("first") as first_connection:
+            first_connection.execute("CREATE TABLE numbers(number INTEGER)")
+        with self.checkout("first") as second_connection:
+            self.assertIs(second_connection, first_connection)
+
+        pool_statistics = connection_pool_module.get_pool_statistics()
+        self.assertEqual([pool_statistics["misses"], pool_statistics["hits"],
+                          pool_statistics["open_connections"]], [1, 1, 1])
+
+    def test_least_recently_used_connection_is_evicted(self):
+        """This function checks that the least recently used connection is closed when the
+        pool is full."""
+        connection_pool_module.MAX_OPEN_CONNECTIONS = 2
+        for pool_key in ["first", "second", "first", "third"]:
+            with self.checkout(pool_key):
+                pass
+
+        self.assertEqual(list(connection_pool_module.POOLED_CONNECTION_DICTIONARY),
+                         ["first", "third"])
+
+    def test_busy_connections_are_not_waited_for(self):
+        """This function checks that a connection in use isn't evicted while another one can
+        be, and that other checkouts don't wait for a connection evicted while in use."""
+        connection_pool_module.MAX_OPEN_CONNECTIONS = 1
+        query_started_event = threading.Event()
+        query_finished_event = threading.Event()
+
+        def run_long_query():
+            with self.checkout("busy"):
+                query_started_event.set()
+                query_finished_event.wait(10)
+
+        long_query_thread = threading.Thread(target=run_long_query)
+        long_query_thread.start()
+        query_started_event.wait(10)
+        busy_pooled_connection = connection_pool_module.POOLED_CONNECTION_DICTIONARY["busy"]
+
+        # -the only connection is busy, so it is evicted, but it is closed once its query
+        #  finishes (without holding up this checkout)
+        checkout_start_time = time.monotonic()
+        with self.checkout("other"):
+            pass
+        checkout_seconds = time.monotonic() - checkout_start_time
+        query_finished_event.set()
+        long_query_thread.join()
+
+        self.assertLess(checkout_seconds, 5)
+        self.assertTrue(busy_pooled_connection.is_closed)
+        self.assertEqual(list(connection_pool_module.POOLED_CONNECTION_DICTIONARY),
+                         ["other"])
+
+    def test_idle_connections_are_closed(self):
+        """This function checks that connections unused for longer than the idle timeout are
+        closed."""
+        with self.checkout("idle"):
+            pass
+        connection_pool_module.POOLED_CONNECTION_DICTIONARY["idle"].last_used_time -= (
+            connection_pool_module.IDLE_TIMEOUT_SECONDS + 1)
+        with self.checkout("active"):
+            pass
+
+        connection_pool_module.close_idle_connections()
+
+        self.assertEqual(list(connection_pool_module.POOLED_CONNECTION_DICTIONARY),
+                         ["active"])
+
+    def test_releasing_server_resources_closes_connections(self):
+        """This function checks that releasing the server's resources (when the server shuts
+        down) closes the pooled and website database connections."""
+        with tempfile.TemporaryDirectory() as project_root_directory:
+            release_result = subprocess.run([sys.executable, "-c", RELEASE_RESOURCES_SCRIPT,
+                                             project_root_directory],
+                                            cwd=PROJECT_DIRECTORY, check=True,
+                                            capture_output=True, text=True, timeout=60)
+
+        self.assertIn("Open connections: 1 0 0", release_result.stdout)
@@ -0,0 +1,117 @@
+"""This module contains tests for the login rate limiter, seeded from real user information
+and failed sign-in log databases in a temporary database directory."""
+
+import datetime
+import tempfile
+import threading
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, schema_migration_module
+from database_modules import user_database_module
+from webpage_modules import login_rate_limiter_module
+
+class LoginRateLimiterTest(unittest.TestCase):
+    """This class tests counting failed login attempts in the sliding windows."""
+
+    def setUp(self):
+        """This function empties the sliding windows and connects to new user information and
+        failed sign-in log databases in a temporary database directory."""
+        with login_rate_limiter_module.RATE_LIMITER_LOCK:
+            login_rate_limiter_module.FAILED_LOGIN_IP_WINDOW_DICTIONARY.clear()
+            login_rate_limiter_module.FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY.clear()
+            login_rate_limiter_module.RESERVED_LOGIN_ATTEMPT_DICTIONARY.clear()
+        # (users are read from the new database, not an earlier test's cached records)
+        with user_database_module.USER_RECORD_CACHE_LOCK:
+            user_database_module.USER_RECORD_CACHE.clear()
+            user_database_module.USER_RECORD_CACHE_USER_ID_DICTIONARY.clear()
+
+        self.db_directory = tempfile.TemporaryDirectory()
+        db_names = [server_constants.USERS_INFO_DB_NAME, server_constants.LOGIN_LOG_DB_NAME]
+        # (the new databases must be migrated, even if an earlier test's databases were)
+        for db_name in db_names:
+            schema_migration_module.INITIALIZED_DATABASE_SET.discard(db_name)
+        database_access_module.connect_to_website_databases(self.db_directory.name, db_names)
+
+    def tearDown(self):
+        """This function closes the databases and removes the temporary database
+        directory."""
+        database_access_module.close_website_databases()
+        self.db_directory.cleanup()
+
+    def test_concurrent_attempts_are_limited(self):
+        """This function checks that no more than the maximum number of concurrent attempts
+        for a username are allowed."""
+        attempt_id_list = []
+
+        def reserve_attempt(attempt_index):
+            attempt_id_list.append(login_rate_limiter_module.reserve_login_attempt(
+                "10.0.0." + str(attempt_index), "alice"))
+
+        reserve_thread_list = [threading.Thread(target=reserve_attempt, args=(attempt_index,))
+                               for attempt_index in range(32)]
+        for reserve_thread in reserve_thread_list:
+            reserve_thread.start()
+        for reserve_thread in reserve_thread_list:
+            reserve_thread.join()
+
+        self.assertEqual(len([attempt_id for attempt_id in attempt_id_list
+                              if attempt_id is not None]),
+                         login_rate_limiter_module.MAX_FAILED_LOGINS_PER_USERNAME)
+
+    def test_cancelled_attempts_are_not_counted(self):
+        """This function checks that cancelled (successful) attempts don't count towards the
+        limits."""
+        for _ in range(login_rate_limiter_module.MAX_FAILED_LOGINS_PER_IP):
+            login_rate_limiter_module.cancel_login_attempt(
+                login_rate_limiter_module.reserve_login_attempt("10.0.0.1", "alice"))
+
+        self.assertIsNotNone(login_rate_limiter_module.reserve_login_attempt("10.0.0.1",
+                                                                             "alice"))
+        self.assertEqual(len(login_rate_limiter_module.FAILED_LOGIN_IP_WINDOW_DICTIONARY[
+            "10.0.0.1"]), 1)
+
+    def test_unknown_username_attempts_are_only_counted_for_ip_address(self):
+        """This function checks that attempts for usernames which don't exist only count
+        towards the IP address's limit."""
+        for attempt_index in range(login_rate_limiter_module.MAX_FAILED_LOGINS_PER_USERNAME):
+            login_rate_limiter_module.record_unknown_username_attempt(
+                login_rate_limiter_module.reserve_login_attempt(
+                    "10.0.0." + str(attempt_index), "nobody"))
+
+        self.assertIsNotNone(login_rate_limiter_module.reserve_login_attempt("10.0.0.100",
+                                                                             "nobody"))
+        self.assertEqual(login_rate_limiter_module.get_rate_limiter_statistics()[
+            "tracked_usernames"], 1)
+
+    def test_limits_are_seeded_from_failed_sign_in_log(self):
+        """This function checks that recent failures recorded in the failed sign-in log
+        count towards the limits (failures for usernames which don't exist only towards the
+        IP address's limit), and that older failures don't."""
+        self.assertTrue(user_database_module.create_user_record(str(uuid.uuid4()), "alice",
+            "Alice", "alice@example.com", "password_hash"))
+        recent_datetime = str(datetime.datetime.now() - datetime.timedelta(seconds=60))
+        old_datetime = str(datetime.datetime.now() - datetime.timedelta(
+            seconds=login_rate_limiter_module.FAILED_LOGIN_WINDOW_SECONDS + 60))
+        failed_login_list = (
+            [[recent_datetime, "10.0.0." + str(attempt_index), "alice"] for attempt_index
+             in range(login_rate_limiter_module.MAX_FAILED_LOGINS_PER_USERNAME)]
+            + [[recent_datetime, "10.0.1.1", "nobody"] for _
+               in range(login_rate_limiter_module.MAX_FAILED_LOGINS_PER_IP)]
+            + [[old_datetime, "10.0.2.1", "bob"] for _
+               in range(login_rate_limiter_module.MAX_FAILED_LOGINS_PER_IP)])
+        self.assertIsNotNone(database_access_module.perform_db_batch_query(
+            server_constants.LOGIN_LOG_DB_NAME, "Record failed logins",
+            db_scripts.RECORD_LOGIN_ATTEMPT,
+            [[str(uuid.uuid4())] + failed_login for failed_login in failed_login_list]))
+
+        login_rate_limiter_module.load_recent_failed_logins()
+
+        self.assertIsNone(login_rate_limiter_module.reserve_login_attempt("10.0.3.1",
+                                                                          "alice"))
+        self.assertIsNone(login_rate_limiter_module.reserve_login_attempt("10.0.1.1",
+                                                                          "carol"))
+        self.assertIsNotNone(login_rate_limiter_module.reserve_login_attempt("10.0.3.1",
+                                                                             "nobody"))
+        self.assertIsNotNone(login_rate_limiter_module.reserve_login_attempt("10.0.2.1",
+                                                                             "bob"))
@@ -0,0 +1,121 @@
+"""This module contains tests for the maintenance scheduler's expired reminder and old
+sign-in log entry sweeps, run against real databases in a temporary database directory."""
+
+import datetime
+import os
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    maintenance_scheduler_module, schema_migration_module
+
+class ExpiredReminderSweepTest(unittest.TestCase):
+    """This class tests that the sweep finds the user reminder databases in the database
+    directory and deletes their expired reminders."""
+
+    def setUp(self):
+        """This function points the database access module at an empty temporary database
+        directory, storing reminders in one database per user."""
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+        server_constants.REMINDER_STORAGE_MODE = "per_user"
+        maintenance_scheduler_module.PENDING_SWEEP_DB_KEY_QUEUE.clear()
+
+    def tearDown(self):
+        """This function closes the reminder database connections and removes the
+        temporary database directory."""
+        connection_pool_module.close_all_connections()
+        maintenance_scheduler_module.PENDING_SWEEP_DB_KEY_QUEUE.clear()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        self.db_directory.cleanup()
+
+    def add_reminder(self, user_id, due_epoch):
+        """This function saves a reminder due at due_epoch for the user, and returns its
+        ID."""
+        reminder_id = str(uuid.uuid4())
+        self.assertIsNotNone(database_access_module.perform_user_reminder_db_batch_query(
+            user_id, "Add reminder", db_scripts.INSERT_NEW_REMINDER,
+            [[reminder_id, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(due_epoch)),
+              "Reminder", "", "", due_epoch]]))
+        return reminder_id
+
+    def get_reminder_ids(self, user_id):
+        """This function returns a set of the IDs of the user's reminders."""
+        return {row[0] for row in database_access_module.perform_user_reminder_db_query(
+            user_id, "Get reminders", db_scripts.GET_REMINDER_EXPORT_CHUNK,
+            [-(2 ** 63), "", 1000])}
+
+    def test_user_reminder_databases_are_found(self):
+        """The user reminder databases are created in the database directory, and listed by
+        get_user_reminder_db_user_ids."""
+        user_id = str(uuid.uuid4())
+        self.add_reminder(user_id, int(time.time()) + 3600)
+
+        self.assertTrue(os.path.isfile(os.path.join(self.db_directory.name,
+                                                    user_id + ".sqlite")))
+        self.assertEqual(database_access_module.get_user_reminder_db_user_ids(), [user_id])
+
+    def test_sweep_deletes_expired_reminders(self):
+        """The sweep deletes the reminders which expired more than
+        EXPIRED_REMINDER_RETENTION_HOURS ago, and keeps every other reminder."""
+        current_epoch = int(time.time())
+        expired_epoch = (current_epoch
+                         - (server_constants.EXPIRED_REMINDER_RETENTION_HOURS + 1) * 3600)
+        first_user_id = str(uuid.uuid4())
+        second_user_id = str(uuid.uuid4())
+        self.add_reminder(first_user_id, expired_epoch)
+        upcoming_reminder_id = self.add_reminder(first_user_id, current_epoch + 3600)
+        past_reminder_id = self.add_reminder(first_user_id, current_epoch - 3600)
+        second_reminder_id = self.add_reminder(second_user_id, current_epoch + 3600)
+
+        maintenance_scheduler_module.sweep_expired_reminders()
+
+        self.assertEqual(self.get_reminder_ids(first_user_id),
+                         {upcoming_reminder_id, past_reminder_id})
+        self.assertEqual(self.get_reminder_ids(second_user_id), {second_reminder_id})
+
+class OldSigninEntrySweepTest(unittest.TestCase):
+    """This class tests deleting old entries from the failed sign-in log."""
+
+    def setUp(self):
+        """This function connects to a new failed sign-in log database in a temporary
+        database directory."""
+        self.db_directory = tempfile.TemporaryDirectory()
+        # (the new database must be migrated, even if an earlier test's database was)
+        schema_migration_module.INITIALIZED_DATABASE_SET.discard(
+            server_constants.LOGIN_LOG_DB_NAME)
+        database_access_module.connect_to_website_databases(self.db_directory.name,
+            [server_constants.LOGIN_LOG_DB_NAME])
+
+    def tearDown(self):
+        """This function closes the database and removes the temporary database
+        directory."""
+        database_access_module.close_website_databases()
+        self.db_directory.cleanup()
+
+    def test_entries_older_than_retention_period_are_deleted(self):
+        """The sweep deletes the entries older than SIGNIN_LOG_RETENTION_DAYS, and keeps the
+        newer ones."""
+        current_datetime = datetime.datetime.now()
+        database_access_module.perform_db_batch_query(server_constants.LOGIN_LOG_DB_NAME,
+            "Record failed login attempts", db_scripts.RECORD_LOGIN_ATTEMPT,
+            [["old", str(current_datetime - datetime.timedelta(
+                days=maintenance_scheduler_module.SIGNIN_LOG_RETENTION_DAYS, hours=1)),
+              "10.0.0.1", "alice"],
+             ["recent", str(current_datetime - datetime.timedelta(
+                days=maintenance_scheduler_module.SIGNIN_LOG_RETENTION_DAYS, hours=-1)),
+              "10.0.0.1", "alice"]])
+
+        maintenance_scheduler_module.delete_old_signin_entries()
+
+        self.assertEqual(database_access_module.perform_db_query(
+            server_constants.LOGIN_LOG_DB_NAME, "Get failed login attempts",
+            "SELECT event_id FROM failed_logins;", None), [("recent",)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""This module contains tests for the reminder API's response validators, run against real
+reminder databases in a temporary database directory."""
+
+import sqlite3
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    schema_migration_module
+from webpage_modules import reminder_api_module
+
+class ResponseValidatorTest(unittest.TestCase):
+    """This class tests that response validators change whenever a user's reminders are
+    written to, including by other server processes, with one database per user and with
+    shard databases."""
+
+    def setUp(self):
+        """This function points the database access module at a temporary database
+        directory."""
+        # (the new reminder databases must be migrated, even if an earlier test's databases
+        # with the same keys were)
+        schema_migration_module.INITIALIZED_DATABASE_SET.clear()
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+
+    def tearDown(self):
+        """This function closes the reminder database connections and removes the temporary
+        database directory."""
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        self.db_directory.cleanup()
+
+    def connect_as_other_process(self, user_id):
+        """This function returns a new connection to the user's reminder database (not the
+        pooled one, like another server process's)."""
+        db_connection = sqlite3.connect(database_access_module.get_database_path(
+            self.db_directory.name, database_access_module.get_reminder_db_key(user_id)))
+        self.addCleanup(db_connection.close)
+        return db_connection
+
+    def test_validators_change_on_writes(self):
+        """This function checks that the ETag changes when the user's reminders are inserted,
+        updated or deleted by another connection, and stays the same otherwise."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                reminder_id = str(uuid.uuid4())
+                reminder_row = [reminder_id, "2030-01-02 03:04:05", "Dentist", "", "",
+                                int(time.time()) + 3600]
+                if storage_mode == "sharded":
+                    reminder_row = [user_id] + reminder_row
+                etag_list = [reminder_api_module.get_response_validators(user_id)[0]]
+                self.assertEqual(reminder_api_module.get_response_validators(user_id)[0],
+                                 etag_list[0])
+
+                db_connection = self.connect_as_other_process(user_id)
+                for query_string, query_parameters in [
+                        [db_scripts.SHARDED_INSERT_NEW_REMINDER if storage_mode == "sharded"
+                         else db_scripts.INSERT_NEW_REMINDER, reminder_row],
+                        ["UPDATE reminders SET title = 'Doctor' WHERE reminder_id = ?",
+                         [reminder_id]],
+                        ["DELETE FROM reminders WHERE reminder_id = ?", [reminder_id]]]:
+                    with db_connection:
+                        db_connection.execute(query_string, query_parameters)
+                    etag_list.append(reminder_api_module.get_response_validators(user_id)[0])
+
+                self.assertEqual(len(set(etag_list)), 4)
+
+    def test_other_users_writes_do_not_change_validators(self):
+        """This function checks that writes to another user's reminders in the same shard
+        database don't change a user's validators, and that a named window's validators
+        change with its anchor."""
+        server_constants.REMINDER_STORAGE_MODE = "sharded"
+        user_id = str(uuid.uuid4())
+        other_user_id = next(other_user_id for other_user_id
+                             in (str(uuid.uuid4()) for _ in range(10000))
+                             if database_access_module.get_reminder_db_key(other_user_id)
+                             == database_access_module.get_reminder_db_key(user_id))
+        response_validators = reminder_api_module.get_response_validators(user_id, 60)
+
+        self.assertIsNotNone(database_access_module.perform_user_reminder_db_query(
+            other_user_id, "Add reminder", db_scripts.INSERT_NEW_REMINDER,
+            [str(uuid.uuid4()), "2030-01-02 03:04:05", "Dentist", "", "",
+             int(time.time()) + 3600]))
+
+        self.assertEqual(reminder_api_module.get_response_validators(user_id, 60),
+                         response_validators)
+        self.assertNotEqual(reminder_api_module.get_response_validators(user_id, 120)[0],
+                            response_validators[0])
@@ -0,0 +1,102 @@
+"""This module contains tests for the reminder notification engine's loading of notification
+windows, run against real user reminder databases in a temporary database directory."""
+
+import sqlite3
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+import reminder_notification_module
+from database_modules import db_scripts, database_access_module, connection_pool_module
+
+# length of a notification window (in seconds)
+WINDOW_SECONDS = reminder_notification_module.NOTIFICATION_LOAD_WINDOW_HOURS * 3600
+
+class NotificationWindowLoadTest(unittest.TestCase):
+    """This class tests which reminder databases are read when a notification window is
+    loaded."""
+
+    def setUp(self):
+        """This function points the database access module at an empty database directory,
+        storing reminders in one database per user, and adds a user whose only reminder is
+        due 100 hours from now."""
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+        server_constants.REMINDER_STORAGE_MODE = "per_user"
+        reset_notification_engine()
+
+        self.window_start = int(time.time())
+        self.user_id = str(uuid.uuid4())
+        add_reminder(self.user_id, self.window_start + 100 * 3600)
+        connection_pool_module.close_all_connections()
+
+    def tearDown(self):
+        """This function closes the reminder database connections and removes the temporary
+        database directory."""
+        reset_notification_engine()
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        self.db_directory.cleanup()
+
+    def load_window(self, window_index):
+        """This function loads the notification window with the index (counted from the
+        window starting now)."""
+        window_start = self.window_start + window_index * WINDOW_SECONDS
+        reminder_notification_module.load_notification_window(window_start,
+                                                              window_start + WINDOW_SECONDS)
+
+    def test_databases_without_upcoming_reminders_are_skipped(self):
+        """This function checks that an unchanged database isn't read again until its next
+        reminder is due within the loaded range."""
+        self.load_window(0)
+        self.load_window(1)
+
+        notification_statistics = reminder_notification_module.get_notification_statistics()
+        self.assertEqual(notification_statistics["read_databases"], 1)
+        self.assertEqual(notification_statistics["skipped_databases"], 1)
+
+    def test_modified_databases_are_read_again(self):
+        """This function checks that a database written to since it was read (such as by
+        another server process) is read again."""
+        self.load_window(0)
+        db_path = database_access_module.get_database_path(self.db_directory.name,
+                                                           self.user_id)
+        with sqlite3.connect(db_path) as db_connection:
+            db_connection.execute("UPDATE reminders SET title = 'Changed'")
+        db_connection.close()
+        self.load_window(1)
+
+        self.assertEqual(reminder_notification_module.get_notification_statistics()[
+            "read_databases"], 2)
+
+    def test_saved_reminders_cause_databases_to_be_read_again(self):
+        """This function checks that a database is read again after a reminder is saved to
+        it through this process."""
+        self.load_window(0)
+        reminder_notification_module.schedule_reminder_notifications(self.user_id, [])
+        self.load_window(1)
+
+        self.assertEqual(reminder_notification_module.get_notification_statistics()[
+            "read_databases"], 2)
+
+def add_reminder(user_id, due_epoch):
+    """This function adds a reminder due at the epoch to the user's reminder database."""
+    database_access_module.perform_user_reminder_db_batch_query(user_id, "Add reminder",
+        db_scripts.INSERT_NEW_REMINDER,
+        [[str(uuid.uuid4()), time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(due_epoch)),
+          "Reminder", "", "", due_epoch]])
+
+def reset_notification_engine():
+    """This function removes the scheduled crossings and database index of the (stopped)
+    notification engine, and resets its counters."""
+    with reminder_notification_module.NOTIFICATION_CONDITION:
+        reminder_notification_module.NOTIFICATION_HEAP.clear()
+        reminder_notification_module.SCHEDULED_NOTIFICATION_KEY_SET.clear()
+        reminder_notification_module.NEXT_DUE_EPOCH_DICTIONARY.clear()
+        reminder_notification_module.LOADED_UNTIL_EPOCH = 0
+        for counter_name in reminder_notification_module.NOTIFICATION_STATISTICS:
+            reminder_notification_module.NOTIFICATION_STATISTICS[counter_name] = 0
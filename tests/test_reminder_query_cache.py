@@ -0,0 +1,36 @@
+"""This module contains tests for the reminder query cache's reminder generations."""
+
+import unittest
+from database_modules import reminder_query_cache_module
+
+class ReminderGenerationTest(unittest.TestCase):
+    """This class tests that the reminder generations kept by the cache are bounded, and
+    that a user's generation never returns to an earlier value."""
+
+    def setUp(self):
+        """This function limits the number of users whose generation is kept."""
+        self.previous_max_users = reminder_query_cache_module.REMINDER_GENERATION_MAX_USERS
+        reminder_query_cache_module.REMINDER_GENERATION_MAX_USERS = 2
+
+    def tearDown(self):
+        """This function restores the limit and clears the kept generations."""
+        reminder_query_cache_module.REMINDER_GENERATION_MAX_USERS = self.previous_max_users
+        reminder_query_cache_module.REMINDER_GENERATION_DICTIONARY.clear()
+
+    def test_removed_user_generation_changes(self):
+        """This function checks that the least recently written user's generation (and
+        cached pages) are removed when the limit is exceeded, and that their generation
+        doesn't return to an earlier value."""
+        reminder_query_cache_module.invalidate_user_reminders("user_1")
+        user_1_generation = reminder_query_cache_module.get_reminder_generation("user_1")
+        reminder_query_cache_module.cache_reminder_page("user_1", "page", user_1_generation,
+                                                        ["reminder"], 1)
+
+        reminder_query_cache_module.invalidate_user_reminders("user_2")
+        reminder_query_cache_module.invalidate_user_reminders("user_3")
+
+        self.assertEqual(len(reminder_query_cache_module.REMINDER_GENERATION_DICTIONARY), 2)
+        self.assertIsNone(reminder_query_cache_module.get_cached_reminder_page("user_1",
+                                                                               "page"))
+        self.assertGreater(reminder_query_cache_module.get_reminder_generation("user_1"),
+                           user_1_generation)
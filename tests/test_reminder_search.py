@@ -0,0 +1,163 @@
+"""This module contains tests for the reminder full-text search, run against real reminder
+databases in a temporary database directory."""
+
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    schema_migration_module
+from webpage_modules import reminder_search_module
+
+class SearchQueryTest(unittest.TestCase):
+    """This class tests creating FTS5 queries and snippet HTML."""
+
+    def test_search_words_are_quoted(self):
+        """This function checks that each word of the search text is quoted, so quotes, FTS5
+        operators and syntax characters are searched for as text, and that the last word
+        matches words it is the start of."""
+        for search_text, search_query in [
+                ["dentist", '"dentist"*'],
+                ['say "hi" OR NOT bye', '"say" "hi" "OR" "NOT" "bye"*'],
+                ["title:dentist AND (x* - y) NEAR(a b)",
+                 '"title" "dentist" "AND" "x" "y" "NEAR" "a" "b"*'],
+                ['"unterminated', '"unterminated"*'],
+                ["Café  crème", '"Café" "crème"*']]:
+            with self.subTest(search_text=search_text):
+                self.assertEqual(reminder_search_module.create_search_query(search_text),
+                                 search_query)
+
+    def test_search_text_without_words(self):
+        """This function checks that search text without words (such as only quotes and
+        operator characters) creates no query."""
+        for search_text in ["", "   ", '"" * - ()', "^:+"]:
+            with self.subTest(search_text=search_text):
+                self.assertIsNone(reminder_search_module.create_search_query(search_text))
+
+    def test_search_words_are_limited(self):
+        """This function checks that only the first MAX_SEARCH_WORD_COUNT words are
+        searched for."""
+        search_query = reminder_search_module.create_search_query(" ".join(
+            "word" + str(word_index) for word_index
+            in range(reminder_search_module.MAX_SEARCH_WORD_COUNT + 5)))
+
+        self.assertEqual(search_query.count('"'),
+                         2 * reminder_search_module.MAX_SEARCH_WORD_COUNT)
+        self.assertTrue(search_query.endswith('"word'
+            + str(reminder_search_module.MAX_SEARCH_WORD_COUNT - 1) + '"*'))
+
+    def test_snippet_html_is_escaped(self):
+        """This function checks that snippet text is escaped, that matched words are marked,
+        and that marker characters from the reminder's own text don't unbalance the
+        marks."""
+        for snippet, snippet_html in [
+                ["<script>alert(1)</script> \x02dentist\x03",
+                 "&lt;script&gt;alert(1)&lt;/script&gt; <mark>dentist</mark>"],
+                ["a & \"b\" \x02'c'\x03", "a &amp; &quot;b&quot; <mark>&#x27;c&#x27;</mark>"],
+                ["\x03a \x02\x02b\x03\x03 \x02c", "a <mark>b</mark> <mark>c</mark>"],
+                [None, ""]]:
+            with self.subTest(snippet=snippet):
+                self.assertEqual(reminder_search_module.create_snippet_html(snippet),
+                                 snippet_html)
+
+class ReminderSearchTest(unittest.TestCase):
+    """This class tests searching for reminders, with one database per user and with shard
+    databases."""
+
+    def setUp(self):
+        """This function points the database access module at a temporary database
+        directory."""
+        # (the new reminder databases must be migrated, even if an earlier test's databases
+        # with the same keys were)
+        schema_migration_module.INITIALIZED_DATABASE_SET.clear()
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        self.previous_max_result_count = reminder_search_module.MAX_SEARCH_RESULT_COUNT
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+
+    def tearDown(self):
+        """This function closes the reminder database connections, restores the maximum
+        number of results and removes the temporary database directory."""
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        reminder_search_module.MAX_SEARCH_RESULT_COUNT = self.previous_max_result_count
+        self.db_directory.cleanup()
+
+    def add_reminders(self, user_id, reminder_title_list):
+        """This function adds a reminder for the user with each title in
+        reminder_title_list, and returns the reminders' IDs."""
+        reminder_id_list = [str(uuid.uuid4()) for _ in reminder_title_list]
+        due_epoch = int(time.time()) + 3600
+        self.assertIsNotNone(database_access_module.perform_user_reminder_db_batch_query(
+            user_id, "Add reminders", db_scripts.INSERT_NEW_REMINDER,
+            [[reminder_id, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(due_epoch)),
+              reminder_title, "", "", due_epoch]
+             for reminder_id, reminder_title in zip(reminder_id_list, reminder_title_list)]))
+        return reminder_id_list
+
+    def test_search_text_with_fts_syntax(self):
+        """This function checks that search text containing quotes and FTS5 operators finds
+        the reminders containing its words (instead of failing or being read as a query),
+        and that snippets of titles containing HTML are escaped."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                reminder_id_list = self.add_reminders(user_id, [
+                    "<script>alert(1)</script> Dentist", "Cats OR dogs", "Buy milk"])
+
+                search_response = reminder_search_module.search_reminders(user_id,
+                    "dent", None, 10)
+                self.assertEqual([reminder_row[0] for reminder_row
+                                  in search_response["reminders"]], reminder_id_list[:1])
+                self.assertEqual(search_response["reminders"][0][-1],
+                    "&lt;script&gt;alert(1)&lt;/script&gt; <mark>Dentist</mark>")
+
+                # (every word must be found, including operator names)
+                for search_text, matching_reminder_id_list in [
+                        ['"cats OR', reminder_id_list[1:2]],
+                        ["cats -dogs*", reminder_id_list[1:2]],
+                        ["cats OR NOT", []], ["NEAR(cats dogs)", []], ["tags: cats", []]]:
+                    search_response = reminder_search_module.search_reminders(user_id,
+                        search_text, None, 10)
+                    self.assertEqual([reminder_row[0] for reminder_row
+                                      in search_response["reminders"]],
+                                     matching_reminder_id_list)
+
+                self.assertIsNone(reminder_search_module.search_reminders(user_id, '"*"',
+                                                                          None, 10))
+
+    def test_results_are_capped(self):
+        """This function checks that paging through the matches stops after
+        MAX_SEARCH_RESULT_COUNT matches, and that invalid cursors show the first page."""
+        reminder_search_module.MAX_SEARCH_RESULT_COUNT = 5
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                reminder_id_set = set(self.add_reminders(user_id,
+                    ["Meeting " + str(reminder_index) for reminder_index in range(8)]))
+
+                first_page = reminder_search_module.search_reminders(user_id, "meeting",
+                                                                     None, 3)
+                second_page = reminder_search_module.search_reminders(user_id, "meeting",
+                    first_page["next_cursor"], 3)
+                last_page = reminder_search_module.search_reminders(user_id, "meeting",
+                                                                    "5", 3)
+
+                self.assertEqual(first_page["next_cursor"], "3")
+                self.assertEqual(len(second_page["reminders"]), 2)
+                self.assertIsNone(second_page["next_cursor"])
+                paged_reminder_id_list = [reminder_row[0] for reminder_row
+                    in first_page["reminders"] + second_page["reminders"]]
+                self.assertEqual(len(set(paged_reminder_id_list)), 5)
+                self.assertTrue(set(paged_reminder_id_list) <= reminder_id_set)
+                self.assertEqual(last_page["reminders"], [])
+                self.assertIsNone(last_page["next_cursor"])
+
+                for page_cursor in ["-3", "garbage"]:
+                    self.assertEqual(reminder_search_module.search_reminders(user_id,
+                        "meeting", page_cursor, 3), first_page)
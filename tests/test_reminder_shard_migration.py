@@ -0,0 +1,67 @@
+"""This module contains tests for the reminder shard migration tool, run against real
+user reminder databases in a temporary database directory."""
+
+import os
+import sqlite3
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    reminder_shard_migration_module
+
+class ReminderShardMigrationTest(unittest.TestCase):
+    """This class tests importing user reminder databases into the shard databases."""
+
+    def setUp(self):
+        """This function points the database access module at an empty database directory
+        (within a temporary directory), storing reminders in one database per user."""
+        self.temporary_directory = tempfile.TemporaryDirectory()
+        self.db_directory_root = os.path.join(self.temporary_directory.name, "databases")
+        os.mkdir(self.db_directory_root)
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = "per_user"
+
+    def tearDown(self):
+        """This function closes the reminder database connections and removes the
+        temporary directory."""
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        self.temporary_directory.cleanup()
+
+    def test_user_reminders_are_imported(self):
+        """This function checks that a user's reminders are copied into their shard
+        database."""
+        user_id = str(uuid.uuid4())
+        due_epoch = int(time.time()) + 3600
+        self.assertIsNotNone(database_access_module.perform_user_reminder_db_batch_query(
+            user_id, "Add reminder", db_scripts.INSERT_NEW_REMINDER,
+            [[str(uuid.uuid4()), time.strftime("%Y-%m-%d %H:%M:%S",
+              time.localtime(due_epoch)), "Reminder", "", "", due_epoch]]))
+        connection_pool_module.close_all_connections()
+
+        self.assertEqual(reminder_shard_migration_module.import_user_reminder_databases(
+            self.db_directory_root), 1)
+
+        shard_db_key = database_access_module.get_reminder_shard_db_key(user_id)
+        with sqlite3.connect(database_access_module.get_database_path(
+                self.db_directory_root, shard_db_key)) as shard_db_connection:
+            self.assertEqual(shard_db_connection.execute(
+                "SELECT COUNT(*) FROM reminders WHERE user_id = ?", [user_id]).fetchone()[0],
+                1)
+
+    def test_misplaced_user_reminder_databases_fail_import(self):
+        """This function checks that the import fails when the user reminder databases were
+        created beside the database directory instead of within it."""
+        misplaced_db_path = os.path.join(self.temporary_directory.name,
+                                         "databases\\" + str(uuid.uuid4()) + ".sqlite")
+        sqlite3.connect(misplaced_db_path).close()
+
+        self.assertIsNone(reminder_shard_migration_module.import_user_reminder_databases(
+            self.db_directory_root))
+        self.assertEqual(reminder_shard_migration_module.get_misplaced_user_reminder_db_paths(
+            self.db_directory_root), [misplaced_db_path])
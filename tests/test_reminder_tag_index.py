@@ -0,0 +1,169 @@
+"""This module contains tests for the reminder tag index and the reminder API's tag lookups,
+run against real reminder databases in a temporary database directory."""
+
+import sqlite3
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    reminder_tag_index_module, schema_migration_module
+from webpage_modules import reminder_api_module
+
+class ReminderTagIndexTest(unittest.TestCase):
+    """This class tests that the tag index follows the reminders it indexes, and that tags are
+    looked up and suggested case-insensitively, with one database per user and with shard
+    databases."""
+
+    def setUp(self):
+        """This function points the database access module at a temporary database
+        directory."""
+        # (the new reminder databases must be migrated, even if an earlier test's databases
+        # with the same keys were)
+        schema_migration_module.INITIALIZED_DATABASE_SET.clear()
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+
+    def tearDown(self):
+        """This function closes the reminder database connections and removes the temporary
+        database directory."""
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        self.db_directory.cleanup()
+
+    def add_reminder(self, user_id, reminder_tags, due_epoch):
+        """This function adds a reminder with the tags and its tag index rows for the user
+        (like the new reminder page does), and returns the reminder's ID."""
+        reminder_id = str(uuid.uuid4())
+        self.assertIsNotNone(database_access_module.perform_user_reminder_db_batch_queries(
+            user_id, "Add reminder", [
+                [db_scripts.INSERT_NEW_REMINDER,
+                 [[reminder_id, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(due_epoch)),
+                   "Reminder", reminder_tags, "", due_epoch]]],
+                [db_scripts.INSERT_REMINDER_TAG,
+                 reminder_tag_index_module.create_reminder_tag_rows(reminder_id,
+                    reminder_tags, due_epoch)]]))
+        return reminder_id
+
+    def connect_to_reminder_db(self, user_id):
+        """This function returns a new connection to the user's reminder database."""
+        db_connection = sqlite3.connect(database_access_module.get_database_path(
+            self.db_directory.name, database_access_module.get_reminder_db_key(user_id)))
+        self.addCleanup(db_connection.close)
+        return db_connection
+
+    def get_tag_rows(self, db_connection, reminder_id):
+        """This function returns a sorted list of the tags and due date epochs in the tag
+        index rows of the reminder."""
+        return db_connection.execute("SELECT tag, due_epoch FROM reminder_tags"
+            " WHERE reminder_id = ? ORDER BY tag;", [reminder_id]).fetchall()
+
+    def test_tag_rows_follow_reminder_writes(self):
+        """This function checks that a reminder's tag index rows are added with it, replaced
+        when its tags or due date epoch are updated, kept when its other fields are updated,
+        and removed when it is deleted."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                due_epoch = int(time.time()) + 3600
+                reminder_id = self.add_reminder(user_id, " Work, home ,WORK,", due_epoch)
+                other_reminder_id = self.add_reminder(user_id, "Work", due_epoch)
+                db_connection = self.connect_to_reminder_db(user_id)
+
+                self.assertEqual(self.get_tag_rows(db_connection, reminder_id),
+                                 [("home", due_epoch), ("work", due_epoch)])
+
+                # update the tags and due date epoch, and add the new tag index rows
+                with db_connection:
+                    db_connection.execute("UPDATE reminders SET tags = 'Gym', due_epoch = ?"
+                        " WHERE reminder_id = ?;", [due_epoch + 60, reminder_id])
+                    db_connection.execute(db_scripts.SHARDED_INSERT_REMINDER_TAG
+                        if storage_mode == "sharded" else db_scripts.INSERT_REMINDER_TAG,
+                        ([user_id] if storage_mode == "sharded" else [])
+                        + ["gym", due_epoch + 60, reminder_id])
+                self.assertEqual(self.get_tag_rows(db_connection, reminder_id),
+                                 [("gym", due_epoch + 60)])
+
+                with db_connection:
+                    db_connection.execute("UPDATE reminders SET title = 'Dentist'"
+                        " WHERE reminder_id = ?;", [reminder_id])
+                self.assertEqual(self.get_tag_rows(db_connection, reminder_id),
+                                 [("gym", due_epoch + 60)])
+
+                # update the tags without adding new tag index rows (no stale rows are kept)
+                with db_connection:
+                    db_connection.execute("UPDATE reminders SET tags = 'Swim'"
+                        " WHERE reminder_id = ?;", [reminder_id])
+                self.assertEqual(self.get_tag_rows(db_connection, reminder_id), [])
+
+                with db_connection:
+                    db_connection.execute("DELETE FROM reminders WHERE reminder_id = ?;",
+                                          [other_reminder_id])
+                self.assertEqual(self.get_tag_rows(db_connection, other_reminder_id), [])
+
+    def test_tag_lookup_is_case_insensitive(self):
+        """This function checks that the reminders with a tag are found whatever the case and
+        surrounding whitespace of the tag (in the reminders and the lookup), in order of due
+        date, and that tags which only contain the tag aren't matched."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                due_epoch = int(time.time()) + 3600
+                later_reminder_id = self.add_reminder(user_id, "work , Home", due_epoch + 60)
+                reminder_id = self.add_reminder(user_id, "WORK", due_epoch)
+                self.add_reminder(user_id, "Homework, works", due_epoch)
+
+                for reminder_tag in ["work", "  WORK ", "Work"]:
+                    reminder_response = reminder_api_module.get_reminders_with_tag(user_id,
+                        reminder_tag, None, 10)
+                    self.assertEqual([reminder_row[0] for reminder_row
+                                      in reminder_response["reminders"]],
+                                     [reminder_id, later_reminder_id])
+                    self.assertIsNone(reminder_response["next_cursor"])
+
+                first_page = reminder_api_module.get_reminders_with_tag(user_id, "WORK", None, 1)
+                self.assertEqual(reminder_api_module.get_reminders_with_tag(user_id, "work",
+                    first_page["next_cursor"], 1)["reminders"][0][0], later_reminder_id)
+
+    def test_tag_suggestions_start_with_prefix(self):
+        """This function checks that the tag suggestions are the user's tags starting with
+        the prefix (compared case-insensitively), most used first, limited to the number of
+        suggestions requested."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                due_epoch = int(time.time()) + 3600
+                for reminder_tags in ["Work", "work, Workout", "wORLD, Home", "Homework"]:
+                    self.add_reminder(user_id, reminder_tags, due_epoch)
+                # (another user, in the same shard database if reminders are sharded; their
+                # tags aren't suggested)
+                other_user_id = next(other_user_id for other_user_id
+                                     in (str(uuid.uuid4()) for _ in range(10000))
+                                     if storage_mode == "per_user"
+                                     or database_access_module.get_reminder_db_key(
+                                         other_user_id)
+                                     == database_access_module.get_reminder_db_key(user_id))
+                self.add_reminder(other_user_id, "Wonder", due_epoch)
+
+                self.assertEqual(reminder_api_module.get_tag_suggestions(user_id, " WO", 10),
+                                 {"fields": ["tag", "reminder_count"],
+                                  "tags": [["work", 2], ["workout", 1], ["world", 1]]})
+                self.assertEqual(reminder_api_module.get_tag_suggestions(user_id, "wo", 1)
+                                 ["tags"], [["work", 2]])
+                self.assertEqual(reminder_api_module.get_tag_suggestions(user_id, "", 10)
+                                 ["tags"], [["work", 2], ["home", 1], ["homework", 1],
+                                            ["workout", 1], ["world", 1]])
+                self.assertEqual(reminder_api_module.get_tag_suggestions(user_id, "x", 10)
+                                 ["tags"], [])
+
+                # (the suggestions follow new reminders)
+                self.add_reminder(user_id, "Workout", due_epoch)
+                self.assertEqual(reminder_api_module.get_tag_suggestions(user_id, "WORKO", 10)
+                                 ["tags"], [["workout", 2]])
@@ -0,0 +1,180 @@
+"""This module contains tests for importing and exporting reminders, run against real
+reminder databases in a temporary database directory."""
+
+import csv
+from datetime import datetime, timedelta
+import io
+import json
+import tempfile
+import unittest
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    schema_migration_module
+from webpage_modules import reminder_transfer_module
+
+class ReminderTransferTest(unittest.TestCase):
+    """This class tests importing and exporting CSV and JSON files."""
+
+    def setUp(self):
+        """This function points the database access module at a temporary database
+        directory."""
+        # (the new reminder databases must be migrated, even if an earlier test's databases
+        # with the same keys were)
+        schema_migration_module.INITIALIZED_DATABASE_SET.clear()
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        self.previous_chunk_sizes = [reminder_transfer_module.IMPORT_CHUNK_SIZE,
+                                     reminder_transfer_module.EXPORT_CHUNK_SIZE,
+                                     reminder_transfer_module.JSON_READ_CHUNK_SIZE]
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+
+    def tearDown(self):
+        """This function closes the reminder database connections, restores the chunk sizes
+        and removes the temporary database directory."""
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        [reminder_transfer_module.IMPORT_CHUNK_SIZE, reminder_transfer_module.EXPORT_CHUNK_SIZE,
+         reminder_transfer_module.JSON_READ_CHUNK_SIZE] = self.previous_chunk_sizes
+        self.db_directory.cleanup()
+
+    def create_reminder_records(self, record_count):
+        """This function returns a list of valid reminder records (due over the coming hours,
+        with characters which need quoting in CSV and escaping in JSON)."""
+        first_due_datetime = datetime.now().replace(second=0, microsecond=0)
+        return [{"reminder_datetime": str(first_due_datetime
+                                          + timedelta(hours=record_index + 1)),
+                 "reminder_title": "Reminder " + str(record_index) + ", \"quoted\"",
+                 "reminder_tags": "Tag " + str(record_index % 3),
+                 "reminder_description": "Line one\nLine two, café"}
+                for record_index in range(record_count)]
+
+    def create_file_text(self, reminder_record_list, file_format):
+        """This function returns the text of a CSV file or JSON array file containing the
+        reminder records."""
+        if file_format == "csv":
+            return reminder_transfer_module.create_csv_lines(
+                [reminder_transfer_module.REMINDER_TRANSFER_FIELDS]
+                + [[reminder_record[field_name] for field_name
+                    in reminder_transfer_module.REMINDER_TRANSFER_FIELDS]
+                   for reminder_record in reminder_record_list])
+        return json.dumps(reminder_record_list, indent=1)
+
+    def import_file(self, user_id, file_text, file_format):
+        """This function imports a file's text, and returns the import summary."""
+        return reminder_transfer_module.import_reminders(user_id,
+            io.BytesIO(file_text.encode("utf-8")), file_format)
+
+    def read_export(self, user_id, file_format):
+        """This function exports the user's reminders, and returns the exported records."""
+        export_text = "".join(reminder_transfer_module.export_reminders(user_id, file_format))
+        if file_format == "csv":
+            return list(csv.DictReader(io.StringIO(export_text, newline="")))
+        return json.loads(export_text)
+
+    def test_reminders_round_trip(self):
+        """This function checks that the reminders exported are the reminders imported (in
+        order of due date) when files are read, inserted and exported in several chunks,
+        with one database per user and with shard databases."""
+        reminder_transfer_module.IMPORT_CHUNK_SIZE = 4
+        reminder_transfer_module.EXPORT_CHUNK_SIZE = 3
+        reminder_transfer_module.JSON_READ_CHUNK_SIZE = 7
+        reminder_record_list = self.create_reminder_records(10)
+
+        for storage_mode in ["per_user", "sharded"]:
+            server_constants.REMINDER_STORAGE_MODE = storage_mode
+            for file_format in ["csv", "json"]:
+                with self.subTest(storage_mode=storage_mode, file_format=file_format):
+                    user_id = str(uuid.uuid4())
+                    import_summary = self.import_file(user_id,
+                        self.create_file_text(reminder_record_list, file_format), file_format)
+
+                    self.assertEqual(import_summary, {"imported_reminders": 10,
+                        "rejected_reminders": 0, "rejected_records": [], "error": None})
+                    self.assertEqual(self.read_export(user_id, file_format),
+                                     reminder_record_list)
+
+    def test_json_records_are_read_across_chunks(self):
+        """This function checks that JSON arrays and JSON lines files are read record by
+        record for every read chunk size, including records split between chunks."""
+        reminder_record_list = self.create_reminder_records(5)
+        for file_text in [json.dumps(reminder_record_list),
+                          "\n".join(json.dumps(reminder_record)
+                                    for reminder_record in reminder_record_list) + "\n"]:
+            for chunk_size in [1, 2, 3, 50, 65536]:
+                with self.subTest(chunk_size=chunk_size, is_array=file_text.startswith("[")):
+                    reminder_transfer_module.JSON_READ_CHUNK_SIZE = chunk_size
+                    self.assertEqual(list(reminder_transfer_module.read_json_reminder_records(
+                        io.StringIO(file_text))), reminder_record_list)
+
+    def test_invalid_json_stops_import(self):
+        """This function checks that the records before invalid JSON are imported, and that
+        the import summary describes the error."""
+        reminder_transfer_module.JSON_READ_CHUNK_SIZE = 16
+        user_id = str(uuid.uuid4())
+        file_text = self.create_file_text(self.create_reminder_records(2), "json")[:-1]
+
+        import_summary = self.import_file(user_id, file_text + ", {\"reminder_title\": ]",
+                                          "json")
+
+        self.assertEqual(import_summary["imported_reminders"], 2)
+        self.assertTrue(import_summary["error"].startswith("Unable to read the file"))
+
+    def test_invalid_records_are_rejected(self):
+        """This function checks that invalid records are rejected (and described in the
+        import summary), and that the valid records are imported."""
+        valid_record = self.create_reminder_records(1)[0]
+        expired_datetime = datetime.now() - timedelta(
+            hours=server_constants.EXPIRED_REMINDER_RETENTION_HOURS + 1)
+        reminder_record_list = [valid_record, "not a record",
+                                dict(valid_record, reminder_datetime=""),
+                                dict(valid_record, reminder_datetime="tomorrow"),
+                                dict(valid_record, reminder_datetime=str(expired_datetime)),
+                                dict(valid_record, reminder_title=""),
+                                dict(valid_record, reminder_description="x" * 2000)]
+        user_id = str(uuid.uuid4())
+
+        import_summary = self.import_file(user_id, json.dumps(reminder_record_list), "json")
+
+        self.assertEqual(import_summary["imported_reminders"], 1)
+        self.assertEqual(import_summary["rejected_reminders"], 6)
+        self.assertEqual(import_summary["rejected_records"], [
+            "Record 2: not a reminder record.", "Record 3: the reminder date is missing.",
+            "Record 4: the reminder date is invalid.",
+            "Record 5: the reminder expired more than "
+            + str(server_constants.EXPIRED_REMINDER_RETENTION_HOURS) + " hours ago.",
+            "Record 6: the title is missing, too short or too long.",
+            "Record 7: the description is too long."])
+        self.assertIsNone(import_summary["error"])
+        self.assertEqual(self.read_export(user_id, "json"), [valid_record])
+
+    def test_reminders_without_due_epoch_are_exported_first(self):
+        """This function checks that reminders without a due date epoch (whose due date
+        couldn't be read) are exported, before the other reminders, and are rejected if
+        the file is imported again."""
+        reminder_transfer_module.EXPORT_CHUNK_SIZE = 2
+        reminder_record_list = self.create_reminder_records(3)
+        for storage_mode in ["per_user", "sharded"]:
+            server_constants.REMINDER_STORAGE_MODE = storage_mode
+            with self.subTest(storage_mode=storage_mode):
+                user_id = str(uuid.uuid4())
+                self.import_file(user_id, self.create_file_text(reminder_record_list, "csv"),
+                                 "csv")
+                unreadable_record_list = [{"reminder_datetime": "someday " + str(record_index),
+                    "reminder_title": "Unreadable", "reminder_tags": "",
+                    "reminder_description": ""} for record_index in range(3)]
+                self.assertIsNotNone(database_access_module.perform_user_reminder_db_batch_query(
+                    user_id, "Add reminders without due epoch", db_scripts.INSERT_NEW_REMINDER,
+                    [[str(uuid.uuid4()), unreadable_record["reminder_datetime"], "Unreadable",
+                      "", "", None] for unreadable_record in unreadable_record_list]))
+
+                exported_record_list = self.read_export(user_id, "json")
+
+                self.assertEqual(sorted(exported_record_list[:3],
+                                        key=lambda record: record["reminder_datetime"]),
+                                 unreadable_record_list)
+                self.assertEqual(exported_record_list[3:], reminder_record_list)
+                self.assertEqual(self.import_file(str(uuid.uuid4()),
+                    json.dumps(exported_record_list), "json")["rejected_reminders"], 3)
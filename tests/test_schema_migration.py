@@ -0,0 +1,107 @@
+"""This module contains tests for the schema migration runner, run against real SQLite
+databases in a temporary database directory."""
+
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+import uuid
+from database_modules import db_scripts, database_access_module, schema_migration_module
+
+class SchemaMigrationTest(unittest.TestCase):
+    """This class tests migrating databases to the latest schema version."""
+
+    def setUp(self):
+        """This function creates a temporary database directory."""
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.db_connection_list = []
+
+    def tearDown(self):
+        """This function closes the database connections and removes the temporary database
+        directory."""
+        for db_connection in self.db_connection_list:
+            db_connection.close()
+        self.db_directory.cleanup()
+
+    def connect(self, db_name):
+        """This function returns a connection to the database with the name in the temporary
+        database directory (configured like the server's connections)."""
+        db_connection = sqlite3.connect(os.path.join(self.db_directory.name,
+                                                     db_name + ".sqlite"),
+                                        check_same_thread=False)
+        database_access_module.configure_database_connection(db_connection)
+        self.db_connection_list.append(db_connection)
+        return db_connection
+
+    def test_baseline_reminder_database_is_upgraded(self):
+        """This function checks that a user reminder database created before schema versions
+        were tracked (user_version 0, without the due date epoch, tag and search indexes)
+        is brought up to the latest schema version, with its reminders indexed."""
+        db_connection = self.connect("baseline")
+        db_connection.execute(db_scripts.INITIALIZE_USER_REMINDER_DB)
+        db_connection.execute("INSERT INTO reminders VALUES (?, ?, ?, ?, ?)",
+                              [str(uuid.uuid4()), "2030-01-02 03:04:05", "Dentist",
+                               "Health, Errands", "Book a checkup"])
+        db_connection.commit()
+
+        self.assertTrue(schema_migration_module.run_migrations("baseline", db_connection,
+            schema_migration_module.USER_REMINDER_DB_MIGRATIONS))
+
+        self.assertEqual(db_connection.execute("PRAGMA user_version").fetchone()[0],
+                         len(schema_migration_module.USER_REMINDER_DB_MIGRATIONS))
+        self.assertIsNotNone(db_connection.execute(
+            "SELECT due_epoch FROM reminders").fetchone()[0])
+        self.assertEqual(db_connection.execute(
+            "SELECT COUNT(*) FROM reminder_tags").fetchone()[0], 2)
+        self.assertEqual(db_connection.execute(
+            "SELECT COUNT(*) FROM reminder_search WHERE reminder_search MATCH 'checkup'"
+            ).fetchone()[0], 1)
+
+    def test_failing_migration_is_rolled_back(self):
+        """This function checks that a migration which fails is undone completely, and that
+        the database stays at the schema version before it."""
+        db_connection = self.connect("failing")
+        migrations = ["CREATE TABLE first_table(value INTEGER);",
+                      "CREATE TABLE second_table(value INTEGER);\n"
+                      "INSERT INTO missing_table VALUES (1);"]
+
+        self.assertFalse(schema_migration_module.run_migrations("failing", db_connection,
+                                                                migrations))
+
+        self.assertEqual(db_connection.execute("PRAGMA user_version").fetchone()[0], 1)
+        self.assertIsNone(db_connection.execute(
+            "SELECT name FROM sqlite_master WHERE name = 'second_table'").fetchone())
+
+    def test_migrating_database_does_not_block_other_databases(self):
+        """This function checks that a database can be migrated while a slow migration of
+        another database is running."""
+        migration_started_event = threading.Event()
+        migration_finished_event = threading.Event()
+
+        def run_slow_migration(_db_connection):
+            migration_started_event.set()
+            migration_finished_event.wait(10)
+
+        slow_db_key = str(uuid.uuid4())
+        slow_db_connection = self.connect("slow")
+        slow_migration_thread = threading.Thread(
+            target=schema_migration_module.ensure_database_schema,
+            args=(slow_db_key, slow_db_connection, [run_slow_migration]))
+        slow_migration_thread.start()
+        migration_started_event.wait(10)
+
+        try:
+            other_migration_result = []
+            other_migration_thread = threading.Thread(target=lambda: other_migration_result.append(
+                schema_migration_module.ensure_database_schema(str(uuid.uuid4()),
+                    self.connect("other"), ["CREATE TABLE other_table(value INTEGER);"])))
+            other_migration_thread.start()
+            other_migration_thread.join(5)
+
+            self.assertEqual(other_migration_result, [True])
+        finally:
+            migration_finished_event.set()
+            slow_migration_thread.join()
+
+        self.assertIn(slow_db_key, schema_migration_module.INITIALIZED_DATABASE_SET)
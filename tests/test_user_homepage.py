@@ -0,0 +1,184 @@
+"""This module contains tests for reading pages of the user home page's reminder table, run
+against real reminder databases in a temporary database directory."""
+
+import tempfile
+import time
+import unittest
+import uuid
+import server_constants
+import user_session_manager_module
+from database_modules import db_scripts, database_access_module, connection_pool_module, \
+    schema_migration_module
+from webpage_modules import user_homepage_module
+
+class PageRequestTest(unittest.TestCase):
+    """This class tests reading the page cursor and page size sent by the page."""
+
+    def test_page_cursors_are_read(self):
+        """This function checks that a page cursor is read back into its window epoch, due
+        date epoch and reminder ID (which may contain colons)."""
+        self.assertEqual(user_homepage_module.read_page_cursor("1700000000:1700003600:a:b"),
+                         [1700000000, 1700003600, "a:b"])
+
+    def test_malformed_page_cursors_are_ignored(self):
+        """This function checks that malformed or tampered page cursors are treated as no
+        cursor (the first page is shown)."""
+        for page_cursor in [None, "", "garbage", "1700000000", "1700000000:1700003600",
+                            "now:1700003600:id", "1700000000:soon:id",
+                            "1700000000.5:1700003600:id"]:
+            with self.subTest(page_cursor=page_cursor):
+                self.assertIsNone(user_homepage_module.read_page_cursor(page_cursor))
+
+    def test_page_size_is_bounded(self):
+        """This function checks that page sizes are limited to between 1 and the maximum page
+        size of the render mode, and that missing or non-numeric page sizes use the default
+        page size."""
+        previous_render_mode = server_constants.REMINDER_TABLE_RENDER_MODE
+        try:
+            for render_mode, max_page_size in [
+                    ["buffered", user_homepage_module.MAX_REMINDER_PAGE_SIZE],
+                    ["streamed", user_homepage_module.MAX_STREAMED_REMINDER_PAGE_SIZE]]:
+                server_constants.REMINDER_TABLE_RENDER_MODE = render_mode
+                for page_size_string, page_size in [
+                        ["25", 25], ["0", 1], ["-5", 1], ["1000000", max_page_size],
+                        [None, user_homepage_module.REMINDER_PAGE_SIZE],
+                        ["ten", user_homepage_module.REMINDER_PAGE_SIZE],
+                        ["2.5", user_homepage_module.REMINDER_PAGE_SIZE]]:
+                    with self.subTest(render_mode=render_mode, page_size=page_size_string):
+                        self.assertEqual(user_homepage_module.read_page_size(page_size_string),
+                                         page_size)
+        finally:
+            server_constants.REMINDER_TABLE_RENDER_MODE = previous_render_mode
+
+class ReminderPageTest(unittest.TestCase):
+    """This class tests counting and paging through the reminders in a window, with one
+    database per user and with shard databases."""
+
+    def setUp(self):
+        """This function points the database access module at a temporary database
+        directory."""
+        # (the new reminder databases must be migrated, even if an earlier test's databases
+        # with the same keys were)
+        schema_migration_module.INITIALIZED_DATABASE_SET.clear()
+        self.db_directory = tempfile.TemporaryDirectory()
+        self.previous_db_directory_root = database_access_module.DB_DIRECTORY_ROOT
+        self.previous_storage_mode = server_constants.REMINDER_STORAGE_MODE
+        self.previous_render_mode = server_constants.REMINDER_TABLE_RENDER_MODE
+        database_access_module.DB_DIRECTORY_ROOT = self.db_directory.name
+        self.session_id_list = []
+
+    def tearDown(self):
+        """This function closes the reminder database connections and removes the temporary
+        database directory."""
+        for session_id in self.session_id_list:
+            user_session_manager_module.log_user_out(session_id)
+        connection_pool_module.close_all_connections()
+        database_access_module.DB_DIRECTORY_ROOT = self.previous_db_directory_root
+        server_constants.REMINDER_STORAGE_MODE = self.previous_storage_mode
+        server_constants.REMINDER_TABLE_RENDER_MODE = self.previous_render_mode
+        self.db_directory.cleanup()
+
+    def add_reminders(self, user_id, due_epoch_list):
+        """This function adds a reminder for the user due at each epoch in due_epoch_list,
+        and returns the reminders' IDs."""
+        reminder_id_list = [str(uuid.uuid4()) for _ in due_epoch_list]
+        self.assertIsNotNone(database_access_module.perform_user_reminder_db_batch_query(
+            user_id, "Add reminders", db_scripts.INSERT_NEW_REMINDER,
+            [[reminder_id, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(due_epoch)),
+              "Reminder", "", "", due_epoch]
+             for reminder_id, due_epoch in zip(reminder_id_list, due_epoch_list)]))
+        return reminder_id_list
+
+    def create_session(self, user_id):
+        """This function creates a session for the user, and returns its session ID."""
+        session_id = user_session_manager_module.initialize_user_session_container(user_id,
+            "password_hash", "alice", "Alice", "127.0.0.1")
+        self.session_id_list.append(session_id)
+        return session_id
+
+    def get_page(self, session_id, period_hours, page_cursor, page_size):
+        """This function returns a list containing the IDs of the reminders on a page of the
+        reminder table and the next page's cursor."""
+        jinja_var_dict = {}
+        reminder_list = list(user_homepage_module.get_reminders_within_time_period(session_id,
+            period_hours, jinja_var_dict, page_cursor, page_size))
+        return [[reminder.reminder_id for reminder in reminder_list],
+                jinja_var_dict["NEXT_PAGE_CURSOR"]]
+
+    def test_pages_split_reminders_with_equal_due_dates(self):
+        """This function checks that paging through a window lists each reminder once, in
+        order of due date and ID, when pages end between reminders with the same due date."""
+        for render_mode in ["buffered", "streamed"]:
+            with self.subTest(render_mode=render_mode):
+                server_constants.REMINDER_TABLE_RENDER_MODE = render_mode
+                user_id = str(uuid.uuid4())
+                session_id = self.create_session(user_id)
+                due_epoch = int(time.time()) + 3600
+                reminder_id_list = (sorted(self.add_reminders(user_id, [due_epoch] * 7))
+                                    + self.add_reminders(user_id, [due_epoch + 60]))
+
+                paged_reminder_id_list = []
+                page_cursor = None
+                for _ in range(len(reminder_id_list)):
+                    page_reminder_id_list, page_cursor = self.get_page(session_id, 24,
+                                                                       page_cursor, 3)
+                    paged_reminder_id_list.extend(page_reminder_id_list)
+                    if page_cursor is None:
+                        break
+
+                self.assertEqual(paged_reminder_id_list, reminder_id_list)
+
+    def test_tampered_page_cursor_stays_within_window(self):
+        """This function checks that a page cursor whose position was changed to before the
+        window still only lists the reminders in the window, and that a malformed cursor
+        lists the first page."""
+        user_id = str(uuid.uuid4())
+        session_id = self.create_session(user_id)
+        current_epoch = int(time.time())
+        past_reminder_id_list = self.add_reminders(user_id, [current_epoch - 3600])
+        future_reminder_id_list = self.add_reminders(user_id, [current_epoch + 3600])
+
+        self.assertEqual(self.get_page(session_id, 24, str(current_epoch) + ":0:", 10),
+                         [future_reminder_id_list, None])
+        self.assertEqual(self.get_page(session_id, -72, str(current_epoch) + ":0:", 10),
+                         [past_reminder_id_list, None])
+        self.assertEqual(self.get_page(session_id, 24, "garbage", 10),
+                         [future_reminder_id_list, None])
+
+    def test_past_and_future_windows(self):
+        """This function checks that future windows list the reminders due within the period,
+        and that the past window lists the reminders due within the retention period (but
+        not reminders which are older and haven't been deleted yet)."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                session_id = self.create_session(user_id)
+                current_epoch = int(time.time())
+                reminder_id_list = self.add_reminders(user_id, [
+                    current_epoch - (server_constants.EXPIRED_REMINDER_RETENTION_HOURS + 1)
+                    * 3600, current_epoch - 7200, current_epoch + 7200,
+                    current_epoch + 30 * 3600])
+
+                self.assertEqual(self.get_page(session_id, 24, None, 10),
+                                 [reminder_id_list[2:3], None])
+                self.assertEqual(self.get_page(session_id, 168, None, 10),
+                                 [reminder_id_list[2:], None])
+                self.assertEqual(self.get_page(session_id, -72, None, 10),
+                                 [reminder_id_list[1:2], None])
+
+    def test_reminder_count_is_capped(self):
+        """This function checks that counting the reminders in a window stops at the count
+        limit, and counts every reminder in the window when there are fewer."""
+        for storage_mode in ["per_user", "sharded"]:
+            with self.subTest(storage_mode=storage_mode):
+                server_constants.REMINDER_STORAGE_MODE = storage_mode
+                user_id = str(uuid.uuid4())
+                self.add_reminders(user_id, [int(time.time()) + 60 * reminder_index
+                                             for reminder_index in range(1, 8)])
+                reminder_window = user_homepage_module.get_reminder_window(24, None)
+
+                self.assertEqual(user_homepage_module.count_reminders_in_window(user_id, 24,
+                    reminder_window, 4), 4)
+                self.assertEqual(user_homepage_module.count_reminders_in_window(user_id, 24,
+                    reminder_window, 100), 7)
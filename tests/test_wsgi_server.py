@@ -0,0 +1,80 @@
+"""This module contains a smoke test for the production web server, which starts the
+server with multiple worker processes (in a subprocess, with a temporary project root
+directory) and checks that it serves requests and shuts down cleanly."""
+
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+# directory containing main.py and server_constants.py
+PROJECT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# script run in the server subprocess; configures the server and launches it with main()
+SERVER_SCRIPT = """
+import sys
+import server_constants
+server_constants.PROJECT_ROOT_DIRECTORY = sys.argv[1]
+server_constants.SERVER_PORT = int(sys.argv[2])
+server_constants.SERVER_WORKER_COUNT = 2
+server_constants.SESSION_STORE_BACKEND = "sqlite"
+import main
+main.main()
+"""
+
+# number of seconds to wait for the server to start serving or to shut down
+SERVER_TIMEOUT_SECONDS = 30
+
+@unittest.skipUnless(hasattr(os, "fork"), "worker processes require os.fork")
+class MultiWorkerServerTest(unittest.TestCase):
+    """This class tests starting and stopping the web server with multiple worker
+    processes."""
+
+    def test_workers_start_serve_and_stop(self):
+        """This function checks that the worker processes create their databases in the
+        project root directory, serve the login page, and stop on SIGTERM."""
+        with tempfile.TemporaryDirectory() as project_root_directory:
+            # find a free port to serve on
+            with socket.socket() as port_socket:
+                port_socket.bind(("127.0.0.1", 0))
+                server_port = port_socket.getsockname()[1]
+
+            server_process = subprocess.Popen(
+                [sys.executable, "-c", SERVER_SCRIPT, project_root_directory,
+                 str(server_port)], cwd=PROJECT_DIRECTORY, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, text=True)
+            try:
+                # wait for a worker to serve the login page
+                status_code = None
+                deadline = time.monotonic() + SERVER_TIMEOUT_SECONDS
+                while status_code is None and time.monotonic() < deadline:
+                    try:
+                        with urllib.request.urlopen("http://127.0.0.1:%d/" % server_port,
+                                                    timeout=5) as response:
+                            status_code = response.status
+                    except (urllib.error.URLError, ConnectionError):
+                        time.sleep(0.2)
+                self.assertEqual(status_code, 200)
+
+                # stop the server, which stops the worker processes
+                server_process.send_signal(signal.SIGTERM)
+                server_output = server_process.communicate(
+                    timeout=SERVER_TIMEOUT_SECONDS)[0]
+            finally:
+                if server_process.poll() is None:
+                    server_process.kill()
+                    server_process.communicate()
+
+            self.assertEqual(server_process.returncode, 0, server_output)
+            self.assertEqual(len(re.findall(r"Process \d+ serving on", server_output)), 2,
+                             server_output)
+            self.assertIn("All worker processes stopped", server_output)
+            self.assertTrue(os.path.isfile(os.path.join(project_root_directory,
+                                                        "databases", "users.sqlite")))
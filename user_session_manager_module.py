@@ -1,57 +1,81 @@
-"""This module contains the session manager (which manages access to the user
-session information dictionary) and contains a class used to define a container
-object, which stores a user's session data including authentication token
-and page variables."""
+"""This module contains the session manager, which manages access to the user
+session store (see session_store_module, which also contains the container object
+storing a user's session data including authentication token and page variables)."""
 
-from dataclasses import dataclass
 import datetime
-from passlib.hash import sha256_crypt
+import hashlib
+import hmac
+import os
+import secrets
 from webpage_modules import user_homepage_module
+import password_hashing_module
+import server_constants
+import session_store_module
 
-# dictionary, which associates session IDs for different users (keys) with
+# method used to generate and validate session tokens
+# -"hmac": session tokens are random, and are bound to the client IP address with an
+#  HMAC-SHA256 keyed with SESSION_SECRET_KEY (cheap to validate on every request)
+# -"sha256_crypt": session tokens are bound to the client IP address with the sha256_crypt
+#  password hasher (slow; validating costs as much as checking a password)
+SESSION_TOKEN_MODE = "hmac"
+
+# server secret used to compute session token HMACs. Read from the PYNOTE_SESSION_SECRET
+# environment variable if set (so all server processes share the secret), otherwise
+# randomly generated at startup (invalidating sessions when the server restarts).
+SESSION_SECRET_KEY = (os.environ.get("PYNOTE_SESSION_SECRET", "").encode("utf-8")
+    or secrets.token_bytes(32))
+
+# session store, which associates session IDs for different users (keys) with
 # corresponding usersessioncontainer objects (values), which store data
 # related to a user session.
-USER_SESSION_CONTAINER_DICTIONARY = {}
-
-@dataclass
-class UserSessionContainer:
-    """This class is a container for information for a particular user's session."""
-    # constructor
-    def __init__(self, user_id, user_session_token, jinja_var_dict):
-        self.user_id = user_id
-        self.user_auth_token = user_session_token
-        self.jinja_page_var_dict = jinja_var_dict
+# -created when first used (the SQLite store needs the databases to be connected)
+USER_SESSION_STORE = None
 
 def initialize_user_session_container(user_id, password_hash, username, person_name, request_ip):
     """This function creates a user session container (used to store user session
     data), initializes the page jinja variable dictionary, and returns a session
     token (sent to client browser, and used to retrieve the session container
-    information)."""
-
-    # generate session token (combine user ID, password hash and current time and hash it)
-    # -hasher will add random salt
-    raw_session_token = str(user_id) + str(password_hash) + str(datetime.datetime.now())
-    # -hash using sha256 hasher
-    session_token = sha256_crypt.hash(raw_session_token)
-    # generate ip hashed session token (used as key in USER_SESSION_CONTAINER_DICTIONARY)
-    # -client is sent the unhashed (pre-IP hashed) session token
-    # -when client sends the unhashed session token back, the server hashes it with the
-    #  response IP address. If there is a match in the session container dictionary, the
-    #  request was valid (sent back by the user it was issued to)
-    ip_hashed_session_token = sha256_crypt.hash(str(session_token) + str(request_ip))
+    information). If the session token couldn't be generated (the hashing service is
+    overloaded), None is returned."""
 
-    # populate a UserSessionContainer (initialize with homepage jinja variables)
-    new_user_session_container = UserSessionContainer(user_id, ip_hashed_session_token,
-        user_homepage_module.init_jinja_var_dictionary())
+    if SESSION_TOKEN_MODE == "hmac":
+        # generate random session token
+        session_token = secrets.token_urlsafe(32)
+        # generate ip hashed session token (used to validate the session token)
+        # -client is sent the unhashed (pre-IP hashed) session token
+        # -when client sends the unhashed session token back, the server computes the HMAC
+        #  with the response IP address. If it matches the stored HMAC, the request was
+        #  valid (sent back by the user it was issued to)
+        ip_hashed_session_token = compute_session_token_hmac(session_token, request_ip)
+    else:
+        # generate session token (combine user ID, password hash and current time and hash it)
+        # -hasher will add random salt
+        raw_session_token = str(user_id) + str(password_hash) + str(datetime.datetime.now())
+        # -hash using sha256 hasher (in the hashing service's worker processes)
+        session_token = password_hashing_module.hash_password(raw_session_token)
+        # generate ip hashed session token (used to validate the session token)
+        # -client is sent the unhashed (pre-IP hashed) session token
+        # -when client sends the unhashed session token back, the server hashes it with the
+        #  response IP address. If it matches the stored hash, the request was valid (sent
+        #  back by the user it was issued to)
+        ip_hashed_session_token = password_hashing_module.hash_password(
+            str(session_token) + str(request_ip))
 
-    # add to USER_SESSION_CONTAINER_DICTIONARY
-    USER_SESSION_CONTAINER_DICTIONARY[session_token] = new_user_session_container
+        # check if either token couldn't be hashed
+        if session_token is None or ip_hashed_session_token is None:
+            return None
+
+    # populate a UserSessionContainer (initialize with homepage jinja variables)
+    new_user_session_container = session_store_module.UserSessionContainer(user_id,
+        ip_hashed_session_token, user_homepage_module.init_jinja_var_dictionary())
 
     # populate the jinja variable dictionary with user-specific information
-    USER_SESSION_CONTAINER_DICTIONARY[session_token].jinja_page_var_dict["Username"] = username
-    USER_SESSION_CONTAINER_DICTIONARY[session_token].jinja_page_var_dict["Name"] = person_name
-    USER_SESSION_CONTAINER_DICTIONARY[session_token].jinja_page_var_dict["SessionID"] = (
-        session_token)
+    new_user_session_container.jinja_page_var_dict["Username"] = username
+    new_user_session_container.jinja_page_var_dict["Name"] = person_name
+    new_user_session_container.jinja_page_var_dict["SessionID"] = session_token
+
+    # add to the session store
+    get_user_session_store().add_session(session_token, new_user_session_container)
 
     # return the session token (the pre-ip hashed token)
     return session_token
@@ -59,40 +83,73 @@ def initialize_user_session_container(user_id, password_hash, username, person_n
 def get_user_session_page_jinja_vars(user_session_id):
     """This function returns the jinja page variable dictionary for a given
     authenthication token (passed in as a URL variable)"""
-    # check if user session ID is in dictionary
-    if user_session_id in USER_SESSION_CONTAINER_DICTIONARY:
-        # return the page variable dictionary for the given session ID
-        return USER_SESSION_CONTAINER_DICTIONARY[user_session_id].jinja_page_var_dict
-    # return None if user session ID is not in the user session container dictionary
+    # check if user session ID is in the session store
+    user_session_container = get_user_session_store().get_session(user_session_id)
+    if user_session_container is not None:
+        # return a copy of the page variable dictionary for the given session ID
+        return dict(user_session_container.jinja_page_var_dict)
+    # return None if user session ID is not in the session store (or has expired)
     return None
 
 def get_user_id_from_session_id(user_session_id):
     """This function returns the ID number of a user given a session ID.
     However, if the session ID is invalid (not on file), None is returned."""
-    if user_session_id in USER_SESSION_CONTAINER_DICTIONARY:
+    user_session_container = get_user_session_store().get_session(user_session_id)
+    if user_session_container is not None:
         # session ID is valid; return user ID
-        return USER_SESSION_CONTAINER_DICTIONARY[user_session_id].user_id
-    # session ID is invalid; return none
+        return user_session_container.user_id
+    # session ID is invalid (or has expired); return none
     return None
 
 def is_session_id_valid(response_session_id, response_ip_address):
     """This function checks if a session ID (supplied in the response_session_id
     parameter), when hashed with the response_ip_address, is in the user session
-    container dictionary. Returns the result as a boolean."""
+    store. Returns the result as a boolean."""
 
-    # first, identify if session id is a key of the session container dictionary
-    if response_session_id in USER_SESSION_CONTAINER_DICTIONARY:
+    # first, identify if session id is in the session store (and hasn't expired)
+    user_session_container = get_user_session_store().get_session(response_session_id)
+    if user_session_container is not None:
         # declare function variables
-        hash_string = str(response_session_id) + str(response_ip_address)
-        ip_hashed_token = USER_SESSION_CONTAINER_DICTIONARY[response_session_id].user_auth_token
+        ip_hashed_token = user_session_container.user_auth_token
+
+        if SESSION_TOKEN_MODE == "hmac":
+            # check if the HMAC of the session ID and IP address matches ip_hashed_token
+            # (compared in constant time), and return response
+            return hmac.compare_digest(compute_session_token_hmac(response_session_id,
+                response_ip_address), ip_hashed_token)
+
         # check if hash string matches ip_hashed_token, and return response
-        return bool(sha256_crypt.verify(hash_string, ip_hashed_token))
+        hash_string = str(response_session_id) + str(response_ip_address)
+        # -(a session which can't be checked because the hashing service is overloaded is
+        #  treated as invalid)
+        return bool(password_hashing_module.verify_password(hash_string, ip_hashed_token))
 
     # response session ID didn't match anything on file; return false
     return False
 
+def compute_session_token_hmac(session_token, request_ip):
+    """This function returns the HMAC-SHA256 (as a hexadecimal string) of a session token
+    combined with the IP address it was issued to, keyed with the server secret."""
+    return hmac.new(SESSION_SECRET_KEY, (str(session_token) + "|" + str(request_ip)).encode(
+        "utf-8"), hashlib.sha256).hexdigest()
+
 def log_user_out(response_session_id):
     """This function logs out a user by deleting their current session container
-    from the session container dictionary, and handles any other login-related
-    actions."""
-    del USER_SESSION_CONTAINER_DICTIONARY[response_session_id]
+    from the session store, and handles any other login-related actions."""
+    get_user_session_store().remove_session(response_session_id)
+
+def remove_expired_sessions():
+    """This function removes expired sessions from the session store (run periodically
+    by the maintenance scheduler)."""
+    get_user_session_store().remove_expired_sessions()
+
+def get_user_session_store():
+    """This function returns the session store (creating it for the backend set in
+    server_constants.SESSION_STORE_BACKEND when first called)."""
+    # pylint: disable=global-statement
+    global USER_SESSION_STORE
+
+    if USER_SESSION_STORE is None:
+        USER_SESSION_STORE = session_store_module.create_session_store(
+            server_constants.SESSION_STORE_BACKEND)
+    return USER_SESSION_STORE
@@ -0,0 +1,117 @@
+"""This module contains the common password checker, used to reject passwords that are
+on a list of common (or breached) passwords. Small lists (text files with one password
+per line, like CommonPassword.txt) are loaded into a frozenset. Large lists should be
+converted offline into a sorted hash file, which is memory-mapped instead of loaded:
+
+    python -m webpage_modules.common_password_module <password list.txt> <hash file.bin>
+
+A hash file contains the first 8 bytes of the SHA-1 hash of each password, sorted, so a
+password is looked up with a binary search (the chance of an uncommon password matching
+a hash in a list of 10 million passwords is about 1 in 2 trillion)."""
+
+import hashlib
+import mmap
+import sys
+import time
+
+# number of bytes of each password's SHA-1 hash stored in a hash file
+PASSWORD_HASH_LENGTH = 8
+
+# set containing the common passwords (used when loaded from a text file)
+COMMON_PASSWORD_SET = frozenset()
+# memory-mapped hash file (used when loaded from a hash file), or None
+COMMON_PASSWORD_HASH_FILE_MAP = None
+
+def try_load_common_passwords(common_passwords_filepath):
+    """This function tries to load the common passwords from the file at the specified
+    filepath; hash files (.bin) are memory-mapped, other files are read as text files
+    with one password per line. If it fails, it prints an error message indicating the
+    problem."""
+    # pylint: disable=global-statement
+    global COMMON_PASSWORD_SET, COMMON_PASSWORD_HASH_FILE_MAP
+
+    load_start_time = time.perf_counter()
+
+    try:
+        if common_passwords_filepath.endswith(".bin"):
+            with open(common_passwords_filepath, 'rb') as file:
+                # map the file into memory (the mapping stays valid after the file is closed)
+                COMMON_PASSWORD_HASH_FILE_MAP = mmap.mmap(file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+            password_count = len(COMMON_PASSWORD_HASH_FILE_MAP) // PASSWORD_HASH_LENGTH
+        else:
+            with open(common_passwords_filepath, 'r', encoding='utf-8') as file:
+                # read file lines into a set, stripping newline characters off items
+                COMMON_PASSWORD_SET = frozenset(line.strip() for line in file)
+            password_count = len(COMMON_PASSWORD_SET)
+
+    except (FileNotFoundError, ValueError):
+        # (mmap raises ValueError for an empty file)
+        print("Error - unable to access " + common_passwords_filepath
+              + ". Server restart recommended!")
+        return
+
+    print("Loaded " + str(password_count) + " common passwords in "
+          + str(round((time.perf_counter() - load_start_time) * 1000, 1)) + " ms")
+
+def is_password_common(password):
+    """This function checks if the password is on the loaded common password list, and
+    returns a boolean indicating the result."""
+
+    # check if a hash file is loaded
+    if COMMON_PASSWORD_HASH_FILE_MAP is not None:
+        return is_hash_in_hash_file(compute_password_hash_prefix(password),
+            COMMON_PASSWORD_HASH_FILE_MAP)
+
+    return password in COMMON_PASSWORD_SET
+
+def compute_password_hash_prefix(password):
+    """This function returns the hash prefix of the password stored in hash files (the
+    first PASSWORD_HASH_LENGTH bytes of the password's SHA-1 hash)."""
+    return hashlib.sha1(password.encode("utf-8")).digest()[:PASSWORD_HASH_LENGTH]
+
+def is_hash_in_hash_file(password_hash_prefix, hash_file_map):
+    """This function checks if the hash prefix is in the sorted hash file (with a binary
+    search), and returns a boolean indicating the result."""
+    lower_index = 0
+    upper_index = len(hash_file_map) // PASSWORD_HASH_LENGTH
+
+    while lower_index < upper_index:
+        middle_index = (lower_index + upper_index) // 2
+        middle_hash_prefix = hash_file_map[middle_index * PASSWORD_HASH_LENGTH:
+                                           (middle_index + 1) * PASSWORD_HASH_LENGTH]
+        if middle_hash_prefix < password_hash_prefix:
+            lower_index = middle_index + 1
+        else:
+            upper_index = middle_index
+
+    return bool(lower_index < len(hash_file_map) // PASSWORD_HASH_LENGTH
+                and hash_file_map[lower_index * PASSWORD_HASH_LENGTH:
+                                  (lower_index + 1) * PASSWORD_HASH_LENGTH]
+                == password_hash_prefix)
+
+def build_hash_file(password_list_filepath, hash_file_filepath):
+    """This function converts a text file with one password per line into a sorted hash
+    file, which can be loaded by try_load_common_passwords."""
+
+    # compute the hash prefix of each password (stored as integers, which use less memory
+    # than byte strings; big-endian so integer order matches byte order)
+    with open(password_list_filepath, 'r', encoding='utf-8', errors='replace') as file:
+        password_hash_prefix_set = {int.from_bytes(compute_password_hash_prefix(line.strip()),
+                                                   "big") for line in file}
+
+    # write the sorted hash prefixes
+    with open(hash_file_filepath, 'wb') as file:
+        for password_hash_prefix in sorted(password_hash_prefix_set):
+            file.write(password_hash_prefix.to_bytes(PASSWORD_HASH_LENGTH, "big"))
+
+    print("Wrote " + str(len(password_hash_prefix_set)) + " password hashes to "
+          + hash_file_filepath)
+
+if __name__ == "__main__":
+    # build a hash file from the command line arguments
+    if len(sys.argv) != 3:
+        print("Usage: python -m webpage_modules.common_password_module"
+              " <password list.txt> <hash file.bin>")
+        sys.exit(1)
+    build_hash_file(sys.argv[1], sys.argv[2])
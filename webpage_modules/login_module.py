@@ -1,9 +1,7 @@
 """This module handles functionality relating to the user login page."""
-import uuid
-import datetime
-from passlib.hash import sha256_crypt
-import server_constants
-from database_modules import db_scripts, database_access_module, user_database_module
+import password_hashing_module
+from database_modules import user_database_module, audit_log_writer_module
+from webpage_modules import login_rate_limiter_module
 
 DEFAULT_PAGE_BANNER_MSG = ("Pynote is a locally-hosted reminder app, developed by Jacob Micallef"
 " using the Flask web framework.")
@@ -19,17 +17,38 @@ def authenticate_user_login(username, password, ip_address):
     # initialize the 'loginPassed' to false (assume that the information is incorrect)
     page_jinja_variable_dictionary["loginPassed"] = False
 
-    # first, check if user exists
-    if user_database_module.does_user_exist(username):
+    # reject the attempt if there have been too many recent failed attempts from the IP
+    # address or for the username (before spending time on hashing the password)
+    # -otherwise the attempt is counted as a failure until it is cancelled
+    login_attempt_id = login_rate_limiter_module.reserve_login_attempt(ip_address, username)
+    if login_attempt_id is None:
+        page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Error! Too many failed login "
+            "attempts, please wait a few minutes and try again.")
+        return page_jinja_variable_dictionary
+
+    # first, get the user's record (None if user doesn't exist)
+    user_db_record = user_database_module.get_user_record(username)
+    if user_db_record is not None:
         # get user ID (needed to hash with password to get password hash)
-        user_db_record = user_database_module.get_user_record(username)
         user_id = user_db_record[0]
         stored_pass_hash = user_db_record[4]
         pass_hash_string = str(user_id) + str(password)
 
         # check if password_hash matches stored_pass_hash
         #if password_hash == stored_pass_hash:
-        if sha256_crypt.verify(pass_hash_string, stored_pass_hash):
+        login_rate_limiter_module.record_password_verification()
+        password_matches = password_hashing_module.verify_password(pass_hash_string,
+            stored_pass_hash)
+
+        # check if the password couldn't be checked (hashing service is overloaded)
+        if password_matches is None:
+            login_rate_limiter_module.cancel_login_attempt(login_attempt_id)
+            page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Error! The server is busy, "
+                "please try again in a moment.")
+            return page_jinja_variable_dictionary
+
+        if password_matches:
+            login_rate_limiter_module.cancel_login_attempt(login_attempt_id)
             # set message to default banner message
             page_jinja_variable_dictionary["loginPassed"] = True
 
@@ -44,19 +63,10 @@ def authenticate_user_login(username, password, ip_address):
         page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Error! Your password is "
             "incorrect, please try again or reset it.")
 
-        # run script to delete old (> 1 week) entries in the failed login attempt log, to
-        # avoid the file blowing up in size out of control.
-        # -if webmaster wants they can make a copy of the database for further analysis,
-        # but if database gets too big that will slow the website down.
-        database_access_module.perform_db_query(server_constants.LOGIN_LOG_DB_NAME,
-                        "Delete old entries, failed sign-in log",
-                                                db_scripts.DELETE_OLD_SIGNIN_ENTRIES, None)
-
-        # log entry in failed login database
-        database_access_module.perform_db_query(server_constants.LOGIN_LOG_DB_NAME,
-            "Record failed login attempt - incorrect password",
-                db_scripts.RECORD_LOGIN_ATTEMPT, [str(uuid.uuid4()),
-                str(datetime.datetime.now()), str(ip_address)])
+        # log entry in failed login database (written in the background); the attempt
+        # stays counted towards the IP address's and username's limits
+        audit_log_writer_module.record_failed_login(ip_address, username)
+        login_rate_limiter_module.record_failed_login(login_attempt_id)
 
         return page_jinja_variable_dictionary
 
@@ -64,19 +74,10 @@ def authenticate_user_login(username, password, ip_address):
     page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Error! Your username wasn't "
             "found, please try again or register.")
 
-    # run script to delete old (> 1 week) entries in the failed login attempt log, to
-    # avoid the file blowing up in size out of control.
-    # -if webmaster wants they can make a copy of the database for further analysis,
-    # but if database gets too big that will slow the website down.
-    database_access_module.perform_db_query(server_constants.LOGIN_LOG_DB_NAME,
-                    "Delete old entries, failed sign-in log",
-                                            db_scripts.DELETE_OLD_SIGNIN_ENTRIES, None)
-
-    # log entry in failed login database
-    database_access_module.perform_db_query(server_constants.LOGIN_LOG_DB_NAME,
-        "Record failed login attempt - unknown username",
-            db_scripts.RECORD_LOGIN_ATTEMPT, [str(uuid.uuid4()), str(datetime.datetime.now()),
-        str(ip_address)])
+    # log entry in failed login database (written in the background); the attempt stays
+    # counted towards the IP address's limit (usernames which don't exist aren't tracked)
+    audit_log_writer_module.record_failed_login(ip_address, username)
+    login_rate_limiter_module.record_unknown_username_attempt(login_attempt_id)
 
     return page_jinja_variable_dictionary
 
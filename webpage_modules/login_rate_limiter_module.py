@@ -0,0 +1,224 @@
+"""This module contains the login rate limiter, which rejects login attempts from IP
+addresses (and for usernames) with too many recent failed login attempts, before the
+password hash is verified. Failed attempts are counted in memory with a sliding window
+per IP address and per username, seeded from the failed sign-in log database when the
+server starts, so checking an attempt never writes to a database.
+
+Each allowed attempt is reserved (added to the windows) under the same lock as the check,
+so concurrent attempts can't all pass the check before any of them is counted. An attempt
+counts as a failure until it is cancelled (when its password matches, or couldn't be
+verified). Attempts for usernames which don't exist are only counted towards the IP
+address's limit.
+
+Each server process keeps its own windows, so with several worker processes each one
+enforces the limits separately (a restarted worker is seeded with the failures recorded by
+every worker)."""
+
+from collections import deque
+import datetime
+import threading
+import time
+import uuid
+import server_constants
+from database_modules import db_scripts, database_access_module, user_database_module
+
+# length of the sliding window failed login attempts are counted in (in seconds)
+FAILED_LOGIN_WINDOW_SECONDS = 900
+# maximum number of failed login attempts within the window, per IP address and per
+# username; further attempts are rejected until the oldest failure leaves the window
+MAX_FAILED_LOGINS_PER_IP = 20
+MAX_FAILED_LOGINS_PER_USERNAME = 10
+# number of seconds between removals of windows with no recent failures
+IDLE_WINDOW_PRUNE_INTERVAL_SECONDS = 300
+
+# dictionaries containing the sliding windows
+# -The key is the IP address/username
+# -The value is a deque containing the attempts within the window, oldest first; each
+#  attempt is a list of the (unix epoch) time it was made and its attempt ID (None for
+#  attempts loaded from the failed sign-in log)
+FAILED_LOGIN_IP_WINDOW_DICTIONARY = {}
+FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY = {}
+# dictionary which associates the IDs of reserved attempts (keys) with a list containing the
+# attempt, its IP address and its username (values), so they can be cancelled
+RESERVED_LOGIN_ATTEMPT_DICTIONARY = {}
+# lock guarding the dictionaries above, RATE_LIMITER_STATISTICS and LAST_PRUNE_TIME
+RATE_LIMITER_LOCK = threading.Lock()
+# dictionary containing counters of rejected attempts and attempts whose password was verified
+RATE_LIMITER_STATISTICS = {"rejected_attempts": 0, "verified_attempts": 0}
+# time (unix epoch) the idle windows were last removed
+LAST_PRUNE_TIME = time.time()
+
+def reserve_login_attempt(ip_address, username):
+    """This function checks if a login attempt from the IP address for the username is
+    allowed (neither has too many recent failed attempts) and, if it is, counts the
+    attempt as a failure until it is cancelled. Returns the attempt's ID if the attempt
+    is allowed, or None if it is rejected (rejected attempts are counted)."""
+    # pylint: disable=global-statement
+    global LAST_PRUNE_TIME
+
+    attempt_time = time.time()
+    window_start_time = attempt_time - FAILED_LOGIN_WINDOW_SECONDS
+
+    with RATE_LIMITER_LOCK:
+        # check the limits
+        if (count_recent_failures(FAILED_LOGIN_IP_WINDOW_DICTIONARY, str(ip_address),
+                window_start_time) >= MAX_FAILED_LOGINS_PER_IP
+                or count_recent_failures(FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY,
+                    str(username), window_start_time) >= MAX_FAILED_LOGINS_PER_USERNAME):
+            RATE_LIMITER_STATISTICS["rejected_attempts"] += 1
+            return None
+
+        # count the attempt (before the lock is released)
+        login_attempt = [attempt_time, str(uuid.uuid4())]
+        add_failure(FAILED_LOGIN_IP_WINDOW_DICTIONARY, str(ip_address), login_attempt)
+        add_failure(FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY, str(username), login_attempt)
+        RESERVED_LOGIN_ATTEMPT_DICTIONARY[login_attempt[1]] = [login_attempt, str(ip_address),
+                                                               str(username)]
+
+        # remove idle windows (and forgotten reservations) periodically, so the
+        # dictionaries don't grow forever
+        if LAST_PRUNE_TIME < attempt_time - IDLE_WINDOW_PRUNE_INTERVAL_SECONDS:
+            prune_idle_windows_locked(window_start_time)
+            LAST_PRUNE_TIME = attempt_time
+
+    return login_attempt[1]
+
+def cancel_login_attempt(attempt_id):
+    """This function stops counting a reserved login attempt as a failure (used when its
+    password matched, or couldn't be verified)."""
+    with RATE_LIMITER_LOCK:
+        reserved_attempt = RESERVED_LOGIN_ATTEMPT_DICTIONARY.pop(attempt_id, None)
+        if reserved_attempt is not None:
+            remove_failure(FAILED_LOGIN_IP_WINDOW_DICTIONARY, reserved_attempt[1],
+                           reserved_attempt[0])
+            remove_failure(FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY, reserved_attempt[2],
+                           reserved_attempt[0])
+
+def record_unknown_username_attempt(attempt_id):
+    """This function stops counting a reserved login attempt (for a username which doesn't
+    exist) towards its username's limit; it is still counted towards the IP address's
+    limit."""
+    with RATE_LIMITER_LOCK:
+        reserved_attempt = RESERVED_LOGIN_ATTEMPT_DICTIONARY.pop(attempt_id, None)
+        if reserved_attempt is not None:
+            remove_failure(FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY, reserved_attempt[2],
+                           reserved_attempt[0])
+
+def record_failed_login(attempt_id):
+    """This function marks a reserved login attempt as failed (its password didn't match);
+    it stays counted towards the IP address's and username's limits."""
+    with RATE_LIMITER_LOCK:
+        RESERVED_LOGIN_ATTEMPT_DICTIONARY.pop(attempt_id, None)
+
+def record_password_verification():
+    """This function counts an allowed login attempt whose password hash is verified."""
+    with RATE_LIMITER_LOCK:
+        RATE_LIMITER_STATISTICS["verified_attempts"] += 1
+
+def count_recent_failures(window_dictionary, window_key, window_start_time):
+    """This function removes failures older than window_start_time from the window with
+    the key, and returns the number of failures left. RATE_LIMITER_LOCK must be held."""
+    if window_key not in window_dictionary:
+        return 0
+
+    failure_window = window_dictionary[window_key]
+    while len(failure_window) > 0 and failure_window[0][0] < window_start_time:
+        failure_window.popleft()
+    return len(failure_window)
+
+def add_failure(window_dictionary, window_key, login_attempt):
+    """This function adds an attempt to the window with the key (creating the window if it
+    doesn't exist). RATE_LIMITER_LOCK must be held."""
+    if window_key not in window_dictionary:
+        window_dictionary[window_key] = deque()
+    window_dictionary[window_key].append(login_attempt)
+
+def remove_failure(window_dictionary, window_key, login_attempt):
+    """This function removes an attempt from the window with the key (if it is still in
+    it). RATE_LIMITER_LOCK must be held."""
+    failure_window = window_dictionary.get(window_key)
+    if failure_window is None:
+        return
+
+    # (windows hold no more attempts than the limits, so searching them is cheap)
+    for window_index, window_attempt in enumerate(failure_window):
+        if window_attempt is login_attempt:
+            del failure_window[window_index]
+            break
+    if len(failure_window) == 0:
+        del window_dictionary[window_key]
+
+def prune_idle_windows_locked(window_start_time):
+    """This function removes the windows whose most recent failure is older than
+    window_start_time, and the reservations of attempts made before it (whose outcome was
+    never recorded). RATE_LIMITER_LOCK must be held."""
+    for window_dictionary in [FAILED_LOGIN_IP_WINDOW_DICTIONARY,
+                              FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY]:
+        idle_window_keys = [window_key for window_key, failure_window
+                            in window_dictionary.items()
+                            if len(failure_window) == 0
+                            or failure_window[-1][0] < window_start_time]
+        for window_key in idle_window_keys:
+            del window_dictionary[window_key]
+
+    for attempt_id in [attempt_id for attempt_id, reserved_attempt
+                       in RESERVED_LOGIN_ATTEMPT_DICTIONARY.items()
+                       if reserved_attempt[0][0] < window_start_time]:
+        del RESERVED_LOGIN_ATTEMPT_DICTIONARY[attempt_id]
+
+def load_recent_failed_logins():
+    """This function seeds the windows with the failed login attempts within the window
+    recorded in the failed sign-in log database (so restarting the server doesn't reset
+    the limits). Like attempts made while the server runs, failures for usernames which
+    don't exist are only counted towards the IP address's limit. Note: this function
+    should only be run when the server starts."""
+
+    # get the failed attempts within the window (event date/times are stored as local
+    # time strings, which sort in time order)
+    window_start_datetime = (datetime.datetime.now()
+                             - datetime.timedelta(seconds=FAILED_LOGIN_WINDOW_SECONDS))
+    query_results = database_access_module.perform_db_query(server_constants.LOGIN_LOG_DB_NAME,
+        "Get recent failed login attempts", db_scripts.GET_RECENT_FAILED_LOGINS,
+        [str(window_start_datetime)])
+
+    # check if query failed
+    if query_results is None:
+        return
+
+    # find which of the usernames exist (entries recorded before usernames were logged have
+    # no username)
+    known_username_set = {username for username in
+                          {event_record[2] for event_record in query_results}
+                          if username is not None
+                          and user_database_module.get_user_record(username) is not None}
+
+    with RATE_LIMITER_LOCK:
+        FAILED_LOGIN_IP_WINDOW_DICTIONARY.clear()
+        FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY.clear()
+        RESERVED_LOGIN_ATTEMPT_DICTIONARY.clear()
+
+        # add the attempts in time order, so each window stays sorted
+        for event_record in sorted(query_results,
+                                   key=lambda event_record: str(event_record[0])):
+            try:
+                login_attempt = [datetime.datetime.fromisoformat(event_record[0]).timestamp(),
+                                 None]
+            except (TypeError, ValueError):
+                # skip entries with an unreadable date/time
+                continue
+            add_failure(FAILED_LOGIN_IP_WINDOW_DICTIONARY, str(event_record[1]), login_attempt)
+            if event_record[2] in known_username_set:
+                add_failure(FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY, str(event_record[2]),
+                            login_attempt)
+
+    print("Loaded " + str(len(query_results)) + " recent failed login attempts")
+
+def get_rate_limiter_statistics():
+    """This function returns a dictionary containing the counters of rejected and verified
+    login attempts, and the number of IP addresses/usernames being tracked."""
+    with RATE_LIMITER_LOCK:
+        rate_limiter_statistics = dict(RATE_LIMITER_STATISTICS)
+        rate_limiter_statistics["tracked_ip_addresses"] = len(FAILED_LOGIN_IP_WINDOW_DICTIONARY)
+        rate_limiter_statistics["tracked_usernames"] = len(
+            FAILED_LOGIN_USERNAME_WINDOW_DICTIONARY)
+    return rate_limiter_statistics
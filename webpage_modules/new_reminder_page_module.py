@@ -5,7 +5,8 @@ reminder details in database files."""
 import uuid
 from datetime import datetime
 import user_session_manager_module
-from database_modules import db_scripts, database_access_module
+import reminder_notification_module
+from database_modules import db_scripts, database_access_module, reminder_tag_index_module
 
 # declare module variables
 PAGE_BANNER_MESSAGE = "Quick, hold that thought!"
@@ -105,12 +106,31 @@ def save_reminder(session_id, reminder_details, page_jinja_var_dict):
         #    "Add Reminder", db_scripts.INSERT_NEW_REMINDER,
         #    [str(uuid.uuid4()), str(workable_datetime_string), str(reminder_title),
         #     str(reminder_tags), str(reminder_description)])
-        database_access_module.perform_user_reminder_db_query(session_user_id,
-            "Add Reminder", db_scripts.INSERT_NEW_REMINDER,
-            [str(uuid.uuid4()), str(workable_datetime_string),
-             str(reminder_details['reminder_title']),
-             str(reminder_details['reminder_tags']),
-             str(reminder_details['reminder_description'])])
+        # -the reminder and its tag index rows are saved in a single transaction
+        reminder_id = str(uuid.uuid4())
+        reminder_due_epoch = convert_datetime_from_iso_to_epoch(
+            reminder_details['reminder_datetime'])
+        if database_access_module.perform_user_reminder_db_batch_queries(session_user_id,
+            "Add Reminder", [
+                [db_scripts.INSERT_NEW_REMINDER,
+                 [[reminder_id, str(workable_datetime_string),
+                   str(reminder_details['reminder_title']),
+                   str(reminder_details['reminder_tags']),
+                   str(reminder_details['reminder_description']),
+                   reminder_due_epoch]]],
+                [db_scripts.INSERT_REMINDER_TAG,
+                 reminder_tag_index_module.create_reminder_tag_rows(reminder_id,
+                    reminder_details['reminder_tags'], reminder_due_epoch)]]) is None:
+            # the reminder couldn't be saved (the database query failed)
+            # -update banner message in jinja variable dictionary
+            page_jinja_var_dict["BANNER_MESSAGE"] = ("Error! Your reminder couldn't be saved,"
+                " please try again.")
+            # return jinja variable dictionary
+            return page_jinja_var_dict
+
+        # schedule the reminder's notifications
+        reminder_notification_module.schedule_reminder_notifications(session_user_id,
+            [[reminder_id, str(reminder_details['reminder_title']), reminder_due_epoch]])
 
         # update banner message in jinja variable dictionary to indicate reminder was successfully
         # saved.
@@ -162,6 +182,11 @@ def convert_datetime_from_iso_to_sqlite(iso_string):
     # return the formatted string
     return str(corrected_datetime_obj.strftime('%Y-%m-%d %H:%M:%S'))
 
+def convert_datetime_from_iso_to_epoch(iso_string):
+    """This function converts an iso 8601 date (in local time) to the number of seconds
+    since the unix epoch, used to find reminders within a time window."""
+    return int(datetime.fromisoformat(iso_string).timestamp())
+
 def init_jinja_var_dictionary():
     """This function initializes default values for the page's jinja dictionary.
     Note: this function should only be run once, when the web server is initially
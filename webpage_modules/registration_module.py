@@ -4,9 +4,9 @@ for the user in the user information database (if the information is correct), a
 returning error messages if the user entered invalid data."""
 import uuid
 import re
-from passlib.hash import sha256_crypt
-from database_modules import database_access_module, user_database_module, db_scripts
-import server_constants
+import password_hashing_module
+from database_modules import user_database_module
+from webpage_modules import common_password_module
 
 # declare module variables
 PAGE_BANNER_MESSAGE = "Join the club!"
@@ -87,6 +87,16 @@ def registration_script(request_data):
         # return results
         return page_jinja_variable_dictionary
 
+    # check if password is on list of most common passwords (loaded from CommonPasswords.txt)
+    if common_password_module.is_password_common(registration_password):
+        # assign reason for registration failure.
+        page_jinja_variable_dictionary["BANNER_MESSAGE"] = \
+            "Your password is too common to be used, please pick another one."
+        # update the color for the password textbox in the jinja dictionary
+        page_jinja_variable_dictionary["PASSWORD_TB_BACKCOLOR"] = "#e3735d"
+        # return results
+        return page_jinja_variable_dictionary
+
     # check if user email is invalid
     if not is_email_valid(registration_email):
         # user e-mail is invalid, tell user
@@ -97,10 +107,8 @@ def registration_script(request_data):
         page_jinja_variable_dictionary["EMAIL_TB_BACKCOLOR"] = "#e3735d"
         return page_jinja_variable_dictionary
 
-    # check if user exists by running a database check
-    does_user_exist = user_database_module.does_user_exist(registration_username)
     # check if user doesn't already exist
-    if not does_user_exist:
+    if user_database_module.get_user_record(registration_username) is None:
         # registration info is valid and username isn't taken
 
         # generate user ID
@@ -109,23 +117,26 @@ def registration_script(request_data):
         # -salt the user's password with their user ID
         registration_password = compute_password_hash(registration_password, user_id)
 
+        # check if the password couldn't be hashed (hashing service is overloaded)
+        if registration_password is None:
+            page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Error! The server is busy, "
+                "please try again in a moment.")
+            return page_jinja_variable_dictionary
+
         # check if user left their name blank (want to remain anonymous)
         if len(registering_person_name.strip()) == 0:
             # assign "Anonymous" to their name
             registering_person_name = "Anonymous"
 
-        # create a database entry for the user by running the query.
-        database_access_module.perform_db_query(server_constants.USERS_INFO_DB_NAME,
-            'Register_New_User', db_scripts.CREATE_USER_SCRIPT_TEMPLATE,
-             [str(user_id), str(registration_username),
-             str(registering_person_name), str(registration_email),
-             str(registration_password)])
+        # create a database entry for the user
+        # -fails if someone else registered the username since it was checked
+        if user_database_module.create_user_record(user_id, registration_username,
+            registering_person_name, registration_email, registration_password):
+            # send a response to the website to display in the action banner.
+            page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Welcome "
+                + registration_username + "! You have been successfully registered for Pynote!")
 
-        # send a response to the website to display in the action banner.
-        page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Welcome " + registration_username +
-                               "! You have been successfully registered for Pynote!")
-
-        return page_jinja_variable_dictionary
+            return page_jinja_variable_dictionary
 
     # send a response to the website to display in the action banner.
     page_jinja_variable_dictionary["BANNER_MESSAGE"] = ("Unable to register "
@@ -135,13 +146,14 @@ def registration_script(request_data):
 
 def compute_password_hash(base_password_string, user_id):
     """This function generates a password hash (to be stored in the user information
-    database to verify user login passwords), and returns it as a string."""
+    database to verify user login passwords), and returns it as a string. If the password
+    couldn't be hashed (the hashing service is overloaded), None is returned."""
     # -salt the user's password with their user ID
     password_hash = str(user_id) + str(base_password_string)
-    # -hash the user's password
-    password_hash = str(sha256_crypt.hash(password_hash))
+    # -hash the user's password (in the hashing service's worker processes)
+    password_hash = password_hashing_module.hash_password(password_hash)
     # return the password hash
-    return password_hash
+    return str(password_hash) if password_hash is not None else None
 
 def is_username_valid(username_string):
     """This function checks if the string specified in the 'username_string' parameter
@@ -0,0 +1,198 @@
+"""This module contains the JSON reminder API, which returns a user's reminders within a
+time window or with a tag (and suggests tags starting with a prefix) as compact JSON, so
+clients (scripts, widgets, et cetera) don't have to request and parse the whole home page.
+
+Responses carry an ETag and Last-Modified date derived from the user's reminder change
+counter (kept in their reminder database, and updated by triggers whenever their reminders
+are written to, by any server process), so a client repeating a request gets a
+'304 Not Modified' answer after a single lookup of the counter instead of the page being
+queried, unless the user's reminders changed."""
+
+import bisect
+import datetime
+import heapq
+import time
+import server_constants
+from database_modules import db_scripts, database_access_module, reminder_query_cache_module
+from database_modules import reminder_tag_index_module
+
+# number of reminders returned per page (unless the request asks for a different page size),
+# and the maximum page size a request can ask for
+API_PAGE_SIZE = 100
+MAX_API_PAGE_SIZE = 500
+# named windows (the same as the home page's filters), and the number of hours they span
+# from the present (negative hours span expired reminders)
+API_WINDOW_HOURS_DICTIONARY = {"day": 24, "week": 168, "month": 731, "year": 8760,
+                               "past": -server_constants.EXPIRED_REMINDER_RETENTION_HOURS}
+# named windows start/end at the present rounded down to this many seconds, so repeated
+# requests within the same period return the same response
+API_WINDOW_ANCHOR_SECONDS = 60
+# number of tags suggested for a prefix (unless the request asks for a different number),
+# and the maximum number a request can ask for
+TAG_SUGGESTION_COUNT = 10
+MAX_TAG_SUGGESTION_COUNT = 100
+# description of a user's tag list in the reminder query cache
+TAG_LIST_PAGE_KEY = ("tag_counts",)
+
+# fields of each reminder in a response (each reminder is a list of these fields)
+API_REMINDER_FIELDS = ["reminder_id", "due_date", "due_epoch", "title", "tags", "description"]
+
+def get_window_bounds(window_name, window_start, window_end):
+    """This function returns a list containing the start (exclusive) and end (inclusive)
+    epochs of the window requested, either by name (see API_WINDOW_HOURS_DICTIONARY) or by
+    its start and end epochs, and the time (epoch) a named window is anchored at (0 for
+    windows specified by their epochs). Returns None if the window is invalid."""
+
+    # check if the window was requested by name
+    if window_name is not None:
+        if window_name not in API_WINDOW_HOURS_DICTIONARY:
+            return None
+        window_anchor = int(time.time()) // API_WINDOW_ANCHOR_SECONDS * API_WINDOW_ANCHOR_SECONDS
+        window_hours = API_WINDOW_HOURS_DICTIONARY[window_name]
+        return sorted([window_anchor, window_anchor + window_hours * 3600]) + [window_anchor]
+
+    # read the window's start and end epochs
+    try:
+        window_bounds = [int(window_start), int(window_end), 0]
+    except (TypeError, ValueError):
+        return None
+    return window_bounds if window_bounds[0] <= window_bounds[1] else None
+
+def get_response_validators(user_id, window_anchor=0):
+    """This function returns a list containing the ETag and Last-Modified date (a datetime)
+    for a response containing the user's reminders (for a named window, anchored at
+    window_anchor). Neither changes until the user's reminders are written to. Returns None
+    if the user's reminder change counter couldn't be read."""
+    query_results = database_access_module.perform_user_reminder_db_query(user_id,
+        "API: get reminder change counter", db_scripts.GET_REMINDER_CHANGE_COUNTER, [])
+
+    # check if query failed
+    if query_results is None:
+        return None
+    # -(users of a shard database whose reminders were never written to have no counter)
+    change_count, last_change_epoch = query_results[0] if query_results else [0, 0]
+
+    # describe the change counter (and the window's anchor, since a named window's contents
+    # depend on the time it is anchored at)
+    return [str(change_count) + "-" + str(window_anchor),
+            datetime.datetime.fromtimestamp(max(last_change_epoch, window_anchor),
+                                             datetime.timezone.utc)]
+
+def get_reminders_in_window(user_id, window_bounds, page_cursor, page_size):
+    """This function returns a dictionary (the response) containing a page of the user's
+    reminders within the window (in order of due date), and the cursor of the next page (None
+    if this is the last page). Returns None if the query failed."""
+    page_start = read_api_cursor(page_cursor) or [window_bounds[0], ""]
+
+    # get the page (one extra reminder is requested to check if there are more pages)
+    query_results = database_access_module.perform_user_reminder_db_query(user_id,
+        "API: get reminders in window", db_scripts.GET_REMINDERS_BY_DATETIME,
+        [page_start[0], page_start[1], window_bounds[0], window_bounds[1], page_size + 1])
+
+    # check if query failed
+    if query_results is None:
+        return None
+
+    return create_reminder_response(query_results[:page_size], len(query_results) > page_size)
+
+def get_reminders_with_tag(user_id, reminder_tag, page_cursor, page_size):
+    """This function returns a dictionary (the response) containing a page of the user's
+    reminders with the tag (compared case-insensitively, ignoring surrounding whitespace),
+    in order of due date, and the cursor of the next page (None if this is the last page).
+    Returns None if the query failed."""
+    page_start = read_api_cursor(page_cursor) or [-(2 ** 63), ""]
+
+    # get the page from the tag index (one extra reminder is requested to check if there are
+    # more pages)
+    query_results = database_access_module.perform_user_reminder_db_query(user_id,
+        "API: get reminders with tag", db_scripts.GET_REMINDERS_WITH_TAG,
+        [reminder_tag_index_module.normalize_reminder_tag(reminder_tag), page_start[0],
+         page_start[1], page_size + 1])
+
+    # check if query failed
+    if query_results is None:
+        return None
+
+    return create_reminder_response(query_results[:page_size], len(query_results) > page_size)
+
+def get_tag_suggestions(user_id, tag_prefix, suggestion_count):
+    """This function returns a dictionary (the response) containing the user's tags which
+    start with the prefix (normalized like tags are), each in a list with the number of
+    reminders with it, most used first. Returns None if the user's tags couldn't be read."""
+    tag_list = get_user_tag_list(user_id)
+
+    # check if the tags couldn't be read
+    if tag_list is None:
+        return None
+
+    # find the (sorted) tags starting with the prefix, and keep the most used ones
+    tag_prefix = reminder_tag_index_module.normalize_reminder_tag(tag_prefix)
+    prefix_start_index = bisect.bisect_left(tag_list[0], tag_prefix)
+    prefix_end_index = bisect.bisect_left(tag_list[0], tag_prefix + "\U0010ffff",
+                                          prefix_start_index)
+    return {"fields": ["tag", "reminder_count"],
+            "tags": heapq.nsmallest(suggestion_count,
+                [[tag_list[0][tag_index], tag_list[1][tag_index]]
+                 for tag_index in range(prefix_start_index, prefix_end_index)],
+                key=lambda tag_suggestion: (-tag_suggestion[1], tag_suggestion[0]))}
+
+def get_user_tag_list(user_id):
+    """This function returns a list containing a sorted list of the user's tags and a list of
+    the number of reminders with each of them, from the reminder query cache or (if it isn't
+    cached) the tag index. Returns None if the query failed."""
+    tag_list = reminder_query_cache_module.get_cached_reminder_page(user_id, TAG_LIST_PAGE_KEY)
+    if tag_list is not None:
+        return tag_list
+
+    reminder_generation = reminder_query_cache_module.get_reminder_generation(user_id)
+    query_results = database_access_module.perform_user_reminder_db_query(user_id,
+        "API: get tag counts", db_scripts.GET_REMINDER_TAG_COUNTS, [])
+
+    # check if query failed
+    if query_results is None:
+        return None
+
+    # cache the tag list (each tag counts as a reminder towards the cache's size)
+    tag_list = [[row[0] for row in query_results], [row[1] for row in query_results]]
+    reminder_query_cache_module.cache_reminder_page(user_id, TAG_LIST_PAGE_KEY,
+        reminder_generation, tag_list, len(query_results))
+    return tag_list
+
+def create_reminder_response(reminder_row_list, has_more_pages):
+    """This function returns a response dictionary containing the reminder rows (each
+    containing the reminder ID, due date, title, tags, description and due epoch), and the
+    next page's cursor if there are more pages."""
+    return {"fields": API_REMINDER_FIELDS,
+            "reminders": [[row[0], row[1], row[5], row[2], row[3], row[4]]
+                          for row in reminder_row_list],
+            "next_cursor": (str(reminder_row_list[-1][5]) + ":" + str(reminder_row_list[-1][0])
+                            if has_more_pages else None)}
+
+def read_api_cursor(page_cursor):
+    """This function returns a list containing the due date epoch and reminder ID stored in
+    an API page cursor string, or None if page_cursor is None or invalid."""
+    if page_cursor is None:
+        return None
+
+    page_cursor_values = str(page_cursor).split(":", 1)
+    try:
+        return [int(page_cursor_values[0]), page_cursor_values[1]]
+    except (IndexError, ValueError):
+        return None
+
+def read_api_page_size(page_size_string):
+    """This function returns the page size requested (limited to between 1 and
+    MAX_API_PAGE_SIZE), or API_PAGE_SIZE if page_size_string is None or isn't a number."""
+    try:
+        return max(1, min(MAX_API_PAGE_SIZE, int(page_size_string)))
+    except (TypeError, ValueError):
+        return API_PAGE_SIZE
+
+def read_suggestion_count(suggestion_count_string):
+    """This function returns the number of tag suggestions requested (limited to between 1
+    and MAX_TAG_SUGGESTION_COUNT), or TAG_SUGGESTION_COUNT if suggestion_count_string is None
+    or isn't a number."""
+    try:
+        return max(1, min(MAX_TAG_SUGGESTION_COUNT, int(suggestion_count_string)))
+    except (TypeError, ValueError):
+        return TAG_SUGGESTION_COUNT
@@ -0,0 +1,97 @@
+"""This module contains the reminder full-text search, which finds the user's reminders whose
+title, description or tags contain the words searched for, best match first, using the
+reminder databases' FTS5 search index (see db_scripts.ADD_REMINDER_SEARCH_TABLE).
+
+Search text is never passed to FTS5 as a query of its own; its words are each quoted (so
+FTS5's operators and syntax characters in it are searched for as text), and the last word
+also matches words it is the start of, so results appear while a word is being typed.
+Snippets of the best matching field are returned as HTML, with the matched words between
+<mark> tags and the rest of the text escaped.
+
+When reminders are stored in shard databases, matches are ranked with the word statistics
+of the whole shard (FTS5's bm25 always uses the statistics of the whole index), so the
+order of a user's matches can change as other users in the shard add reminders."""
+
+import html
+import re
+from database_modules import db_scripts, database_access_module
+from webpage_modules import reminder_api_module
+
+# maximum number of words searched for (the rest of the search text is ignored)
+MAX_SEARCH_WORD_COUNT = 16
+# maximum number of matches that can be paged through (matches are ordered by relevance, so
+# each page is found by skipping the matches on the previous pages)
+MAX_SEARCH_RESULT_COUNT = 1000
+# characters which the search query places before and after the matched words in snippets
+SNIPPET_MATCH_START_CHARACTER = "\x02"
+SNIPPET_MATCH_END_CHARACTER = "\x03"
+
+# fields of each reminder in a response (each reminder is a list of these fields)
+SEARCH_RESULT_FIELDS = reminder_api_module.API_REMINDER_FIELDS + ["snippet"]
+
+def create_search_query(search_text):
+    """This function returns the FTS5 query used to search for the words in the search text,
+    or None if it contains no words."""
+    search_word_list = re.findall(r"\w+", str(search_text))[:MAX_SEARCH_WORD_COUNT]
+    if len(search_word_list) == 0:
+        return None
+
+    # quote each word (words only contain letters, digits and underscores, so they can't
+    # contain quotes), and match words starting with the last one
+    return " ".join('"' + search_word + '"' for search_word in search_word_list) + "*"
+
+def search_reminders(user_id, search_text, page_cursor, page_size):
+    """This function returns a dictionary (the response) containing a page of the user's
+    reminders matching the search text, best match first, and the cursor of the next page
+    (None if this is the last page). Returns None if the search text contains no words or
+    the query failed."""
+    search_query = create_search_query(search_text)
+    if search_query is None:
+        return None
+
+    # read the number of matches on the previous pages from the cursor
+    try:
+        page_start = max(0, int(page_cursor or 0))
+    except ValueError:
+        page_start = 0
+    page_size = max(0, min(page_size, MAX_SEARCH_RESULT_COUNT - page_start))
+    has_more_pages = page_start + page_size < MAX_SEARCH_RESULT_COUNT
+
+    # get the page (one extra reminder is requested to check if there are more pages)
+    query_results = database_access_module.perform_user_reminder_db_query(user_id,
+        "API: search reminders", db_scripts.SEARCH_REMINDERS,
+        [search_query, page_size + 1, page_start])
+
+    # check if query failed
+    if query_results is None:
+        return None
+
+    # -rows contain the reminder ID, due date, title, tags, description, due epoch and
+    #  snippet
+    return {"fields": SEARCH_RESULT_FIELDS,
+            "reminders": [[row[0], row[1], row[5], row[2], row[3], row[4],
+                           create_snippet_html(row[6])] for row in query_results[:page_size]],
+            "next_cursor": (str(page_start + page_size)
+                            if has_more_pages and len(query_results) > page_size else None)}
+
+def create_snippet_html(snippet):
+    """This function returns a search result snippet as HTML; the text is escaped, and the
+    matched words are placed between <mark> tags. (The marker characters are also read from
+    the reminder's own text, so marks are only opened and closed in turn.)"""
+    snippet_html = ""
+    is_mark_open = False
+
+    for snippet_part in re.split("([" + SNIPPET_MATCH_START_CHARACTER
+                                 + SNIPPET_MATCH_END_CHARACTER + "])", str(snippet or "")):
+        if snippet_part == SNIPPET_MATCH_START_CHARACTER:
+            if not is_mark_open:
+                snippet_html += "<mark>"
+                is_mark_open = True
+        elif snippet_part == SNIPPET_MATCH_END_CHARACTER:
+            if is_mark_open:
+                snippet_html += "</mark>"
+                is_mark_open = False
+        else:
+            snippet_html += html.escape(snippet_part)
+
+    return snippet_html + ("</mark>" if is_mark_open else "")
@@ -0,0 +1,301 @@
+"""This module contains functionality relating to importing and exporting reminders in
+bulk (for instance, when moving reminders from another tool), as CSV or JSON files.
+
+Uploaded files are limited to server_constants.MAX_REQUEST_SIZE_BYTES, and are spooled by
+the web server (in memory, or in a temporary file if they're large) before they're
+imported. The spooled file is then read a record at a time, and each record is validated
+with the same checks as the 'new reminder' page, except that reminders due in the past
+are accepted if they're due within the last EXPIRED_REMINDER_RETENTION_HOURS hours (older
+expired reminders would be deleted by the maintenance scheduler), so exported files can
+be imported again. Valid reminders are inserted IMPORT_CHUNK_SIZE at a time, each chunk in
+a single transaction, so the parsed records of a whole file aren't held in memory.
+Exported files are written as they are read from the database, EXPORT_CHUNK_SIZE
+reminders at a time.
+
+Records use the same fields as the 'new reminder' page (see REMINDER_TRANSFER_FIELDS). CSV
+files need a header row naming the fields; JSON files contain either an array of objects
+or one object per line. Exports include reminders whose due date couldn't be read (when
+their due date epoch was added); these are exported first, and are rejected if the file
+is imported again."""
+
+import csv
+from datetime import datetime, timedelta
+import io
+import json
+import re
+import uuid
+import reminder_notification_module
+import server_constants
+from database_modules import db_scripts, database_access_module, reminder_tag_index_module
+from webpage_modules import new_reminder_page_module
+
+# fields of an imported/exported reminder record
+REMINDER_TRANSFER_FIELDS = ["reminder_datetime", "reminder_title", "reminder_tags",
+                            "reminder_description"]
+# file formats that can be imported/exported, and their mimetypes
+TRANSFER_FILE_MIMETYPE_DICTIONARY = {"csv": "text/csv", "json": "application/json"}
+
+# number of reminders inserted in each transaction when importing
+IMPORT_CHUNK_SIZE = 1000
+# number of rejected records described in the import summary
+MAX_REPORTED_REJECTED_RECORDS = 20
+# number of characters read from an imported JSON file at a time, and the maximum length of
+# a single JSON record
+JSON_READ_CHUNK_SIZE = 65536
+MAX_JSON_RECORD_LENGTH = 16384
+# characters skipped between JSON records (the array's brackets, commas and whitespace),
+# and the pattern matching a run of them
+JSON_RECORD_SEPARATOR_CHARACTERS = " \t\r\n,[]"
+JSON_RECORD_SEPARATOR_PATTERN = re.compile("[" + re.escape(JSON_RECORD_SEPARATOR_CHARACTERS)
+                                           + "]*")
+
+# number of reminders read from the database at a time when exporting
+EXPORT_CHUNK_SIZE = 500
+# page cursor which comes before every reminder with a due date epoch (the export of those
+# reminders starts after it)
+EXPORT_START_CURSOR = [-(2 ** 63), ""]
+
+def get_transfer_file_format(file_format, file_name):
+    """This function returns the format ("csv" or "json") of an imported/exported file; the
+    format specified (if any), otherwise the file name's extension. Returns None if the
+    format isn't supported."""
+    if not file_format and file_name and "." in str(file_name):
+        file_format = str(file_name).rsplit(".", 1)[1]
+    file_format = str(file_format).lower()
+
+    # -JSON lines files are read the same way as JSON files
+    if file_format == "jsonl":
+        file_format = "json"
+    return file_format if file_format in TRANSFER_FILE_MIMETYPE_DICTIONARY else None
+
+def import_reminders(user_id, reminder_file_stream, file_format):
+    """This function imports the reminders in reminder_file_stream (a binary stream of a UTF-8
+    encoded CSV or JSON file) into the user's reminder database, and returns a dictionary
+    summarizing the import: the number of reminders imported and rejected, descriptions of
+    the first rejected records, and an error message (None if the whole file was read)."""
+
+    import_summary = {"imported_reminders": 0, "rejected_reminders": 0,
+                      "rejected_records": [], "error": None}
+    reminder_row_list = []
+
+    # read the file as text (skipping the byte order mark some editors add)
+    text_stream = io.TextIOWrapper(reminder_file_stream, encoding="utf-8-sig", newline="")
+    reminder_records = (read_csv_reminder_records(text_stream) if file_format == "csv"
+                        else read_json_reminder_records(text_stream))
+
+    try:
+        for record_number, reminder_record in enumerate(reminder_records, start=1):
+            # validate the record
+            record_error = get_reminder_record_error(reminder_record)
+            if record_error is not None:
+                import_summary["rejected_reminders"] += 1
+                if len(import_summary["rejected_records"]) < MAX_REPORTED_REJECTED_RECORDS:
+                    import_summary["rejected_records"].append(
+                        "Record " + str(record_number) + ": " + record_error)
+                continue
+
+            reminder_row_list.append(create_reminder_row(reminder_record))
+
+            # insert a full chunk
+            if len(reminder_row_list) == IMPORT_CHUNK_SIZE:
+                if not insert_reminder_rows(user_id, reminder_row_list, import_summary):
+                    return import_summary
+                reminder_row_list = []
+    except (UnicodeDecodeError, ValueError, csv.Error) as exception:
+        # the file is unreadable from this point on; the records before it are imported
+        import_summary["error"] = "Unable to read the file: " + str(exception)
+    finally:
+        # stop the text wrapper from closing the uploaded file
+        text_stream.detach()
+
+    # insert the last chunk
+    if len(reminder_row_list) > 0:
+        insert_reminder_rows(user_id, reminder_row_list, import_summary)
+
+    return import_summary
+
+def insert_reminder_rows(user_id, reminder_row_list, import_summary):
+    """This function inserts a chunk of reminder rows into the user's reminder database in a
+    single transaction, and updates the import summary. Returns true if the rows were
+    inserted, false if not."""
+    # -the reminders' tag index rows are inserted in the same transaction
+    tag_row_list = [tag_row for reminder_row in reminder_row_list
+                    for tag_row in reminder_tag_index_module.create_reminder_tag_rows(
+                        reminder_row[0], reminder_row[3], reminder_row[5])]
+    if database_access_module.perform_user_reminder_db_batch_queries(user_id,
+            "Import reminders", [[db_scripts.INSERT_NEW_REMINDER, reminder_row_list],
+                                 [db_scripts.INSERT_REMINDER_TAG, tag_row_list]]) is None:
+        import_summary["error"] = ("Unable to save the imported reminders; "
+            + str(import_summary["imported_reminders"]) + " reminder(s) were imported before"
+            " the error.")
+        return False
+
+    import_summary["imported_reminders"] += len(reminder_row_list)
+
+    # schedule the reminders' notifications
+    reminder_notification_module.schedule_reminder_notifications(user_id,
+        [[reminder_row[0], reminder_row[2], reminder_row[5]]
+         for reminder_row in reminder_row_list])
+    return True
+
+def read_csv_reminder_records(text_stream):
+    """This function is a generator which yields a dictionary for each row of a CSV file
+    (whose first row names the fields)."""
+    yield from csv.DictReader(text_stream)
+
+def read_json_reminder_records(text_stream):
+    """This function is a generator which yields each record of a JSON file containing
+    either an array of records or one record per line, reading JSON_READ_CHUNK_SIZE
+    characters at a time. Raises ValueError if the file isn't valid JSON."""
+    json_decoder = json.JSONDecoder()
+    json_buffer = ""
+    # position of the next record in the buffer (the records before it are removed from the
+    # buffer once per chunk read, rather than after every record)
+    json_buffer_index = 0
+    is_end_of_file = False
+
+    while True:
+        # skip the characters between records
+        json_buffer_index = JSON_RECORD_SEPARATOR_PATTERN.match(json_buffer,
+                                                                json_buffer_index).end()
+
+        # try decoding the next record (if the buffer holds all of it)
+        if json_buffer_index < len(json_buffer):
+            try:
+                reminder_record, json_buffer_index = json_decoder.raw_decode(json_buffer,
+                                                                             json_buffer_index)
+                yield reminder_record
+                continue
+            except json.JSONDecodeError as exception:
+                # check if the record can't be completed by reading more of the file
+                if (is_end_of_file
+                        or len(json_buffer) - json_buffer_index > MAX_JSON_RECORD_LENGTH):
+                    raise ValueError("invalid JSON record (" + exception.msg
+                                     + ")") from exception
+        elif is_end_of_file:
+            return
+
+        # read more of the file
+        json_chunk = text_stream.read(JSON_READ_CHUNK_SIZE)
+        is_end_of_file = len(json_chunk) == 0
+        json_buffer = json_buffer[json_buffer_index:] + json_chunk
+        json_buffer_index = 0
+
+def get_reminder_record_error(reminder_record):
+    """This function validates an imported reminder record with the checks used by the 'new
+    reminder' page, and returns a message describing the problem (or None if the record is
+    valid)."""
+    if not isinstance(reminder_record, dict):
+        return "not a reminder record."
+
+    # check if reminder date/time is valid (expired reminders are accepted if they would
+    # still be kept)
+    try:
+        if not reminder_record.get("reminder_datetime"):
+            return "the reminder date is missing."
+        if datetime.fromisoformat(reminder_record["reminder_datetime"]) < (datetime.now()
+                - timedelta(hours=server_constants.EXPIRED_REMINDER_RETENTION_HOURS)):
+            return ("the reminder expired more than "
+                    + str(server_constants.EXPIRED_REMINDER_RETENTION_HOURS) + " hours ago.")
+    except (TypeError, ValueError):
+        return "the reminder date is invalid."
+
+    # check if reminder title, tags and description are valid
+    if not new_reminder_page_module.is_reminder_title_valid(
+            reminder_record.get("reminder_title") or ""):
+        return "the title is missing, too short or too long."
+    if not new_reminder_page_module.is_reminder_tags_string_valid(
+            reminder_record.get("reminder_tags") or ""):
+        return "the tag string is too long."
+    if not new_reminder_page_module.is_reminder_description_valid(
+            reminder_record.get("reminder_description") or ""):
+        return "the description is too long."
+
+    return None
+
+def create_reminder_row(reminder_record):
+    """This function returns the INSERT_NEW_REMINDER parameters for a validated reminder
+    record."""
+    return [str(uuid.uuid4()),
+            new_reminder_page_module.convert_datetime_from_iso_to_sqlite(
+                reminder_record["reminder_datetime"]),
+            str(reminder_record["reminder_title"]),
+            str(reminder_record.get("reminder_tags") or ""),
+            str(reminder_record.get("reminder_description") or ""),
+            new_reminder_page_module.convert_datetime_from_iso_to_epoch(
+                reminder_record["reminder_datetime"])]
+
+def export_reminders(user_id, file_format):
+    """This function is a generator which yields the text of a CSV or JSON file containing
+    every reminder of the user, reading them from the database EXPORT_CHUNK_SIZE at a time:
+    first the reminders without a due date epoch (in order of reminder ID), then the rest
+    in order of due date."""
+
+    # write the start of the file
+    if file_format == "csv":
+        yield create_csv_lines([REMINDER_TRANSFER_FIELDS])
+    else:
+        yield "["
+
+    # list containing a boolean indicating if a record has been written (shared by both
+    # parts of the export)
+    is_first_record = [True]
+
+    # export the reminders without a due date epoch (the keyset of the other reminders
+    # can't include them)
+    export_cursor = ""
+    while export_cursor is not None:
+        query_results = database_access_module.perform_user_reminder_db_query(user_id,
+            "Export reminders without due epoch", db_scripts.GET_REMINDER_EXPORT_NULL_EPOCH_CHUNK,
+            [export_cursor, EXPORT_CHUNK_SIZE])
+        # check if query failed (the file is left incomplete, so it can't be mistaken for a
+        # complete export)
+        if query_results is None:
+            print("Error! Unable to export the reminders of user " + str(user_id))
+            return
+        yield create_export_chunk(query_results, file_format, is_first_record)
+        # -continue after the last reminder exported, unless the chunk was the last one
+        export_cursor = (query_results[-1][0] if len(query_results) == EXPORT_CHUNK_SIZE
+                         else None)
+
+    # export the remaining reminders, in order of due date
+    export_cursor = EXPORT_START_CURSOR
+    while export_cursor is not None:
+        query_results = database_access_module.perform_user_reminder_db_query(user_id,
+            "Export reminders", db_scripts.GET_REMINDER_EXPORT_CHUNK,
+            [export_cursor[0], export_cursor[1], EXPORT_CHUNK_SIZE])
+        # check if query failed
+        if query_results is None:
+            print("Error! Unable to export the reminders of user " + str(user_id))
+            return
+        yield create_export_chunk(query_results, file_format, is_first_record)
+        export_cursor = ([query_results[-1][5], query_results[-1][0]]
+                         if len(query_results) == EXPORT_CHUNK_SIZE else None)
+
+    # write the end of the file
+    if file_format == "json":
+        yield "\n]\n"
+
+def create_export_chunk(query_results, file_format, is_first_record):
+    """This function returns the text of the records of a chunk of exported reminder rows
+    (each containing the reminder ID, due date, title, tags, description and due epoch).
+    is_first_record is a list containing a boolean indicating if no record has been written
+    yet (updated after the chunk is written)."""
+    reminder_record_list = [[row[1], row[2], row[3], row[4]] for row in query_results]
+    if file_format == "csv":
+        return create_csv_lines(reminder_record_list)
+    if len(reminder_record_list) == 0:
+        return ""
+
+    json_chunk = (("\n" if is_first_record[0] else ",\n")
+                  + ",\n".join(json.dumps(dict(zip(REMINDER_TRANSFER_FIELDS, reminder_record)))
+                               for reminder_record in reminder_record_list))
+    is_first_record[0] = False
+    return json_chunk
+
+def create_csv_lines(record_list):
+    """This function returns the lines of a CSV file containing the records (each a list of
+    fields)."""
+    csv_lines = io.StringIO()
+    csv.writer(csv_lines).writerows(record_list)
+    return csv_lines.getvalue()
@@ -1,6 +1,6 @@
 """This module contains code related to the 'update password' page of the website,
 including password validation and user information database updates."""
-from webpage_modules import registration_module, update_password_module
+from webpage_modules import registration_module, common_password_module
 import user_session_manager_module
 from database_modules import user_database_module
 
@@ -15,8 +15,6 @@ PASSWORD_REPEAT_DESCRIPTOR = "Please re-enter the password you typed."
 PASSWORD_TB_BACKCOLOR = "#ffffff"
 PASSWORD_REPEAT_TB_BACKCOLOR = "#ffffff"
 
-MOST_COMMON_PASSWORD_LIST = []
-
 def try_update_user_password(new_password, repeated_password, session_id, page_jinja_variables):
     """This function checks the password the user entered (and the repeated password)
     against basic password requirements, as well as NIST SP 800-63B criteria. If the
@@ -40,7 +38,7 @@ def try_update_user_password(new_password, repeated_password, session_id, page_j
         return page_jinja_variables
 
     # check if password is on list of most common passwords (loaded from CommonPasswords.txt)
-    if new_password in MOST_COMMON_PASSWORD_LIST:
+    if common_password_module.is_password_common(new_password):
         # update error message, return page
         page_jinja_variables["BANNER_MESSAGE"] = ("Your password is too common to be used,"
             " please pick another one.")
@@ -52,6 +50,11 @@ def try_update_user_password(new_password, repeated_password, session_id, page_j
     user_id = user_session_manager_module.get_user_id_from_session_id(session_id)
     # -next, get password hash (contact registration module for it)
     new_password_hash = registration_module.compute_password_hash(new_password, user_id)
+    # -check if the password couldn't be hashed (hashing service is overloaded)
+    if new_password_hash is None:
+        page_jinja_variables["BANNER_MESSAGE"] = ("Error! The server is busy, please try"
+            " again in a moment.")
+        return page_jinja_variables
     # -finally, store the new password hash in the database by running a query
     user_database_module.update_user_password_hash(str(user_id), str(new_password_hash))
 
@@ -60,23 +63,6 @@ def try_update_user_password(new_password, repeated_password, session_id, page_j
         " Click 'cancel' to return to the homepage.")
     return page_jinja_variables
 
-def try_load_most_common_passwords(most_common_passwords_filepath):
-    """This function tried to load the most common passwords into a list in
-    the server program, from the file at the specified filepath. If it fails,
-    it prints an error message indicating the problem."""
-
-    try:
-        with open(most_common_passwords_filepath, 'r', encoding='utf-8') as file:
-            # read file lines into program
-            update_password_module.MOST_COMMON_PASSWORD_LIST = file.readlines()
-
-            # strip newline characters off items
-            update_password_module.MOST_COMMON_PASSWORD_LIST = [item.strip()
-                for item in update_password_module.MOST_COMMON_PASSWORD_LIST]
-
-    except FileNotFoundError:
-        print("Error - unable to access CommonPasswords.txt. Server restart recommended!")
-
 def init_jinja_var_dictionary():
     """This function initializes default values for the page's jinja dictionary.
     Note: this function should only be run once, when the web server is initially
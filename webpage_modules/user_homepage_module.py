@@ -3,10 +3,21 @@ HTML page."""
 
 import datetime
 from datetime import datetime
+import time
 import user_session_manager_module
-from database_modules import db_scripts, database_access_module
+import server_constants
+from database_modules import db_scripts, database_access_module, reminder_query_cache_module
 import reminder_container
 
+# number of reminders listed per page (unless the page requests a different page size), and
+# the maximum page size a page can request (larger when the reminder table is streamed, since
+# only one chunk of the page is held in memory at a time)
+REMINDER_PAGE_SIZE = 100
+MAX_REMINDER_PAGE_SIZE = 500
+MAX_STREAMED_REMINDER_PAGE_SIZE = 10000
+# number of reminders read from the database at a time when the reminder table is streamed
+REMINDER_STREAM_CHUNK_SIZE = 100
+
 def init_jinja_var_dictionary():
     """This function initializes default values for the page's jinja dictionary,
     and returns the dictionary."""
@@ -17,15 +28,25 @@ def init_jinja_var_dictionary():
     # return dictionary
     return page_jinja_variable_dictionary
 
-def get_reminders_within_time_period(session_id, period_hours, jinja_var_dict):
-    """This function returns a list of ReminderContainer objects belonging to the
-    user who the session_id was assigned to, that are within (the value of period_hours)
-    hours from the current date/time. If no items are found, an empty list is returned.
-    The function also updates the banner message in the jinja variable dictionary."""
+def get_reminders_within_time_period(session_id, period_hours, jinja_var_dict, page_cursor=None,
+                                     page_size=REMINDER_PAGE_SIZE):
+    """This function returns the ReminderContainer objects belonging to the user who the
+    session_id was assigned to, that are within (the value of period_hours) hours from the
+    current date/time, in order of due date. At most page_size reminders are returned; if
+    page_cursor (from a previous page's "NEXT_PAGE_CURSOR") is specified, the reminders after
+    the previous page are returned. The function also updates the banner message and the
+    next page's cursor ("NEXT_PAGE_CURSOR", None if this is the last page) in the jinja
+    variable dictionary. Recently viewed pages are returned from the reminder query cache.
+
+    If server_constants.REMINDER_TABLE_RENDER_MODE is "streamed", a generator is returned,
+    which reads the reminders from the database in chunks as it is iterated (and sets the
+    next page's cursor when it is exhausted). Otherwise a list is returned. If no items are
+    found, an empty list is returned."""
 
     # declare function variables
     # -declare list to hold the ReminderContainer objects representing reminders within timeframe
     reminders_within_timeframe_list = []
+    jinja_var_dict["NEXT_PAGE_CURSOR"] = None
 
     # get user ID from session ID
     user_id = user_session_manager_module.get_user_id_from_session_id(session_id)
@@ -38,48 +59,229 @@ def get_reminders_within_time_period(session_id, period_hours, jinja_var_dict):
             " token. Please log out, log back in and try again.")
         return reminders_within_timeframe_list
 
-    # declare variable for query results
-    query_results = []
+    # check if the page is cached (cached pages are a list containing the reminders and the
+    # next page's cursor)
+    page_key = (period_hours, page_cursor, page_size)
+    cached_reminder_page = reminder_query_cache_module.get_cached_reminder_page(user_id,
+        page_key)
+    if cached_reminder_page is not None:
+        jinja_var_dict["NEXT_PAGE_CURSOR"] = cached_reminder_page[1]
+        update_reminder_banner_message(jinja_var_dict, period_hours,
+            len(cached_reminder_page[0]), cached_reminder_page[1] is not None, page_size)
+        return cached_reminder_page[0]
+
+    # read the generation of the user's reminders before they're queried (if they're written
+    # to while they're being read, the page isn't cached)
+    reminder_generation = reminder_query_cache_module.get_reminder_generation(user_id)
+
+    # get the window's bounds and the position the page starts at
+    reminder_window = get_reminder_window(period_hours, page_cursor)
+
+    # check if the reminder table is streamed
+    if server_constants.REMINDER_TABLE_RENDER_MODE == "streamed":
+        # count the reminders first (the banner is sent before the table)
+        # -(counting stops after one more reminder than fits on the page)
+        reminder_count = count_reminders_in_window(user_id, period_hours, reminder_window,
+            page_size + 1)
+        update_reminder_banner_message(jinja_var_dict, period_hours,
+            min(reminder_count, page_size), reminder_count > page_size, page_size)
+        # -only pages which could be rendered in buffered mode are cached
+        return stream_reminders_in_window(user_id, period_hours, reminder_window, page_size,
+            jinja_var_dict, [page_key, reminder_generation]
+            if page_size <= MAX_REMINDER_PAGE_SIZE else None)
 
     # user ID is valid for session token
-    # -contact the database access module and run query to identify all reminders within the
-    #  desired timeframe
-    if period_hours >= 0:
-        query_results = database_access_module.perform_user_reminder_db_query(user_id,
-            "Get reminders within next " + str(period_hours) + " hours",
-              db_scripts.GET_REMINDERS_BY_DATETIME,
-              [period_hours])
-    else:
-        # get past results
-        query_results = database_access_module.perform_user_reminder_db_query(user_id,
-            "Get reminders within next " + str(period_hours) + " hours",
-                db_scripts.GET_PAST_REMINDERS, None)
+    # -contact the database access module and run query to identify the page of reminders
+    #  within the desired timeframe (one extra reminder is requested to check if there are
+    #  more pages)
+    query_results = query_reminders_in_window(user_id, period_hours, reminder_window,
+        reminder_window["page_start"], page_size + 1)
 
     # check if query result is not none
     if query_results is not None:
-        # reminders within timeframe found
-        # -populate ReminderContainers for each item, add them to REMINDERS_WITHIN_TIMEFRAME_LIST
-        for row in query_results:
-            # populate a reminder container object
-            new_reminder_container = reminder_container.ReminderContainer(
-                str(row[1]), str(row[2]),
-                str(row[3]), str(row[4]))
-            # add to the 'reminders within timeframe' list
-            reminders_within_timeframe_list.append(new_reminder_container)
-
-    # sort reminders by date (sorted in asscending order in hours to deadline)
-    sorted_reminder_list = sorted(reminders_within_timeframe_list,
-        key=lambda obj: obj.reminder_datetime)
+        # reminders within timeframe found (already sorted by the database, in ascending
+        # order of due date)
+        reminders_within_timeframe_list = query_results[:page_size]
+
+        # check if there is another page; if so, it starts after the last reminder shown
+        if len(query_results) > page_size:
+            jinja_var_dict["NEXT_PAGE_CURSOR"] = create_page_cursor(
+                reminder_window["window_epoch"], reminders_within_timeframe_list[-1])
+
+        # cache the page
+        reminder_query_cache_module.cache_reminder_page(user_id, page_key, reminder_generation,
+            [reminders_within_timeframe_list, jinja_var_dict["NEXT_PAGE_CURSOR"]],
+            len(reminders_within_timeframe_list))
+
+    update_reminder_banner_message(jinja_var_dict, period_hours,
+        len(reminders_within_timeframe_list), jinja_var_dict["NEXT_PAGE_CURSOR"] is not None,
+        page_size)
+
+    # return reminders within timeframe list
+    return reminders_within_timeframe_list
+
+def get_reminder_window(period_hours, page_cursor):
+    """This function returns a dictionary describing the reminder window period_hours hours
+    from the present (or up to 72 hours in the past, if period_hours is negative): the time
+    the window starts/ends at ("window_epoch"), its start (exclusive for future reminders) and
+    end epochs ("start_epoch", "end_epoch") and the due date epoch and reminder ID the page
+    starts after ("page_start"). Pages after the first (with a page cursor) keep the time
+    the first page's window started/ended at, so the pages line up."""
+
+    # read the page cursor
+    page_cursor_values = read_page_cursor(page_cursor)
+    if page_cursor_values is not None:
+        window_epoch = page_cursor_values[0]
+    else:
+        # get the current time (as seconds since the unix epoch), used as the start or end
+        # of the timeframe
+        window_epoch = int(time.time())
+
+    reminder_window = {"window_epoch": window_epoch}
+    if period_hours >= 0:
+        reminder_window["start_epoch"] = window_epoch
+        reminder_window["end_epoch"] = window_epoch + period_hours * 3600
+    else:
+        reminder_window["start_epoch"] = (window_epoch
+            - server_constants.EXPIRED_REMINDER_RETENTION_HOURS * 3600)
+        reminder_window["end_epoch"] = window_epoch
+
+    # the first page starts at the start of the window
+    reminder_window["page_start"] = (page_cursor_values[1:] if page_cursor_values is not None
+                                     else [reminder_window["start_epoch"], ""])
+    return reminder_window
+
+def query_reminders_in_window(user_id, period_hours, reminder_window, page_start, limit):
+    """This function returns a list of (at most limit) ReminderContainer objects for the
+    user's reminders in the window which come after page_start (a due date epoch and reminder
+    ID), in order of due date, or None if the query failed."""
+    # the query's rows are built directly into ReminderContainers, colored relative to the
+    # time the window starts/ends at
+    return database_access_module.perform_user_reminder_db_query(user_id,
+        "Get reminders within next " + str(period_hours) + " hours",
+        db_scripts.GET_REMINDERS_BY_DATETIME if period_hours >= 0
+        else db_scripts.GET_PAST_REMINDERS,
+        [page_start[0], page_start[1], reminder_window["start_epoch"],
+         reminder_window["end_epoch"], limit],
+        row_factory=reminder_container.create_reminder_row_factory(
+            reminder_window["window_epoch"]))
+
+def count_reminders_in_window(user_id, period_hours, reminder_window, count_limit):
+    """This function returns the number of the user's reminders in the window from the start
+    of the page onwards, up to count_limit (0 if the query failed)."""
+    query_results = database_access_module.perform_user_reminder_db_query(user_id,
+        "Count reminders within next " + str(period_hours) + " hours",
+        db_scripts.COUNT_REMINDERS_BY_DATETIME if period_hours >= 0
+        else db_scripts.COUNT_PAST_REMINDERS,
+        [reminder_window["page_start"][0], reminder_window["page_start"][1],
+         reminder_window["start_epoch"], reminder_window["end_epoch"], count_limit])
+
+    # check if query failed
+    if not query_results:
+        return 0
+    return query_results[0][0]
+
+def stream_reminders_in_window(user_id, period_hours, reminder_window, page_size,
+                               jinja_var_dict, page_cache_details=None):
+    """This function is a generator which yields (at most page_size) ReminderContainer
+    objects for the user's reminders in the window, reading them from the database
+    REMINDER_STREAM_CHUNK_SIZE at a time (so the database connection isn't held while the
+    page is sent). When it is exhausted, it sets the next page's cursor in the jinja
+    variable dictionary if there are more reminders. If page_cache_details (a list
+    containing the page key and the reminder generation) isn't None, the page is added to
+    the reminder query cache once it has been streamed."""
+
+    page_start = reminder_window["page_start"]
+    streamed_reminder_count = 0
+    # -the reminders streamed are only kept if the page is cached
+    streamed_reminder_list = []
+    last_reminder = None
+    is_page_full = True
+
+    while streamed_reminder_count < page_size:
+        # read the next chunk, starting after the last reminder streamed
+        chunk_size = min(REMINDER_STREAM_CHUNK_SIZE, page_size - streamed_reminder_count)
+        reminder_chunk = query_reminders_in_window(user_id, period_hours, reminder_window,
+            page_start, chunk_size)
+
+        # check if the query failed (the page isn't cached)
+        if reminder_chunk is None:
+            return
+
+        yield from reminder_chunk
+        streamed_reminder_count += len(reminder_chunk)
+        if page_cache_details is not None:
+            streamed_reminder_list.extend(reminder_chunk)
+
+        # check if the chunk was the last one
+        if len(reminder_chunk) < chunk_size:
+            is_page_full = False
+            break
+
+        last_reminder = reminder_chunk[-1]
+        page_start = [last_reminder.reminder_due_epoch, last_reminder.reminder_id]
+
+    # if the page is full, check if there is another page after it
+    if is_page_full and query_reminders_in_window(user_id, period_hours, reminder_window,
+                                                  page_start, 1):
+        jinja_var_dict["NEXT_PAGE_CURSOR"] = create_page_cursor(
+            reminder_window["window_epoch"], last_reminder)
+
+    # cache the page
+    if page_cache_details is not None:
+        reminder_query_cache_module.cache_reminder_page(user_id, page_cache_details[0],
+            page_cache_details[1], [streamed_reminder_list, jinja_var_dict["NEXT_PAGE_CURSOR"]],
+            streamed_reminder_count)
+
+def update_reminder_banner_message(jinja_var_dict, period_hours, reminder_count,
+                                   has_more_pages, page_size):
+    """This function updates the banner message in the jinja variable dictionary with the
+    number of reminders found (and if there are more reminders than those shown)."""
+
+    # describe if there are more reminders than those shown
+    more_reminders_message = (" Click 'Load More' to see the next " + str(page_size) + "."
+                              if has_more_pages else "")
 
     # check if reminders are for future or past
     if period_hours > 0:
         # update the banner message (with number of records found)
-        jinja_var_dict["BANNER_MESSAGE"] = ("Found " + str(len(sorted_reminder_list))
-            + (" reminder(s) within the next " + str(period_hours) + " hours."))
+        jinja_var_dict["BANNER_MESSAGE"] = ("Found " + str(reminder_count)
+            + (" reminder(s) within the next " + str(period_hours) + " hours.")
+            + more_reminders_message)
     else:
         # update banner message with number of records found, from the past:
-        jinja_var_dict["BANNER_MESSAGE"] = ("Found " + str(len(sorted_reminder_list))
-            + (" expired reminder(s) (up to 72 hours since the present)"))
+        jinja_var_dict["BANNER_MESSAGE"] = ("Found " + str(reminder_count)
+            + (" expired reminder(s) (up to 72 hours since the present)")
+            + more_reminders_message)
 
-    # return reminders within timeframe list
-    return list(sorted_reminder_list)
+def create_page_cursor(window_epoch, last_reminder):
+    """This function returns the page cursor string for the page after last_reminder (the
+    last ReminderContainer on a page), for the window starting/ending at window_epoch."""
+    return (str(window_epoch) + ":" + str(last_reminder.reminder_due_epoch) + ":"
+            + str(last_reminder.reminder_id))
+
+def read_page_cursor(page_cursor):
+    """This function returns a list containing the window epoch, due date epoch and reminder ID
+    stored in a page cursor string, or None if page_cursor is None or invalid."""
+    if page_cursor is None:
+        return None
+
+    page_cursor_values = str(page_cursor).split(":", 2)
+    try:
+        return [int(page_cursor_values[0]), int(page_cursor_values[1]), page_cursor_values[2]]
+    except (IndexError, ValueError):
+        # invalid cursor (start from the first page)
+        return None
+
+def read_page_size(page_size_string):
+    """This function returns the page size specified by page_size_string (a form field),
+    limited to between 1 and MAX_REMINDER_PAGE_SIZE (MAX_STREAMED_REMINDER_PAGE_SIZE if the
+    reminder table is streamed). If page_size_string is None or isn't a number,
+    REMINDER_PAGE_SIZE is returned."""
+    max_page_size = (MAX_STREAMED_REMINDER_PAGE_SIZE
+                     if server_constants.REMINDER_TABLE_RENDER_MODE == "streamed"
+                     else MAX_REMINDER_PAGE_SIZE)
+    try:
+        return max(1, min(max_page_size, int(page_size_string)))
+    except (TypeError, ValueError):
+        return REMINDER_PAGE_SIZE
@@ -0,0 +1,98 @@
+"""This module contains the production web server, which serves the Flask app with a
+multi-threaded WSGI server, optionally in several worker processes which share one
+listening socket. Each worker process creates the app (connecting to the databases)
+after it starts, and releases its resources when the server is shut down (by SIGTERM
+or Ctrl+C)."""
+
+import os
+import signal
+import socket
+import threading
+from werkzeug.serving import make_server
+
+# list containing the process IDs of the running worker processes (only used by the
+# parent process when serving with multiple worker processes)
+WORKER_PROCESS_ID_LIST = []
+
+def serve_app(app_factory, resource_release_function, host, port, worker_count):
+    """This function serves the app returned by app_factory at the host and port until
+    the server is shut down. If worker_count is greater than one (and the platform
+    supports forking), the app is served by worker_count worker processes.
+
+    app_factory is called in each worker with a boolean indicating if the worker is the
+    primary worker (the one which runs the maintenance tasks), and returns the app.
+    resource_release_function is called in each worker after it stops serving."""
+
+    # check if multiple worker processes should be used (forking isn't available
+    # on Windows)
+    if worker_count <= 1 or not hasattr(os, "fork"):
+        if worker_count > 1:
+            print("Worker processes aren't supported on this platform, serving with"
+                  " a single process")
+        serve_worker(app_factory(True), resource_release_function, host, port, None)
+        return
+
+    # create the listening socket, shared by all the worker processes
+    listening_socket = socket.create_server((host, port))
+    listening_socket.set_inheritable(True)
+
+    for worker_index in range(worker_count):
+        worker_process_id = os.fork()
+        if worker_process_id == 0:
+            # worker process; serve requests, then exit without returning to the caller
+            exit_code = 0
+            try:
+                serve_worker(app_factory(worker_index == 0), resource_release_function,
+                    host, port, listening_socket.fileno())
+            except Exception as exception:  # pylint: disable=broad-exception-caught
+                # print error message
+                print("Error occurred in worker process " + str(os.getpid()))
+                print(str(exception))
+                exit_code = 1
+            os._exit(exit_code)  # pylint: disable=protected-access
+
+        WORKER_PROCESS_ID_LIST.append(worker_process_id)
+        print("Started worker process " + str(worker_process_id))
+
+    # the parent process only forwards shutdown signals to the workers
+    listening_socket.close()
+    signal.signal(signal.SIGTERM, stop_worker_processes)
+    signal.signal(signal.SIGINT, stop_worker_processes)
+
+    # wait for all workers to exit
+    for worker_process_id in WORKER_PROCESS_ID_LIST:
+        os.waitpid(worker_process_id, 0)
+    print("All worker processes stopped")
+
+def serve_worker(app, resource_release_function, host, port, listening_socket_fd):
+    """This function serves the app with a multi-threaded WSGI server (using the
+    already-bound listening socket if listening_socket_fd isn't None) until a shutdown
+    signal is received, then calls resource_release_function."""
+
+    server = make_server(host, port, app, threaded=True, fd=listening_socket_fd)
+
+    def request_shutdown(_signal_number, _stack_frame):
+        """This function stops the server when a shutdown signal is received (the server
+        has to be stopped from a thread other than the one serving requests)."""
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, request_shutdown)
+    signal.signal(signal.SIGINT, request_shutdown)
+
+    print("Process " + str(os.getpid()) + " serving on http://" + str(host) + ":" + str(port))
+    try:
+        server.serve_forever()
+    finally:
+        # close the server socket, and release databases/background threads
+        server.server_close()
+        resource_release_function()
+        print("Process " + str(os.getpid()) + " stopped")
+
+def stop_worker_processes(_signal_number, _stack_frame):
+    """This function forwards a shutdown signal to every worker process."""
+    for worker_process_id in WORKER_PROCESS_ID_LIST:
+        try:
+            os.kill(worker_process_id, signal.SIGTERM)
+        except ProcessLookupError:
+            # worker already exited
+            pass